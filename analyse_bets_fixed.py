@@ -2,19 +2,33 @@
 # analyse_bets_fixed.py
 # ---------------------------------------------------------------------------
 # Analyse les value bets en utilisant les prédictions LSTM et les cotes API
-# Combine les probabilités prédites par le modèle avec les cotes des bookmakers
+# Combine les probabilités prédites par le modèle avec la meilleure cote
+# disponible parmi tous les bookmakers (utils/odds_book.py). Les marchés
+# totaux, BTTS et handicap asiatique sont évalués sur les grilles de scores
+# Dixon-Coles (utils/markets.py). Chaque pari garde sa probabilité implicite
+# (1 / cote) et son edge, et y ajoute la probabilité de consensus sans marge
+# du marché et l'edge correspondant (utils/overround.py)
 # ---------------------------------------------------------------------------
 
 import os
-import json
+import sys
 import pandas as pd
 import numpy as np
 from glob import glob
 from datetime import datetime
 
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+from preprocessing.fixture_history import load_fixture_table
+from utils.value_bets import fixture_rows, find_value_bets, OUTCOMES, MIN_EV
+from utils.odds_book import OddsBook, MATCH_WINNER
+from utils.markets import MARKETS, parse_outcomes, grid_probabilities, complete_markets
+
 # Constantes
 TODAY = datetime.today().strftime("%Y-%m-%d")
-ODDS_PATHS = glob(f"data/raw/odds_*.json")
+ODDS_PATTERN = "data/raw/odds_*.json"
+PRICE_SOURCE = "best"          # "best" : meilleure cote du marché, sinon nom d'un bookmaker
+DEVIG_METHOD = "shin"          # retrait de marge : proportional, shin, power, odds_ratio
+GRID_MARKETS = ["Goals Over/Under", "Both Teams Score", "Asian Handicap"]   # réglés sur les grilles Dixon-Coles
 PREDICTIONS_PATH = "data/lstm/predictions_today.csv"
 OUTPUT_PATH = "data/bets_today.csv"
 
@@ -25,127 +39,107 @@ def load_predictions():
     
     predictions_df = pd.read_csv(PREDICTIONS_PATH)
     print(f"✅ {len(predictions_df)} prédictions LSTM chargées")
+    
+    # Anciennes prédictions sans identifiant : retrouver le match par les noms d'équipes
+    if "fixture_id" not in predictions_df.columns or predictions_df["fixture_id"].isna().any():
+        fixture_mapping = load_fixture_mapping()
+        mapped = predictions_df["match"].map(fixture_mapping)
+        if "fixture_id" in predictions_df.columns:
+            mapped = predictions_df["fixture_id"].fillna(mapped)
+        predictions_df["fixture_id"] = mapped
     return predictions_df
 
 def load_fixture_mapping():
-    """Crée un mapping fixture_id -> noms des équipes"""
-    fixtures_files = glob("data/raw/fixtures_*_2025-08-04.json")
-    fixture_mapping = {}
-    
-    for fixtures_file in fixtures_files:
-        try:
-            with open(fixtures_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            for match in data.get("response", []):
-                fixture_id = match.get("fixture", {}).get("id")
-                home_team = match.get("teams", {}).get("home", {}).get("name")
-                away_team = match.get("teams", {}).get("away", {}).get("name")
-                
-                if fixture_id and home_team and away_team:
-                    fixture_mapping[fixture_id] = f"{home_team} vs {away_team}"
-                    
-        except Exception as e:
-            print(f"⚠️ Erreur lecture fixtures {fixtures_file}: {e}")
-            continue
-    
-    return fixture_mapping
+    """Crée un mapping "Domicile vs Extérieur" -> fixture_id (dernier match connu)"""
+    fixtures = load_fixture_table()
+    if fixtures.empty:
+        return {}
+    names = fixtures["home_team"] + " vs " + fixtures["away_team"]
+    return dict(zip(names, fixtures["fixture_id"]))
 
-def load_odds_data():
-    """Charge et structure les données de cotes"""
-    if not ODDS_PATHS:
+def load_odds_book():
+    """Carnet des cotes de tous les bookmakers pour les marchés supportés"""
+    odds_paths = glob(ODDS_PATTERN)
+    if not odds_paths:
         raise FileNotFoundError("❌ Aucun fichier de cotes trouvé dans data/raw/")
+    book = OddsBook.from_api_football(odds_paths, markets=list(MARKETS))
+    print(f"✅ {len(book.fixture_ids)} matchs cotés par {len(book.bookmakers)} bookmakers")
+    return book
+
+def market_prices(book, market, outcomes, fixture_ids=None, source=PRICE_SOURCE):
+    """
+    Cotes d'un marché au prix retenu
+    :param source: "best" pour la meilleure cote disponible, sinon nom d'un bookmaker
+    :return: (cotes (n, k), bookmakers (n, k))
+    """
+    if source == "best":
+        return book.best_prices(market, outcomes, fixture_ids)
+    odds = book.bookmaker_prices(source, market, outcomes, fixture_ids)
+    return odds, np.full(odds.shape, source, dtype=object)
+
+def load_odds_data(book, source=PRICE_SOURCE):
+    """
+    Cotes 1X2 ("Match Winner") des matchs cotés sur les trois issues
+    :return: (fixture_ids (n,), cotes (n, 3) Home / Draw / Away, bookmakers (n, 3))
+    """
+    odds, bookmakers = market_prices(book, MATCH_WINNER, OUTCOMES, source=source)
+    complete = np.isfinite(odds).all(axis=1)
+    print(f"✅ {complete.sum()} matchs avec cotes 1X2 (prix : {source})")
+    return book.fixture_ids[complete], odds[complete], bookmakers[complete]
+
+def calculate_value_bets(predictions_df, odds_ids, odds, min_ev=MIN_EV, bookmakers=None, fair=None):
+    """
+    Calcule les value bets basés sur les prédictions LSTM et cotes (alignés par fixture_id)
+    :param fair: probabilités sans marge (n, 3) alignées sur ``odds_ids``
+    """
+    predictions_df = predictions_df[predictions_df["fixture_id"].notna()]
+    proba = predictions_df[["prob_home", "prob_draw", "prob_away"]].to_numpy(dtype=np.float64)
+    fixture_ids, rows, odds_rows = fixture_rows(
+        predictions_df["fixture_id"].to_numpy(dtype=np.int64), odds_ids
+    )
     
-    # Charger le mapping fixture_id -> équipes
-    fixture_mapping = load_fixture_mapping()
-    all_odds = {}
-    
-    for odds_path in ODDS_PATHS:
-        try:
-            with open(odds_path, "r", encoding="utf-8") as f:
-                odds_data = json.load(f)
-            
-            # Extraire les cotes Bet365 pour chaque match
-            for match_odds in odds_data.get("response", []):
-                if "bookmakers" not in match_odds:
-                    continue
-                
-                # Récupérer fixture_id et les noms des équipes
-                fixture_id = match_odds.get("fixture", {}).get("id")
-                if fixture_id not in fixture_mapping:
-                    continue
-                
-                match_key = fixture_mapping[fixture_id]
-                
-                # Chercher les cotes Bet365
-                for bookmaker in match_odds["bookmakers"]:
-                    if bookmaker["name"] == "Bet365":
-                        for market in bookmaker["bets"]:
-                            if market["name"] == "Match Winner":
-                                odds_dict = {}
-                                for outcome in market["values"]:
-                                    if outcome["value"] == "Home":
-                                        odds_dict["odds_home"] = float(outcome["odd"])
-                                    elif outcome["value"] == "Draw":
-                                        odds_dict["odds_draw"] = float(outcome["odd"])
-                                    elif outcome["value"] == "Away":
-                                        odds_dict["odds_away"] = float(outcome["odd"])
-                                
-                                if len(odds_dict) == 3:  # Toutes les cotes présentes
-                                    all_odds[match_key] = odds_dict
-                                    break
-                        break
-                        
-        except Exception as e:
-            print(f"⚠️ Erreur lecture cotes {odds_path}: {e}")
-            continue
+    missing = len(predictions_df) - len(fixture_ids)
+    if missing:
+        print(f"⚠️ Cotes manquantes pour {missing} matchs")
     
-    print(f"✅ {len(all_odds)} matchs avec cotes chargés")
-    return all_odds
+    return find_value_bets(
+        fixture_ids, proba[rows], odds[odds_rows], OUTCOMES,
+        labels=predictions_df["match"].to_numpy()[rows], min_ev=min_ev, market=MATCH_WINNER,
+        bookmakers=None if bookmakers is None else bookmakers[odds_rows],
+        fair=None if fair is None else fair[odds_rows],
+    )
 
-def calculate_value_bets(predictions_df, odds_dict):
-    """Calcule les value bets basés sur les prédictions LSTM et cotes"""
-    value_bets = []
+def calculate_market_bets(predictions_df, book, markets=GRID_MARKETS, min_ev=MIN_EV):
+    """
+    Value bets des marchés totaux, BTTS et handicap asiatique : toutes les
+    sélections cotées sont réglées sur les grilles de scores Dixon-Coles
+    (calculées une seule fois pour tous les marchés)
+    """
+    from modeling.dixon_coles import load_score_grids
+    selections = {name: parse_outcomes(name, book.outcomes(name)) for name in markets}
+    selections = {name: sel for name, sel in selections.items() if sel[0]}
+    predictions_df = predictions_df[predictions_df["fixture_id"].notna()]
+    fixture_ids = np.intersect1d(predictions_df["fixture_id"].to_numpy(dtype=np.int64), book.fixture_ids)
+    if not selections or not len(fixture_ids):
+        return pd.DataFrame()
     
-    for _, prediction in predictions_df.iterrows():
-        match_name = prediction["match"]
-        
-        # Rechercher les cotes pour ce match
-        if match_name not in odds_dict:
-            print(f"⚠️ Cotes manquantes pour : {match_name}")
-            continue
-        
-        odds = odds_dict[match_name]
-        
-        # Probabilités prédites par LSTM
-        prob_home = prediction["prob_home"]
-        prob_draw = prediction["prob_draw"] 
-        prob_away = prediction["prob_away"]
-        
-        # Calculer les value bets pour chaque issue
-        outcomes = [
-            ("Home", prob_home, odds["odds_home"]),
-            ("Draw", prob_draw, odds["odds_draw"]),
-            ("Away", prob_away, odds["odds_away"])
-        ]
-        
-        for outcome_name, predicted_prob, bookmaker_odd in outcomes:
-            # Expected Value = (Cote × Probabilité prédite) - 1
-            expected_value = (bookmaker_odd * predicted_prob) - 1
-            
-            # Seuil minimum pour considérer comme value bet
-            if expected_value > 0.05:  # 5% de value minimum
-                value_bets.append({
-                    "match": match_name,
-                    "bet_on": outcome_name,
-                    "bookmaker_odds": bookmaker_odd,
-                    "expected_prob": round(predicted_prob, 3),
-                    "expected_value": round(expected_value, 3),
-                    "implied_odds_prob": round(1/bookmaker_odd, 3),
-                    "edge": round((predicted_prob - 1/bookmaker_odd) * 100, 2)  # Avantage en %
-                })
+    fixture_ids, grid = load_score_grids(fixture_ids)
+    labels = predictions_df.drop_duplicates("fixture_id").set_index("fixture_id")["match"]
+    labels = labels.reindex(fixture_ids).to_numpy()
+    p_win, p_push = grid_probabilities(grid, [s for _, sel in selections.values() for s in sel])
     
-    return value_bets
+    bets, start = [], 0
+    for name, (outcomes, sel) in selections.items():
+        cols = slice(start, start + len(sel))
+        start += len(sel)
+        odds, bookmakers = market_prices(book, name, outcomes, fixture_ids)
+        fair = book.consensus_probabilities(name, outcomes, fixture_ids, DEVIG_METHOD, complete_markets(sel))
+        bets.append(find_value_bets(
+            fixture_ids, p_win[:, cols], odds, outcomes, labels, min_ev=min_ev,
+            market=name, bookmakers=bookmakers, push=p_push[:, cols], fair=fair,
+        ))
+    print(f"✅ {start} sélections évaluées sur {len(fixture_ids)} grilles de scores ({', '.join(selections)})")
+    return pd.concat(bets, ignore_index=True)
 
 def main():
     """Analyse principale des value bets"""
@@ -154,21 +148,33 @@ def main():
         predictions_df = load_predictions()
         
         # 2. Charger les cotes des bookmakers
-        odds_dict = load_odds_data()
+        book = load_odds_book()
+        odds_ids, odds, bookmakers = load_odds_data(book)
         
-        # 3. Calculer les value bets
-        value_bets = calculate_value_bets(predictions_df, odds_dict)
+        # 3-4. Calculer les value bets au meilleur prix (triés par expected_value décroissant)
+        fair = book.consensus_probabilities(MATCH_WINNER, OUTCOMES, odds_ids, DEVIG_METHOD)
+        value_bets_df = calculate_value_bets(predictions_df, odds_ids, odds, bookmakers=bookmakers, fair=fair)
+        # Les marchés réglés sur les grilles (historique requis) ne bloquent jamais les paris 1X2
+        try:
+            market_bets_df = calculate_market_bets(predictions_df, book)
+        except Exception as e:
+            print(f"⚠️ Marchés {', '.join(GRID_MARKETS)} ignorés : {e}")
+            market_bets_df = pd.DataFrame()
+        # Modèle à l'origine de chaque pari (suivi de la CLV par modèle)
+        from modeling.registry import selected_backend
+        value_bets_df["model"] = selected_backend()
+        market_bets_df["model"] = "dixon_coles"
+        if not market_bets_df.empty:
+            value_bets_df = pd.concat([value_bets_df, market_bets_df], ignore_index=True)
+            value_bets_df["push_prob"] = value_bets_df["push_prob"].fillna(0.0)
+            value_bets_df = value_bets_df.sort_values("expected_value", ascending=False, ignore_index=True)
         
-        if not value_bets:
+        if value_bets_df.empty:
             print("ℹ️ Aucun value bet détecté aujourd'hui avec les critères actuels.")
             # Créer un fichier vide pour éviter les erreurs downstream
             pd.DataFrame().to_csv(OUTPUT_PATH, index=False)
             return
         
-        # 4. Créer le DataFrame et trier par expected_value décroissant
-        value_bets_df = pd.DataFrame(value_bets)
-        value_bets_df = value_bets_df.sort_values("expected_value", ascending=False)
-        
         # 5. Sauvegarder les résultats
         os.makedirs(os.path.dirname(OUTPUT_PATH) if os.path.dirname(OUTPUT_PATH) else ".", exist_ok=True)
         value_bets_df.to_csv(OUTPUT_PATH, index=False)
@@ -179,9 +185,11 @@ def main():
         print(f"\n💰 Top 5 Value Bets du jour:")
         for i, (_, bet) in enumerate(value_bets_df.head().iterrows()):
             print(f"   {i+1}. {bet['match']}")
-            print(f"      Pari: {bet['bet_on']} @ {bet['bookmaker_odds']}")
-            print(f"      Prob. LSTM: {bet['expected_prob']:.1%} vs Implied: {bet['implied_odds_prob']:.1%}")
-            print(f"      Expected Value: +{bet['expected_value']:.1%} | Edge: +{bet['edge']:.1f}%")
+            print(f"      Pari: {bet['market']} - {bet['bet_on']} @ {bet['bookmaker_odds']} ({bet['bookmaker']})")
+            print(f"      Prob. modèle: {bet['expected_prob']:.1%} vs Implied: {bet['implied_odds_prob']:.1%} "
+                  f"| Sans marge: {bet['fair_prob']:.1%}")
+            print(f"      Expected Value: {bet['expected_value']:+.1%} | Edge: {bet['edge']:+.1f}% "
+                  f"| Edge sans marge: {bet['fair_edge']:+.1f}%")
             print()
         
         # 7. Statistiques globales
@@ -191,7 +199,8 @@ def main():
         print(f"📊 Statistiques:")
         print(f"   - Value total cumulé: +{total_value:.1%}")
         print(f"   - Cote moyenne des bets: {avg_odds:.2f}")
-        print(f"   - Edge moyen: +{value_bets_df['edge'].mean():.1f}%")
+        print(f"   - Edge moyen: {value_bets_df['edge'].mean():+.1f}%")
+        print(f"   - Edge moyen sans marge: {value_bets_df['fair_edge'].mean():+.1f}%")
         
     except Exception as e:
         print(f"❌ Erreur lors de l'analyse des value bets : {e}")
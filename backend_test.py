@@ -282,6 +282,122 @@ class BettingTrackerTester:
         
         return True
     
+    def test_kelly_stake_policy(self):
+        """Test fractional Kelly stakes respect the exposure caps"""
+        from utils.staking import MAX_BET_FRACTION, MAX_DAILY_EXPOSURE
+        for path in ["data/betting_history.csv", "data/betting_config.json"]:
+            if os.path.exists(path):
+                os.remove(path)
+        tracker = BettingTracker(initial_bankroll=1000, stake_policy="kelly")
+        
+        tracker.add_todays_bets()
+        
+        history = tracker.get_history()
+        if history.empty:
+            return False
+        
+        # Every value bet gets a positive stake within the caps
+        if (history['bet_amount'] <= 0).any():
+            return False
+        if (history['bet_amount'] > 1000 * MAX_BET_FRACTION + 0.01).any():
+            return False
+        if history['bet_amount'].sum() > 1000 * MAX_DAILY_EXPOSURE + 0.01:
+            return False
+        
+        # Team C (Kelly 14.4%) gets more than Team A (Kelly 14.1%)
+        bets = history.set_index('match')['bet_amount']
+        return bets['Team C vs Team D'] >= bets['Team A vs Team B']
+    
+    def test_closing_line_value(self):
+        """Test CLV is filled from closing lines and aggregated incrementally"""
+        for path in ["data/betting_history.csv", "data/betting_config.json"]:
+            if os.path.exists(path):
+                os.remove(path)
+        bets = pd.read_csv("data/bets_today.csv").assign(fixture_id=[101, 102], model='ranking')
+        bets.to_csv("data/bets_today.csv", index=False)
+        tracker = BettingTracker()
+        tracker.add_todays_bets()
+        
+        # Closing line only for the first fixture
+        pd.DataFrame({
+            'fixture_id': [101], 'market': ['Match Winner'], 'outcome': ['Home'],
+            'closing_odds': [2.0], 'source': ['Pinnacle'], 'captured_at': ['2024-01-01T15:00:00+00:00']
+        }).to_csv("data/closing_lines.csv", index=False)
+        if tracker.update_closing_lines("data/closing_lines.csv") != 1:
+            return False
+        
+        # Second closing line arrives: only the new bet is counted
+        pd.DataFrame({
+            'fixture_id': [102], 'market': ['Match Winner'], 'outcome': ['Away'],
+            'closing_odds': [3.5], 'source': ['consensus'], 'captured_at': ['2024-01-01T17:00:00+00:00']
+        }).to_csv("data/closing_lines.csv", mode='a', header=False, index=False)
+        if tracker.update_closing_lines("data/closing_lines.csv") != 1:
+            return False
+        
+        history = tracker.get_history().set_index('match')
+        if abs(history.loc['Team A vs Team B', 'clv'] - 0.05) > 1e-6:   # 2.1 / 2.0 - 1
+            return False
+        if abs(history.loc['Team C vs Team D', 'clv'] - (2.8 / 3.5 - 1)) > 1e-4:
+            return False
+        
+        clv_stats = tracker.get_clv_statistics('model')
+        return len(clv_stats) == 1 and clv_stats.loc[0, 'bets_with_clv'] == 2
+    
+    def test_empty_event_features(self):
+        """Test event features are neutral (not a crash) when no events are indexed"""
+        import numpy as np
+        from preprocessing.match_events import (
+            _empty_table, rolling_form, team_match_features, build_event_features, FORM_FEATURES,
+        )
+        fixtures = pd.DataFrame(columns=['fixture_id', 'date', 'home_id', 'away_id'])
+        form = rolling_form(team_match_features(_empty_table(), fixtures))
+        matches = pd.DataFrame({'fixture.id': [1, 2], 'teams.home.id': [10, 11], 'teams.away.id': [12, 13]})
+        features = build_event_features(matches, form)
+        values = features[[f"home_form_{c}" for c in FORM_FEATURES]].to_numpy(dtype=float)
+        return len(features) == 2 and np.isfinite(values).all()
+    
+    def test_empty_odds_book(self):
+        """Test an odds book without any odds can be built and queried"""
+        import numpy as np
+        from utils.odds_book import OddsBook
+        book = OddsBook.from_records([])
+        prices, books = book.best_prices(fixture_ids=[1, 2])
+        consensus = book.consensus_probabilities(fixture_ids=[1])
+        return (prices.shape == (2, 3) and np.isnan(prices).all() and (books == None).all()
+                and np.isnan(consensus).all() and book.best_bookmaker(1, 'Match Winner', 'Home') is None)
+    
+    def test_market_bets_without_history(self):
+        """Test 1X2 value bets are still written when O/U odds exist but no match is finished"""
+        import analyse_bets_fixed
+        workdir = os.path.join(self.temp_dir, "no_history")
+        os.makedirs(os.path.join(workdir, "data/raw"))
+        os.makedirs(os.path.join(workdir, "data/lstm"))
+        os.makedirs(os.path.join(workdir, "data/processed"))
+        os.chdir(workdir)
+        try:
+            pd.DataFrame({
+                'fixture_id': [501], 'match': ['Team A vs Team B'], 'predicted_outcome': ['Home'],
+                'confidence': [0.75], 'prob_home': [0.75], 'prob_draw': [0.15], 'prob_away': [0.10]
+            }).to_csv("data/lstm/predictions_today.csv", index=False)
+            pd.DataFrame({
+                'fixture.id': [501], 'fixture.date': ['2024-01-01T15:00:00+00:00'], 'league.id': [39],
+                'teams.home.id': [1], 'teams.away.id': [2],
+                'teams.home.name': ['Team A'], 'teams.away.name': ['Team B']
+            }).to_csv("data/processed/base_matches.csv", index=False)
+            odds = {'response': [{'fixture': {'id': 501}, 'bookmakers': [{'name': 'Book', 'bets': [
+                {'name': 'Match Winner', 'values': [
+                    {'value': 'Home', 'odd': '2.00'}, {'value': 'Draw', 'odd': '4.00'}, {'value': 'Away', 'odd': '6.00'}]},
+                {'name': 'Goals Over/Under', 'values': [
+                    {'value': 'Over 2.5', 'odd': '1.90'}, {'value': 'Under 2.5', 'odd': '1.90'}]},
+            ]}]}]}
+            with open("data/raw/odds_2024-01-01.json", "w") as f:
+                json.dump(odds, f)
+            analyse_bets_fixed.main()
+            bets = pd.read_csv(analyse_bets_fixed.OUTPUT_PATH)
+            return (bets['market'] == 'Match Winner').any() and (bets['bet_on'] == 'Home').any()
+        finally:
+            os.chdir(self.temp_dir)
+    
     def run_all_tests(self):
         """Run all backend tests"""
         print("🏈 Starting Football LSTM Betting Dashboard Backend Tests")
@@ -299,6 +415,11 @@ class BettingTrackerTester:
             self.run_test("Statistics Calculation", self.test_statistics_calculation)
             self.run_test("League Statistics", self.test_league_statistics)
             self.run_test("Bet Size Multiplier", self.test_bet_size_multiplier)
+            self.run_test("Kelly Stake Policy", self.test_kelly_stake_policy)
+            self.run_test("Closing Line Value", self.test_closing_line_value)
+            self.run_test("Empty Event Features", self.test_empty_event_features)
+            self.run_test("Empty Odds Book", self.test_empty_odds_book)
+            self.run_test("Market Bets Without History", self.test_market_bets_without_history)
             
             # Print results
             print("\n" + "=" * 60)
@@ -11,17 +11,28 @@ import numpy as np
 from datetime import datetime, timedelta
 from glob import glob
 
+from utils.staking import stake_amounts
+
+HISTORY_COLUMNS = [
+    'date', 'fixture_id', 'match', 'league', 'model', 'market', 'bet_on', 'odds', 'bet_amount',
+    'predicted_prob', 'expected_value', 'status', 'actual_result',
+    'won', 'profit_loss', 'bankroll_after', 'closing_odds', 'clv'
+]
+CLOSING_PATH = "data/closing_lines.csv"
+
 class BettingTracker:
-    def __init__(self, initial_bankroll=1000, default_bet_size=10):
+    def __init__(self, initial_bankroll=1000, default_bet_size=10, stake_policy="flat"):
         """
         Initialise le tracker de paris
         
         Args:
             initial_bankroll (float): Bankroll initial en €
             default_bet_size (float): Mise par défaut en €
+            stake_policy (str): Politique de mise ("flat" = mise fixe, "kelly" = Kelly fractionnaire)
         """
         self.initial_bankroll = initial_bankroll
         self.default_bet_size = default_bet_size
+        self.stake_policy = stake_policy
         self.history_file = "data/betting_history.csv"
         self.config_file = "data/betting_config.json"
         
@@ -48,11 +59,7 @@ class BettingTracker:
         
         # Historique
         if not os.path.exists(self.history_file):
-            history_df = pd.DataFrame(columns=[
-                'date', 'match', 'league', 'bet_on', 'odds', 'bet_amount', 
-                'predicted_prob', 'expected_value', 'status', 'actual_result', 
-                'won', 'profit_loss', 'bankroll_after'
-            ])
+            history_df = pd.DataFrame(columns=HISTORY_COLUMNS)
             history_df.to_csv(self.history_file, index=False)
     
     def get_config(self):
@@ -85,12 +92,13 @@ class BettingTracker:
         except Exception as e:
             print(f"⚠️ Erreur sauvegarde config: {e}")
     
-    def add_todays_bets(self, bet_size_multiplier=1.0):
+    def add_todays_bets(self, bet_size_multiplier=1.0, stake_policy=None):
         """
         Ajoute les paris d'aujourd'hui à l'historique
         
         Args:
             bet_size_multiplier (float): Multiplicateur de mise (1.0 = mise normale)
+            stake_policy (str): Politique de mise (par défaut celle du tracker)
         """
         today = datetime.now().strftime("%Y-%m-%d")
         
@@ -130,27 +138,37 @@ class BettingTracker:
             config = self.get_config()
             current_bankroll = config['current_bankroll']
             
+            # Mises de tous les paris du jour, calculées ensemble
+            stake_policy = stake_policy or self.stake_policy
+            amounts = stake_amounts(stake_policy, bets_df, current_bankroll, self.default_bet_size)
+            amounts = amounts * float(bet_size_multiplier)
+            
             new_bets = []
             
-            for _, bet in bets_df.iterrows():
-                # FIX: Ensure bet_size_multiplier is applied correctly
-                bet_amount = float(self.default_bet_size) * float(bet_size_multiplier)
+            for (_, bet), bet_amount in zip(bets_df.iterrows(), amounts):
+                if bet_amount <= 0:
+                    continue
                 league = league_mapping.get(bet['match'], 'Inconnue')
                 
                 new_bet = {
                     'date': today,
+                    'fixture_id': bet.get('fixture_id', np.nan),
                     'match': bet['match'],
                     'league': league,
+                    'model': bet.get('model', 'Inconnu'),
+                    'market': bet.get('market', 'Match Winner'),
                     'bet_on': bet['bet_on'],
                     'odds': bet['bookmaker_odds'],
-                    'bet_amount': bet_amount,
+                    'bet_amount': float(bet_amount),
                     'predicted_prob': bet['expected_prob'],
                     'expected_value': bet['expected_value'],
                     'status': 'pending',
                     'actual_result': '',
                     'won': False,
                     'profit_loss': 0.0,
-                    'bankroll_after': current_bankroll
+                    'bankroll_after': current_bankroll,
+                    'closing_odds': np.nan,
+                    'clv': np.nan
                 }
                 new_bets.append(new_bet)
             
@@ -168,7 +186,7 @@ class BettingTracker:
             config['total_bets'] += len(new_bets)
             self.save_config(config)
             
-            print(f"✅ {len(new_bets)} paris ajoutés à l'historique pour le {today}")
+            print(f"✅ {len(new_bets)} paris ajoutés à l'historique pour le {today} (mises : {stake_policy})")
             
         except Exception as e:
             print(f"❌ Erreur lors de l'ajout des paris: {e}")
@@ -183,6 +201,9 @@ class BettingTracker:
         if date is None:
             date = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
         
+        # CLV des paris dont la ligne de clôture est arrivée depuis le dernier passage
+        self.update_closing_lines()
+        
         try:
             # Charger l'historique
             if not os.path.exists(self.history_file):
@@ -273,6 +294,78 @@ class BettingTracker:
         except Exception as e:
             print(f"❌ Erreur mise à jour résultats: {e}")
     
+    def update_closing_lines(self, closing_file=CLOSING_PATH):
+        """
+        Renseigne la cote de clôture et la CLV (cote prise / cote de clôture - 1)
+        des paris qui n'en ont pas encore, à partir des lignes de clôture
+        (utils/closing_lines.py). Les totaux de CLV par ligue et par modèle
+        sont mis à jour avec les seuls paris nouvellement renseignés.
+        
+        Returns:
+            int: Nombre de paris renseignés
+        """
+        try:
+            if not os.path.exists(self.history_file) or not os.path.exists(closing_file):
+                return 0
+            
+            history_df = self.get_history().reindex(columns=HISTORY_COLUMNS)
+            missing = history_df['closing_odds'].isna() & history_df['fixture_id'].notna()
+            if not missing.any():
+                return 0
+            
+            closing = pd.read_csv(closing_file).drop_duplicates(['fixture_id', 'market', 'outcome'], keep='last')
+            closing = closing.set_index(['fixture_id', 'market', 'outcome'])['closing_odds']
+            pending = history_df[missing]
+            keys = pd.MultiIndex.from_arrays([
+                pending['fixture_id'].astype(np.int64),
+                pending['market'].fillna('Match Winner'),
+                pending['bet_on'].astype(str),
+            ])
+            closing_odds = closing.reindex(keys).to_numpy()
+            found = ~np.isnan(closing_odds)
+            if not found.any():
+                return 0
+            
+            rows = pending.index[found]
+            history_df.loc[rows, 'closing_odds'] = closing_odds[found]
+            history_df.loc[rows, 'clv'] = (history_df.loc[rows, 'odds'] / closing_odds[found] - 1).round(4)
+            history_df.to_csv(self.history_file, index=False)
+            
+            # Totaux incrémentaux [nombre de paris, somme des CLV, paris battant la clôture]
+            config = self.get_config()
+            totals = config.setdefault('clv_totals', {'league': {}, 'model': {}})
+            new = history_df.loc[rows].fillna({'league': 'Inconnue', 'model': 'Inconnu'})
+            for by in ['league', 'model']:
+                grouped = new.groupby(by)['clv'].agg(['count', 'sum', lambda clv: (clv > 0).sum()])
+                for key, (count, total, beats) in grouped.iterrows():
+                    n, clv_sum, n_beats = totals[by].get(str(key), [0, 0.0, 0])
+                    totals[by][str(key)] = [int(n + count), float(clv_sum + total), int(n_beats + beats)]
+            self.save_config(config)
+            
+            print(f"📉 CLV renseignée pour {len(rows)} paris (moyenne {new['clv'].mean():+.2%})")
+            return len(rows)
+            
+        except Exception as e:
+            print(f"❌ Erreur mise à jour des lignes de clôture: {e}")
+            return 0
+    
+    def get_clv_statistics(self, by='league'):
+        """
+        CLV agrégée par ligue ou par modèle
+        
+        Args:
+            by (str): 'league' ou 'model'
+        """
+        totals = self.get_config().get('clv_totals', {}).get(by, {})
+        if not totals:
+            return pd.DataFrame()
+        
+        clv_stats = pd.DataFrame(
+            [(key, n, clv_sum / n, n_beats / n * 100) for key, (n, clv_sum, n_beats) in totals.items()],
+            columns=[by, 'bets_with_clv', 'avg_clv', 'beat_closing_rate']
+        )
+        return clv_stats.sort_values('avg_clv', ascending=False, ignore_index=True)
+    
     def get_history(self):
         """Retourne l'historique complet des paris"""
         try:
@@ -297,7 +390,8 @@ class BettingTracker:
                 'current_bankroll': config['current_bankroll'],
                 'profit_loss': 0,
                 'avg_odds': 0,
-                'pending_bets': 0
+                'pending_bets': 0,
+                'avg_clv': 0
             }
         
         completed_bets = history_df[history_df['status'] == 'completed']
@@ -311,7 +405,8 @@ class BettingTracker:
             'current_bankroll': config['current_bankroll'],
             'profit_loss': config['current_bankroll'] - config['initial_bankroll'],
             'avg_odds': completed_bets['odds'].mean() if len(completed_bets) > 0 else 0,
-            'pending_bets': len(history_df[history_df['status'] == 'pending'])
+            'pending_bets': len(history_df[history_df['status'] == 'pending']),
+            'avg_clv': history_df['clv'].mean() if 'clv' in history_df and history_df['clv'].notna().any() else 0
         }
         
         return stats
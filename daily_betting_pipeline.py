@@ -10,6 +10,7 @@ import subprocess
 import time
 from datetime import datetime, timedelta
 from betting_tracker import BettingTracker
+from modeling.registry import model_step
 
 def run_command(command, description):
     """Exécute une commande avec logging"""
@@ -63,17 +64,25 @@ def main():
     print(f"\n📈 ÉTAPE 2: Analyse des matchs du {today}")
     
     pipeline_success = True
+    # Étapes non requises (False) : un échec est signalé sans arrêter les paris
     pipeline_steps = [
-        ("python ingestion/fetch_fixtures.py", "Récupération fixtures"),
-        ("python ingestion/fetch_odds_api_football.py", "Récupération cotes"),
-        ("python ingestion/merge_dataset.py", "Fusion datasets"),
-        ("python preprocessing/create_lstm_sequences_fixed.py", "Séquences LSTM"),
-        ("python modeling/lstm_model_fixed.py", "Modèle LSTM"),
-        ("python analyse_bets_fixed.py", "Analyse value bets"),
+        ("python ingestion/fetch_fixtures.py", "Récupération fixtures", True),
+        ("python ingestion/fetch_odds_api_football.py", "Récupération cotes", True),
+        ("python utils/closing_lines.py", "Relevé des cotes et lignes de clôture", False),
+        ("python ingestion/merge_dataset.py", "Fusion datasets", True),
+        ("python preprocessing/player_strength.py", "Force des compositions", False),
+        ("python preprocessing/absence_impact.py", "Impact des absences", False),
+        ("python preprocessing/match_events.py", "Features événements", False),
+        ("python preprocessing/create_lstm_sequences_fixed.py", "Séquences LSTM", True),
+        (*model_step(), True),
+        ("python analyse_bets_fixed.py", "Analyse value bets", True),
     ]
     
-    for command, description in pipeline_steps:
+    for command, description, required in pipeline_steps:
         if not run_command(command, description):
+            if not required:
+                print(f"⚠️ Étape non critique ignorée: {description}")
+                continue
             pipeline_success = False
             print(f"⚠️ Arrêt du pipeline à cause d'une erreur dans: {description}")
             break
@@ -117,6 +126,7 @@ def main():
     print(f"\n📊 ÉTAPE 4: Rapport de synthèse")
     
     # Statistiques actuelles
+    tracker.update_closing_lines()
     stats = tracker.get_statistics()
     config = tracker.get_config()
     
@@ -129,6 +139,16 @@ def main():
     print(f"🎯 Taux de réussite: {stats['win_rate']:.1f}% ({stats['winning_bets']}/{stats['total_bets']})")
     print(f"📊 ROI: {stats['roi_percentage']:+.1f}%")
     print(f"⏳ Paris en attente: {stats['pending_bets']}")
+    print(f"📉 CLV moyenne: {stats['avg_clv']:+.2%}")
+    print("   ℹ️ Sans 'python utils/closing_lines.py --interval 15' lancé jusqu'aux coups d'envoi, "
+          "la ligne de clôture est le dernier relevé du pipeline (cotes du matin)")
+    
+    clv_by_model = tracker.get_clv_statistics('model')
+    if not clv_by_model.empty:
+        print("\n📉 CLV par modèle:")
+        for _, row in clv_by_model.iterrows():
+            print(f"   {row['model']}: {row['avg_clv']:+.2%} sur {row['bets_with_clv']} paris "
+                  f"({row['beat_closing_rate']:.0f}% au-dessus de la clôture)")
     
     # Performance des 7 derniers jours
     if not history_df.empty:
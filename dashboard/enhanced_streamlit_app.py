@@ -20,6 +20,8 @@ import time
 # Ajouter le répertoire parent au path pour imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from betting_tracker import BettingTracker
+from utils.staking import STAKE_POLICIES
+from evaluation.monte_carlo import simulate_paths, summarize_paths, slate_inputs
 
 # Configuration de la page
 st.set_page_config(
@@ -115,6 +117,7 @@ page_options = [
     "💰 Paris du Jour", 
     "📈 Historique & Stats", 
     "🏆 Stats par Ligues", 
+    "🎲 Simulation Monte Carlo", 
     "⚙️ Configuration"
 ]
 
@@ -284,11 +287,14 @@ elif page == "💰 Paris du Jour":
     
     with col2:
         bet_multiplier = st.slider("💵 Multiplicateur de mise", 0.1, 5.0, 1.0, 0.1)
+        stake_policy = st.selectbox("🎯 Politique de mise", list(STAKE_POLICIES),
+                                    help="flat : mise fixe ; kelly : Kelly fractionnaire optimisé sur tous les paris du jour ; "
+                                         "portfolio : Kelly sur scores simulés (paris corrélés)")
     
     with col3:
         if st.button("📝 Ajouter à l'Historique"):
             try:
-                tracker.add_todays_bets(bet_multiplier)
+                tracker.add_todays_bets(bet_multiplier, stake_policy)
                 st.success("✅ Paris ajoutés à l'historique!")
                 st.cache_data.clear()
                 time.sleep(1)
@@ -308,6 +314,54 @@ elif page == "💰 Paris du Jour":
     else:
         st.info("🔄 Aucun value bet détecté pour aujourd'hui.")
 
+elif page == "🎲 Simulation Monte Carlo":
+    st.header("🎲 Simulation Monte Carlo du Bankroll")
+    st.caption("Les paris du jour sont rejoués chaque jour sur des milliers de trajectoires simulées")
+
+    todays_bets = load_todays_bets()
+    if todays_bets.empty:
+        st.info("🔄 Aucun value bet du jour à simuler.")
+    else:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            n_paths = st.slider("🧮 Trajectoires", 1000, 20000, 5000, 1000)
+        with col2:
+            n_days = st.slider("📅 Jours simulés", 30, 365, 180, 15)
+        with col3:
+            mc_policy = st.selectbox("🎯 Politique de mise", list(STAKE_POLICIES), index=1)
+
+        config = tracker.get_config()
+        initial = float(config['current_bankroll'])
+        inputs = slate_inputs(todays_bets, mc_policy, initial, unit=config['default_bet_size'])
+        paths = simulate_paths(n_paths=n_paths, n_days=n_days, initial_bankroll=initial, seed=42, **inputs)
+        summary, bands = summarize_paths(paths)
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("💀 Probabilité de ruine", f"{summary['ruin_probability']:.1%}")
+        col2.metric("📈 Probabilité de profit", f"{summary['profit_probability']:.1%}")
+        col3.metric("📉 Drawdown médian", f"{summary['drawdown_q50']:.1%}")
+        col4.metric("🚀 Croissance/jour médiane", f"{summary['daily_growth_q50']:+.2%}")
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=bands.index, y=bands['q95'], line=dict(width=0), showlegend=False))
+        fig.add_trace(go.Scatter(x=bands.index, y=bands['q5'], fill='tonexty', line=dict(width=0),
+                                 fillcolor='rgba(31,119,180,0.2)', name='q5 - q95'))
+        fig.add_trace(go.Scatter(x=bands.index, y=bands['q75'], line=dict(width=0), showlegend=False))
+        fig.add_trace(go.Scatter(x=bands.index, y=bands['q25'], fill='tonexty', line=dict(width=0),
+                                 fillcolor='rgba(31,119,180,0.4)', name='q25 - q75'))
+        fig.add_trace(go.Scatter(x=bands.index, y=bands['q50'], line=dict(color='#1f77b4', width=3), name='Médiane'))
+        fig.add_hline(y=initial, line_dash="dash", line_color="red", annotation_text="Bankroll Actuel")
+        fig.update_layout(title="Distribution du Bankroll Simulé", xaxis_title="Jour",
+                          yaxis_title="Bankroll (€)", height=400)
+        st.plotly_chart(fig, use_container_width=True)
+
+        peak = np.maximum.accumulate(paths, axis=1)
+        drawdowns = (1 - paths / peak).max(axis=1)
+        fig = px.histogram(x=drawdowns, nbins=50, labels={'x': 'Drawdown maximal'},
+                           title="Distribution des Drawdowns Maximaux")
+        fig.update_layout(height=350, showlegend=False)
+        st.plotly_chart(fig, use_container_width=True)
+
 # Other pages continue with similar improvements but shortened for token limit...
 else:
     st.info(f"Page {page} en développement...")
@@ -112,7 +112,7 @@ try:
                 st.metric("Cote Moyenne", f"{avg_odds:.2f}")
             with col4:
                 avg_edge = bets_df["edge"].mean()
-                st.metric("Edge Moyen", f"+{avg_edge:.1f}%")
+                st.metric("Edge Moyen", f"{avg_edge:+.1f}%")
             
             # Graphique des value bets
             fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
@@ -137,10 +137,13 @@ try:
             
             # Tableau des value bets
             st.subheader("🏆 Top Value Bets")
-            display_bets = bets_df[["match", "bet_on", "bookmaker_odds", "expected_prob", "expected_value", "edge"]].copy()
+            columns = ["match", "bet_on", "bookmaker_odds", "expected_prob", "expected_value", "edge", "fair_edge"]
+            display_bets = bets_df[[c for c in columns if c in bets_df]].copy()
             display_bets["expected_prob"] = display_bets["expected_prob"].apply(lambda x: f"{x:.1%}")
-            display_bets["expected_value"] = display_bets["expected_value"].apply(lambda x: f"+{x:.1%}")
-            display_bets["edge"] = display_bets["edge"].apply(lambda x: f"+{x:.1f}%")
+            display_bets["expected_value"] = display_bets["expected_value"].apply(lambda x: f"{x:+.1%}")
+            for col in ("edge", "fair_edge"):
+                if col in display_bets:
+                    display_bets[col] = display_bets[col].apply(lambda x: f"{x:+.1f}%" if pd.notna(x) else "-")
             
             st.dataframe(display_bets, use_container_width=True)
             
@@ -1,45 +1,54 @@
 # evaluation/backtest_kelly.py
 # -----------------------------------------------------------------------------
 # Backtest des prédictions en utilisant le critère de Kelly
+# Rejoue les candidats historiques (evaluation/backtester.py) avec la
+# stratégie value_kelly : Kelly fractionnaire plafonné, bankroll mis à jour
+# chaque jour. Les candidats sont construits à partir des prédictions
+# walk-forward du backend configuré et de data/odds.csv au premier lancement,
+# et reconstruits s'ils datent d'une table de features non point-in-time.
 # -----------------------------------------------------------------------------
 
 import os
-import numpy as np
-
-PREDICTIONS_PATH = "data/lstm/y_pred_proba.npy"
-MERGED_DATA_PATH = "data/processed/base_matches.csv"
-
-# Vérifie que les fichiers nécessaires existent
-if not os.path.exists(PREDICTIONS_PATH):
-    print("❌ Prédictions manquantes. Exécute modeling/lstm_model.py d'abord.")
-    exit()
-
-if not os.path.exists(MERGED_DATA_PATH):
-    print("❌ Fichier base_matches.csv introuvable. Vérifie ingestion/merge_dataset.py.")
-    exit()
-
-try:
-    predicted_probas = np.load(PREDICTIONS_PATH)  # shape: (n, 3)
-    if predicted_probas.size == 0:
-        print("❌ Prédictions vides.")
-        exit()
-
-    import pandas as pd
-    base_matches = pd.read_csv(MERGED_DATA_PATH)
-
-    if base_matches.empty:
-        print("❌ Fichier base_matches.csv est vide.")
-        exit()
-
-    # 🔽 Exemple minimal de backtest — à adapter selon la logique de Kelly
-    print(f"🔎 Prédictions shape : {predicted_probas.shape}")
-    print(f"📊 Nombre de matchs disponibles : {len(base_matches)}")
-
-    # Exemple : afficher les 5 premières probas
-    for i, proba in enumerate(predicted_probas[:5]):
-        print(f"Match {i+1} => Home: {proba[0]:.2f}, Draw: {proba[1]:.2f}, Away: {proba[2]:.2f}")
-
-    print("✅ Backtest Kelly terminé (simulation basique).")
-
-except Exception as e:
-    print(f"❌ Erreur dans backtest_kelly.py : {e}")
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from evaluation.backtester import (
+    CANDIDATES_PATH, LEDGER_PATH, ODDS_PATH, create_strategy, iter_days, run_backtest, print_summary,
+    candidates_info, candidates_are_current,
+)
+
+
+def main():
+    try:
+        stale = os.path.exists(CANDIDATES_PATH) and not candidates_are_current(candidates_info(CANDIDATES_PATH))
+        if stale:
+            print("⚠️ Candidats construits avant la table point-in-time : reconstruction")
+        if stale or not os.path.exists(CANDIDATES_PATH):
+            import pandas as pd
+            from modeling.registry import selected_backend, load_config
+            from preprocessing.feature_frame import training_frame
+            from evaluation.backtester import historical_predictions, build_candidates, save_candidates
+
+            if not os.path.exists(ODDS_PATH):
+                print(f"❌ Cotes historiques introuvables ({ODDS_PATH}). Exécute preprocessing/match_odds_mapper.py d'abord.")
+                return
+            frame, y = training_frame()
+            backend = selected_backend()
+            print(f"🚀 Prédictions walk-forward {backend} sur {len(frame)} matchs...")
+            predictions = historical_predictions(backend, frame, y, config=load_config())
+            candidates = build_candidates(predictions, pd.read_csv(ODDS_PATH))
+            save_candidates(candidates, CANDIDATES_PATH, backend)
+            print(f"✅ {len(candidates)} candidats enregistrés dans {CANDIDATES_PATH}")
+
+        summary, ledger = run_backtest(create_strategy("value_kelly"), iter_days(CANDIDATES_PATH))
+        os.makedirs(os.path.dirname(LEDGER_PATH), exist_ok=True)
+        ledger.to_csv(LEDGER_PATH, index=False)
+        print_summary(summary, candidates_info(CANDIDATES_PATH))
+        print("✅ Backtest Kelly terminé.")
+
+    except Exception as e:
+        print(f"❌ Erreur dans backtest_kelly.py : {e}")
+
+
+if __name__ == "__main__":
+    main()
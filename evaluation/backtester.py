@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# evaluation/backtester.py
+# -----------------------------------------------------------------------------
+# Backtest événementiel des stratégies de paris sur l'historique
+# Les candidats (une ligne par match × sélection × relevé de cotes, triés par
+# date) sont lus par blocs et rejoués jour par jour : la stratégie choisit les
+# paris et leurs mises à partir du bankroll courant, puis tous les paris du
+# jour sont réglés en une opération vectorisée. Seul le grand livre quotidien
+# est conservé en mémoire : l'empreinte ne dépend pas du nombre de candidats.
+#
+# Format des candidats (CSV) : date, fixture_id, market, bet_on, odds, prob,
+# push_prob, payoff (gain par unité misée une fois le match joué : cote - 1,
+# 0 si remboursé, -1 si perdu).
+#
+# Chaque fichier de candidats est accompagné de sa provenance (<fichier>.json :
+# backend, version de la table de features, candidats simulés) : un ROI
+# calculé sur des candidats construits avant la table point-in-time
+# (preprocessing/feature_frame.py, FRAME_VERSION) est signalé comme biaisé.
+#
+# Usage : python evaluation/backtester.py --build --backend ranking
+#         python evaluation/backtester.py --strategy value_kelly
+#         python evaluation/backtester.py --synthetic 2000000
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.value_bets import OUTCOMES
+
+CANDIDATES_PATH = "data/evaluation/backtest_candidates.csv"
+LEDGER_PATH = "data/evaluation/backtest_ledger.csv"
+ODDS_PATH = "data/odds.csv"    # cotes historiques par fixture_id (preprocessing/match_odds_mapper.py)
+CHUNK_SIZE = 500_000
+INITIAL_BANKROLL = 1000.0
+
+CANDIDATE_COLUMNS = ["date", "fixture_id", "market", "bet_on", "odds", "prob", "push_prob", "payoff"]
+ODDS_COLUMNS = ["odds_home", "odds_draw", "odds_away"]
+
+STRATEGIES = {}
+
+
+def register_strategy(name):
+    """Décorateur : enregistre une classe de stratégie sous ``name``"""
+    def decorator(cls):
+        cls.name = name
+        STRATEGIES[name] = cls
+        return cls
+    return decorator
+
+
+class Strategy:
+    """
+    Interface des stratégies : ``select`` choisit les candidats du jour,
+    ``stake`` fixe la mise (en €) de chaque candidat retenu. ``day`` est un
+    dict de tableaux NumPy (une entrée par colonne de candidats).
+    """
+
+    name = None
+
+    def __init__(self, min_ev=0.05, **params):
+        self.min_ev = min_ev
+        self.params = params
+
+    def select(self, day):
+        ev = day["prob"] * day["odds"] + day["push_prob"] - 1
+        keep = np.nan_to_num(ev, nan=-1.0) > self.min_ev
+        # Une seule mise par sélection et par jour (premier relevé qui passe le seuil)
+        candidates = np.flatnonzero(keep)
+        first = np.zeros(len(keep), dtype=bool)
+        first[candidates[np.unique(day["selection"][candidates], return_index=True)[1]]] = True
+        return first
+
+    def stake(self, day, bankroll):
+        raise NotImplementedError
+
+
+@register_strategy("value_flat")
+class FlatValueStrategy(Strategy):
+    """Mise fixe sur chaque value bet."""
+
+    def stake(self, day, bankroll):
+        return np.full(len(day["odds"]), float(self.params.get("unit", 10.0)))
+
+
+@register_strategy("value_kelly")
+class KellyValueStrategy(Strategy):
+    """
+    Kelly fractionnaire pari par pari (forme fermée, remboursement compris),
+    plafonné par pari puis ramené au plafond d'exposition du jour.
+    """
+
+    def stake(self, day, bankroll):
+        from utils.staking import independent_kelly_fractions, MAX_DAILY_EXPOSURE
+        x = independent_kelly_fractions(
+            day["prob"], day["odds"], day["push_prob"],
+            max_exposure=self.params.get("max_exposure", MAX_DAILY_EXPOSURE),
+            **{k: v for k, v in self.params.items() if k in ("fraction", "max_bet")},
+        )
+        return np.round(x * bankroll, 2)
+
+
+@register_strategy("joint_kelly")
+class JointKellyStrategy(Strategy):
+    """Kelly fractionnaire optimisé conjointement sur la journée (utils/staking.py)."""
+
+    def stake(self, day, bankroll):
+        from utils.staking import kelly_stakes
+        bets = pd.DataFrame({
+            "fixture_id": day["fixture_id"], "match": day["fixture_id"], "market": day["market"],
+            "bookmaker_odds": day["odds"], "expected_prob": day["prob"], "push_prob": day["push_prob"],
+        })
+        return kelly_stakes(bets, bankroll, **self.params)
+
+
+def create_strategy(name, **params):
+    if name not in STRATEGIES:
+        raise ValueError(f"❌ Stratégie inconnue : {name} (disponibles : {', '.join(STRATEGIES)})")
+    return STRATEGIES[name](**params)
+
+
+def _day_columns(chunk):
+    """Colonnes d'un bloc en tableaux, avec un code entier par (match, marché, issue)"""
+    columns = {c: chunk[c].to_numpy() for c in CANDIDATE_COLUMNS if c != "date"}
+    columns["push_prob"] = np.nan_to_num(columns["push_prob"].astype(np.float64))
+    columns["selection"] = pd.MultiIndex.from_arrays(
+        [chunk["fixture_id"], chunk["market"], chunk["bet_on"]]).factorize()[0]
+    return chunk["date"].astype(str).str[:10].to_numpy(), columns
+
+
+def iter_days(path=CANDIDATES_PATH, chunksize=CHUNK_SIZE):
+    """
+    Lit les candidats par blocs et produit ``(date, dict de tableaux)`` jour
+    par jour ; le dernier jour d'un bloc est complété par le bloc suivant.
+    """
+    carry = None
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype={"market": str, "bet_on": str}):
+        if "push_prob" not in chunk:
+            chunk["push_prob"] = 0.0
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        dates, columns = _day_columns(chunk)
+        starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]])
+        # Le dernier jour du bloc peut se poursuivre dans le bloc suivant
+        carry = chunk.iloc[starts[-1]:]
+        for start, end in zip(starts[:-1], starts[1:]):
+            yield dates[start], {c: v[start:end] for c, v in columns.items()}
+    if carry is not None and len(carry):
+        dates, columns = _day_columns(carry)
+        yield dates[0], columns
+
+
+def run_backtest(strategy, days, initial_bankroll=INITIAL_BANKROLL):
+    """
+    Rejoue ``days`` (itérable de (date, candidats)) avec ``strategy``.
+    :return: (résumé dict, grand livre quotidien DataFrame)
+    """
+    bankroll = peak = float(initial_bankroll)
+    max_drawdown = 0.0
+    n_candidates = n_bets = n_won = 0
+    staked = 0.0
+    ledger = []
+    start = time.perf_counter()
+
+    for date, day in days:
+        n_candidates += len(day["odds"])
+        selected = strategy.select(day)
+        if bankroll <= 0 or not selected.any():
+            continue
+        bets = {c: v[selected] for c, v in day.items()}
+        stakes = np.minimum(np.clip(strategy.stake(bets, bankroll), 0, None), bankroll)
+        # Exposition du jour limitée au bankroll disponible
+        total = stakes.sum()
+        if total > bankroll:
+            stakes *= bankroll / total
+        placed = stakes > 0
+        pnl = float(stakes @ bets["payoff"])
+
+        bankroll += pnl
+        peak = max(peak, bankroll)
+        max_drawdown = max(max_drawdown, 1 - bankroll / peak)
+        n_bets += int(placed.sum())
+        n_won += int((bets["payoff"][placed] > 0).sum())
+        staked += float(stakes.sum())
+        ledger.append((date, int(placed.sum()), float(stakes.sum()), pnl, bankroll))
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "strategy": strategy.name,
+        "days": len(ledger),
+        "candidates": n_candidates,
+        "bets": n_bets,
+        "win_rate": n_won / n_bets if n_bets else None,
+        "staked": staked,
+        "profit": bankroll - initial_bankroll,
+        "roi": (bankroll - initial_bankroll) / staked if staked else None,
+        "final_bankroll": bankroll,
+        "max_drawdown": max_drawdown,
+        "seconds": elapsed,
+        "candidates_per_s": n_candidates / elapsed if elapsed else None,
+    }
+    return summary, pd.DataFrame(ledger, columns=["date", "bets", "staked", "pnl", "bankroll"])
+
+
+# --- Construction des candidats ------------------------------------------------
+
+def historical_predictions(backend_name, frame, y, n_folds=5, config=None):
+    """
+    Prédictions hors échantillon d'un backend du registre sur tout
+    l'historique (folds chronologiques de walk_forward.make_folds).
+    """
+    from modeling.registry import create_backend
+    from evaluation.walk_forward import make_folds
+    parts = []
+    for train_start, train_end, test_end in make_folds(len(frame), n_folds):
+        backend = create_backend(backend_name, config)
+        backend.fit(frame.iloc[train_start:train_end], y[train_start:train_end])
+        proba = backend.predict_proba(frame.iloc[train_end:test_end])
+        part = frame.iloc[train_end:test_end][["date", "fixture_id"]].copy()
+        part[["prob_home", "prob_draw", "prob_away"]] = proba
+        part["result"] = y[train_end:test_end]
+        parts.append(part)
+        print(f"   ✅ Fold {len(parts)}/{n_folds} : {test_end - train_end} matchs prédits")
+    return pd.concat(parts, ignore_index=True)
+
+
+def build_candidates(predictions, odds):
+    """
+    Candidats 1X2 : une ligne par (match, issue) pour chaque relevé de cotes.
+    :param predictions: date, fixture_id, prob_home/draw/away, result (0/1/2)
+    :param odds: fixture_id, odds_home/draw/away (plusieurs relevés possibles)
+    """
+    merged = predictions.merge(odds[["fixture_id"] + ODDS_COLUMNS], on="fixture_id", how="inner")
+    merged = merged.sort_values("date", kind="mergesort").reset_index(drop=True)
+    n = len(merged)
+    proba = merged[["prob_home", "prob_draw", "prob_away"]].to_numpy(dtype=np.float64)
+    prices = merged[ODDS_COLUMNS].to_numpy(dtype=np.float64)
+    won = merged["result"].to_numpy(dtype=np.int64)[:, None] == np.arange(3)[None, :]
+    return pd.DataFrame({
+        "date": np.repeat(pd.to_datetime(merged["date"], utc=True).dt.strftime("%Y-%m-%d").to_numpy(), 3),
+        "fixture_id": np.repeat(merged["fixture_id"].to_numpy(), 3),
+        "market": "Match Winner",
+        "bet_on": np.tile(OUTCOMES, n),
+        "odds": prices.ravel(),
+        "prob": proba.ravel(),
+        "push_prob": 0.0,
+        "payoff": np.where(won, prices - 1, -1.0).ravel(),
+    })
+
+
+def write_synthetic_candidates(path, n_rows, per_day=600, seed=0, chunksize=CHUNK_SIZE):
+    """
+    Candidats simulés (marché 1X2, marge bookmaker ~5%, modèle moins bruité
+    que les cotes autour des vraies probabilités), écrits par blocs pour le
+    test de charge.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    n_matches = n_rows // 3
+    first_day = np.datetime64("2000-01-01")
+    for offset in range(0, n_matches, chunksize // 3):
+        m = min(chunksize // 3, n_matches - offset)
+        true = rng.dirichlet([4.0, 2.5, 3.0], m)
+        model = true * rng.lognormal(0, 0.03, true.shape)
+        model /= model.sum(axis=1, keepdims=True)
+        market = true * rng.lognormal(0, 0.06, true.shape)
+        odds = np.round(1 / (1.05 * market / market.sum(axis=1, keepdims=True)), 2)
+        result = (rng.random(m)[:, None] > np.cumsum(true, axis=1)).sum(axis=1)
+        won = result[:, None] == np.arange(3)[None, :]
+        day = first_day + (offset + np.arange(m)) // (per_day // 3)
+        pd.DataFrame({
+            "date": np.repeat(day.astype(str), 3),
+            "fixture_id": np.repeat(offset + np.arange(m), 3),
+            "market": "Match Winner",
+            "bet_on": np.tile(OUTCOMES, m),
+            "odds": odds.ravel(),
+            "prob": model.ravel().round(4),
+            "push_prob": 0.0,
+            "payoff": np.where(won, odds - 1, -1.0).ravel(),
+        }).to_csv(path, mode="w" if offset == 0 else "a", header=offset == 0, index=False)
+
+
+def save_candidates(candidates, path, backend):
+    """Écrit les candidats construits sur l'historique et leur provenance"""
+    from preprocessing.feature_frame import FRAME_VERSION
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    candidates.to_csv(path, index=False)
+    save_candidates_info(path, {"backend": backend, "frame_version": FRAME_VERSION})
+
+
+def save_candidates_info(path, info):
+    with open(f"{path}.json", "w") as f:
+        json.dump({**info, "built_at": pd.Timestamp.now().isoformat()}, f, indent=2)
+
+
+def candidates_info(path):
+    """Provenance des candidats (dict vide si inconnue : fichier construit avant son enregistrement)"""
+    if not os.path.exists(f"{path}.json"):
+        return {}
+    with open(f"{path}.json", "r") as f:
+        return json.load(f)
+
+
+def candidates_are_current(info):
+    """Candidats simulés, ou construits sur la table de features point-in-time actuelle"""
+    from preprocessing.feature_frame import FRAME_VERSION
+    return bool(info.get("synthetic")) or info.get("frame_version") == FRAME_VERSION
+
+
+def print_summary(summary, info=None):
+    print(f"\n📈 Backtest {summary['strategy']} : {summary['days']} jours, "
+          f"{summary['candidates']:,} candidats, {summary['bets']:,} paris")
+    if summary["bets"]:
+        print(f"   - Misé: {summary['staked']:.2f}€ | Profit: {summary['profit']:+.2f}€ | ROI: {summary['roi']:+.2%}")
+        print(f"   - Taux de réussite: {summary['win_rate']:.1%} | Drawdown max: {summary['max_drawdown']:.1%}")
+        print(f"   - Bankroll final: {summary['final_bankroll']:.2f}€")
+    print(f"   - {summary['seconds']:.1f}s ({summary['candidates_per_s']:,.0f} candidats/s), "
+          f"mémoire max {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} Mo")
+    if info is None:
+        return
+    if info.get("synthetic"):
+        print("   ℹ️ Candidats simulés (test de charge) : ROI sans valeur prédictive")
+    elif candidates_are_current(info):
+        print(f"   ℹ️ Candidats : prédictions walk-forward {info.get('backend')} sur la table point-in-time "
+              f"(rankings et forme d'avant-match)")
+    else:
+        print("   ⚠️ Candidats construits avant la table point-in-time (rankings du jour sur tout "
+              "l'historique) : ROI biaisé à la hausse, relancer --build")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest événementiel des stratégies de paris")
+    parser.add_argument("--strategy", default="value_kelly", help=f"stratégie ({', '.join(STRATEGIES)})")
+    parser.add_argument("--min-ev", type=float, default=0.05)
+    parser.add_argument("--bankroll", type=float, default=INITIAL_BANKROLL)
+    parser.add_argument("--candidates", default=CANDIDATES_PATH)
+    parser.add_argument("--build", action="store_true",
+                        help="construit les candidats (prédictions walk-forward + data/odds.csv)")
+    parser.add_argument("--backend", default="ranking", help="backend du registre pour --build")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--synthetic", type=int, default=None, help="test de charge sur N candidats simulés")
+    args = parser.parse_args()
+
+    try:
+        if args.synthetic:
+            start = time.perf_counter()
+            write_synthetic_candidates(args.candidates, args.synthetic)
+            save_candidates_info(args.candidates, {"synthetic": True})
+            print(f"✅ {args.synthetic:,} candidats simulés écrits en {time.perf_counter() - start:.1f}s")
+        elif args.build:
+            from preprocessing.feature_frame import training_frame
+            if not os.path.exists(ODDS_PATH):
+                raise FileNotFoundError(f"❌ Cotes historiques introuvables : {ODDS_PATH}")
+            frame, y = training_frame()
+            print(f"🚀 Prédictions walk-forward {args.backend} sur {len(frame)} matchs...")
+            predictions = historical_predictions(args.backend, frame, y, args.folds)
+            candidates = build_candidates(predictions, pd.read_csv(ODDS_PATH))
+            save_candidates(candidates, args.candidates, args.backend)
+            print(f"✅ {len(candidates)} candidats enregistrés dans {args.candidates}")
+
+        if not os.path.exists(args.candidates):
+            raise FileNotFoundError(f"❌ Candidats introuvables : {args.candidates} (lancer --build)")
+        strategy = create_strategy(args.strategy, min_ev=args.min_ev)
+        summary, ledger = run_backtest(strategy, iter_days(args.candidates), args.bankroll)
+        os.makedirs(os.path.dirname(LEDGER_PATH), exist_ok=True)
+        ledger.to_csv(LEDGER_PATH, index=False)
+        print_summary(summary, candidates_info(args.candidates))
+        print(f"   - Grand livre quotidien: {LEDGER_PATH}")
+
+    except Exception as e:
+        print(f"❌ Erreur dans backtester.py : {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# evaluation/metrics.py
+# -----------------------------------------------------------------------------
+# Métriques de qualité des probabilités prédites (Home / Draw / Away)
+# y : issues observées (0 = Home, 1 = Draw, 2 = Away), proba : (n, 3)
+# -----------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+EPS = 1e-12
+
+
+def log_loss(y, proba):
+    """Log-loss multiclasse moyenne"""
+    y = np.asarray(y, dtype=np.int64)
+    proba = np.clip(np.asarray(proba, dtype=np.float64), EPS, 1.0)
+    return float(-np.mean(np.log(proba[np.arange(len(y)), y])))
+
+
+def brier_score(y, proba):
+    """Score de Brier multiclasse (somme des écarts au carré, moyenne par match)"""
+    y = np.asarray(y, dtype=np.int64)
+    proba = np.asarray(proba, dtype=np.float64)
+    onehot = np.eye(proba.shape[1])[y]
+    return float(np.mean(np.sum((proba - onehot) ** 2, axis=1)))
+
+
+def accuracy(y, proba):
+    """Part des matchs dont l'issue la plus probable est la bonne"""
+    return float(np.mean(np.argmax(proba, axis=1) == np.asarray(y)))
+
+
+def calibration_table(y, proba, n_bins=10):
+    """
+    Table de fiabilité toutes issues confondues : probabilité moyenne prédite
+    et fréquence observée par tranche de probabilité.
+    """
+    y = np.asarray(y, dtype=np.int64)
+    proba = np.asarray(proba, dtype=np.float64)
+    p = proba.ravel()
+    hit = (np.arange(proba.shape[1])[None, :] == y[:, None]).ravel().astype(float)
+    bins = np.minimum((p * n_bins).astype(int), n_bins - 1)
+
+    count = np.bincount(bins, minlength=n_bins)
+    mean_pred = np.bincount(bins, weights=p, minlength=n_bins)
+    observed = np.bincount(bins, weights=hit, minlength=n_bins)
+    nonzero = count > 0
+    return pd.DataFrame({
+        "bin_low": np.arange(n_bins)[nonzero] / n_bins,
+        "count": count[nonzero],
+        "mean_pred": mean_pred[nonzero] / count[nonzero],
+        "observed": observed[nonzero] / count[nonzero],
+    })
+
+
+def expected_calibration_error(y, proba, n_bins=10):
+    """Écart moyen pondéré entre probabilité prédite et fréquence observée"""
+    table = calibration_table(y, proba, n_bins)
+    if table.empty:
+        return 0.0
+    weights = table["count"] / table["count"].sum()
+    return float(np.sum(weights * np.abs(table["mean_pred"] - table["observed"])))
+
+
+def betting_roi(y, proba, odds, min_ev=0.05):
+    """
+    Simule une mise unitaire sur chaque issue dont l'expected value dépasse
+    ``min_ev`` aux cotes ``odds`` (n, 3).
+    :return: dict (n_bets, profit, roi) ; roi = None si aucun pari
+    """
+    y = np.asarray(y, dtype=np.int64)
+    proba = np.asarray(proba, dtype=np.float64)
+    odds = np.asarray(odds, dtype=np.float64)
+    ev = proba * odds - 1
+    bets = np.nan_to_num(ev, nan=-1.0) > min_ev
+    won = np.arange(proba.shape[1])[None, :] == y[:, None]
+    profit = np.where(won, odds - 1, -1.0)[bets].sum()
+    n_bets = int(bets.sum())
+    return {
+        "n_bets": n_bets,
+        "profit": float(profit),
+        "roi": float(profit / n_bets) if n_bets else None,
+    }
+
+
+def evaluate_predictions(y, proba, odds=None, n_bins=10):
+    """Toutes les métriques d'un jeu de prédictions dans un dictionnaire"""
+    metrics = {
+        "n": int(len(y)),
+        "log_loss": log_loss(y, proba),
+        "brier": brier_score(y, proba),
+        "accuracy": accuracy(y, proba),
+        "ece": expected_calibration_error(y, proba, n_bins),
+    }
+    if odds is not None:
+        metrics.update(betting_roi(y, proba, odds))
+    return metrics
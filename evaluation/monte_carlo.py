@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# evaluation/monte_carlo.py
+# -----------------------------------------------------------------------------
+# Simulation Monte Carlo du bankroll
+# Des milliers de trajectoires de bankroll sont tirées en une opération
+# vectorisée : les paris candidats (probabilité, cote, mise) sont réglés pour
+# chaque (trajectoire, jour) à partir d'un tableau de tirages uniformes. Les
+# issues exclusives d'un même match (1X2) partagent le même tirage. Mises en
+# fraction du bankroll (Kelly) : croissance multiplicative ; mises fixes :
+# croissance additive. Rapporte la probabilité de ruine, la distribution des
+# drawdowns et les quantiles du taux de croissance.
+#
+# Usage : python evaluation/monte_carlo.py --source today --policy kelly
+#         python evaluation/monte_carlo.py --source history --bets-per-day 5
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.staking import exclusive_groups, independent_kelly_fractions, kelly_fractions, MAX_DAILY_EXPOSURE
+
+BETS_PATH = "data/bets_today.csv"
+INITIAL_BANKROLL = 1000.0
+N_PATHS = 10_000
+N_DAYS = 365
+RUIN_LEVEL = 0.2               # ruine : bankroll sous 20% du bankroll initial
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+MAX_BATCH_ELEMENTS = 20_000_000   # tirages par lot de trajectoires (mémoire bornée)
+
+
+def settle_returns(u, prob, push, lower):
+    """
+    Rendement par unité misée de chaque pari pour des tirages ``u``.
+    Le pari gagne si lower <= u < lower + prob, est remboursé si
+    lower + prob <= u < lower + prob + push, et perd sinon.
+    """
+    offset = u - lower
+    return np.where((offset >= 0) & (offset < prob), 1.0, np.where((offset >= prob) & (offset < prob + push), 0.0, -1.0))
+
+
+def simulate_paths(prob, odds, stakes, push=None, groups=None, n_paths=N_PATHS, n_days=N_DAYS,
+                   bets_per_day=None, compounding=True, initial_bankroll=INITIAL_BANKROLL, seed=None):
+    """
+    Trajectoires de bankroll (n_paths, n_days + 1).
+
+    :param stakes: fraction du bankroll par pari si ``compounding``, sinon mise en €
+    :param groups: groupe d'issues exclusives de chaque pari (tirage partagé)
+    :param bets_per_day: None = tous les paris chaque jour ; sinon tirage avec
+        remise de ``bets_per_day`` paris indépendants par jour
+    """
+    rng = np.random.default_rng(seed)
+    prob, odds, stakes = (np.asarray(a, dtype=np.float64) for a in (prob, odds, stakes))
+    push = np.zeros(prob.shape) if push is None else np.asarray(push, dtype=np.float64)
+    n = len(prob)
+    groups = np.arange(n) if groups is None else np.asarray(groups)
+    # Borne basse de l'intervalle gagnant de chaque issue dans son groupe
+    order = np.argsort(groups, kind="stable")
+    cum = np.cumsum(prob[order] + push[order])
+    start_of_group = np.r_[True, groups[order][1:] != groups[order][:-1]]
+    group_base = np.maximum.accumulate(np.where(start_of_group, cum - prob[order] - push[order], 0))
+    lower = np.empty(n)
+    lower[order] = cum - prob[order] - push[order] - group_base
+    gain = odds - 1
+
+    width = bets_per_day or n
+    batch = max(1, MAX_BATCH_ELEMENTS // max(n_days * width, 1))
+    daily = []
+    for first in range(0, n_paths, batch):
+        size = min(batch, n_paths - first)
+        if bets_per_day is None:
+            # Un tirage par (trajectoire, jour, groupe), partagé par les issues du groupe
+            u = rng.random((size, n_days, groups.max() + 1), dtype=np.float32)[:, :, groups]
+            idx = slice(None)
+        else:
+            idx = rng.integers(0, n, (size, n_days, bets_per_day))
+            u = rng.random((size, n_days, bets_per_day), dtype=np.float32)
+        outcome = settle_returns(u, prob[idx], push[idx], lower[idx])
+        returns = np.where(outcome > 0, gain[idx], outcome)
+        daily.append((returns * stakes[idx]).sum(axis=2))
+    daily = np.concatenate(daily)
+
+    if compounding:
+        log_wealth = np.cumsum(np.log(np.clip(1 + daily, 1e-12, None)), axis=1)
+        paths = initial_bankroll * np.exp(log_wealth)
+    else:
+        paths = initial_bankroll + np.cumsum(daily, axis=1)
+        # Plus de mise une fois le bankroll épuisé
+        broke = np.maximum.accumulate(paths <= 0, axis=1)
+        first_broke = np.where(broke.any(axis=1), broke.argmax(axis=1), n_days)
+        frozen = np.take_along_axis(paths, np.minimum(first_broke, n_days - 1)[:, None], axis=1)
+        paths = np.where(broke, np.minimum(frozen, 0), paths)
+    return np.hstack([np.full((n_paths, 1), initial_bankroll), paths])
+
+
+def summarize_paths(paths, ruin_level=RUIN_LEVEL, quantiles=QUANTILES):
+    """
+    Probabilité de ruine, drawdown maximal, taux de croissance et bankroll
+    final par quantile ; bandes de quantiles jour par jour.
+    :return: (résumé dict, bandes DataFrame (jour × quantile))
+    """
+    initial = paths[:, 0]
+    n_days = paths.shape[1] - 1
+    peak = np.maximum.accumulate(paths, axis=1)
+    drawdown = (1 - paths / peak).max(axis=1)
+    ruined = (paths <= ruin_level * initial[:, None]).any(axis=1)
+    final = paths[:, -1]
+    growth = np.log(np.clip(final, 1e-12, None) / initial) / n_days
+
+    summary = {
+        "paths": int(len(paths)),
+        "days": int(n_days),
+        "ruin_probability": float(ruined.mean()),
+        "profit_probability": float((final > initial).mean()),
+        "mean_final_bankroll": float(final.mean()),
+    }
+    for q in quantiles:
+        summary[f"drawdown_q{int(q * 100)}"] = float(np.quantile(drawdown, q))
+        summary[f"daily_growth_q{int(q * 100)}"] = float(np.quantile(growth, q))
+        summary[f"final_bankroll_q{int(q * 100)}"] = float(np.quantile(final, q))
+    bands = pd.DataFrame(np.quantile(paths, quantiles, axis=0).T, columns=[f"q{int(q * 100)}" for q in quantiles])
+    bands.index.name = "day"
+    return summary, bands
+
+
+def slate_inputs(bets, policy="kelly", bankroll=INITIAL_BANKROLL, unit=10.0):
+    """
+    Paramètres de simulation d'une liste de paris (format data/bets_today.csv).
+    :return: dict (prob, odds, push, stakes, groups, compounding)
+    """
+    groups, _ = exclusive_groups(bets)
+    inputs = {
+        "prob": bets["expected_prob"].to_numpy(dtype=np.float64),
+        "odds": bets["bookmaker_odds"].to_numpy(dtype=np.float64),
+        "push": np.nan_to_num(bets["push_prob"].to_numpy(dtype=np.float64)) if "push_prob" in bets else None,
+        "groups": groups,
+    }
+    if policy == "kelly":
+        inputs.update(stakes=kelly_fractions(bets), compounding=True)
+    elif policy == "portfolio":
+        from utils.portfolio import portfolio_fractions
+        inputs.update(stakes=portfolio_fractions(bets), compounding=True)
+    else:
+        inputs.update(stakes=np.full(len(bets), float(unit)), compounding=False)
+    return inputs
+
+
+def history_inputs(candidates_path, min_ev=0.05, policy="kelly", bets_per_day=5, unit=10.0):
+    """
+    Pool de value bets historiques (candidats du backtester) tirés avec remise.
+    Les mises Kelly sont calculées pari par pari, plafonnées pour que
+    ``bets_per_day`` paris ne dépassent pas l'exposition journalière.
+    """
+    candidates = pd.read_csv(candidates_path, usecols=["odds", "prob", "push_prob"])
+    push = np.nan_to_num(candidates["push_prob"].to_numpy(dtype=np.float64))
+    ev = candidates["prob"] * candidates["odds"] + push - 1
+    pool = candidates[ev > min_ev]
+    push = push[(ev > min_ev).to_numpy()]
+    prob, odds = pool["prob"].to_numpy(dtype=np.float64), pool["odds"].to_numpy(dtype=np.float64)
+    if policy != "flat":
+        stakes = independent_kelly_fractions(prob, odds, push, max_bet=MAX_DAILY_EXPOSURE / bets_per_day)
+        return {"prob": prob, "odds": odds, "push": push, "stakes": stakes, "compounding": True}
+    return {"prob": prob, "odds": odds, "push": push, "stakes": np.full(len(prob), float(unit)), "compounding": False}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation Monte Carlo du bankroll")
+    parser.add_argument("--source", choices=("today", "history"), default="today",
+                        help="today : paris du jour rejoués chaque jour ; history : pool de value bets historiques")
+    parser.add_argument("--policy", choices=("kelly", "portfolio", "flat"), default="kelly",
+                        help="portfolio : source today uniquement (sinon Kelly pari par pari)")
+    parser.add_argument("--paths", type=int, default=N_PATHS)
+    parser.add_argument("--days", type=int, default=N_DAYS)
+    parser.add_argument("--bets-per-day", type=int, default=5, help="paris tirés par jour (source history)")
+    parser.add_argument("--bankroll", type=float, default=INITIAL_BANKROLL)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        if args.source == "today":
+            if not os.path.exists(BETS_PATH):
+                raise FileNotFoundError(f"❌ Aucun pari du jour : {BETS_PATH}")
+            bets = pd.read_csv(BETS_PATH)
+            if bets.empty:
+                print("ℹ️ Aucun value bet aujourd'hui")
+                return
+            inputs, bets_per_day = slate_inputs(bets, args.policy, args.bankroll), None
+            print(f"✅ {len(bets)} paris du jour rejoués sur {args.days} jours")
+        else:
+            from evaluation.backtester import CANDIDATES_PATH
+            inputs, bets_per_day = history_inputs(CANDIDATES_PATH, policy=args.policy,
+                                                  bets_per_day=args.bets_per_day), args.bets_per_day
+            print(f"✅ Pool de {len(inputs['prob'])} value bets historiques, {bets_per_day} paris par jour")
+
+        start = time.perf_counter()
+        paths = simulate_paths(n_paths=args.paths, n_days=args.days, bets_per_day=bets_per_day,
+                               initial_bankroll=args.bankroll, seed=args.seed, **inputs)
+        elapsed = time.perf_counter() - start
+        summary, _ = summarize_paths(paths)
+
+        print(f"\n🎲 {summary['paths']:,} trajectoires × {summary['days']} jours en {elapsed:.2f}s "
+              f"(mises {args.policy})")
+        print(f"   - Probabilité de ruine (< {RUIN_LEVEL:.0%} du bankroll): {summary['ruin_probability']:.2%}")
+        print(f"   - Probabilité de finir en profit: {summary['profit_probability']:.1%}")
+        print(f"   - Drawdown max (médiane / q95): {summary['drawdown_q50']:.1%} / {summary['drawdown_q95']:.1%}")
+        print(f"   - Croissance journalière (q5 / médiane / q95): {summary['daily_growth_q5']:+.3%} / "
+              f"{summary['daily_growth_q50']:+.3%} / {summary['daily_growth_q95']:+.3%}")
+        print(f"   - Bankroll final (q5 / médiane / q95): {summary['final_bankroll_q5']:.0f}€ / "
+              f"{summary['final_bankroll_q50']:.0f}€ / {summary['final_bankroll_q95']:.0f}€")
+
+    except Exception as e:
+        print(f"❌ Erreur dans monte_carlo.py : {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
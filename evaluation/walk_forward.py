@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# evaluation/walk_forward.py
+# -----------------------------------------------------------------------------
+# Évaluation walk-forward du modèle dans le temps
+# L'historique (data/lstm/X.npy, y.npy, dans l'ordre chronologique) est découpé
+# en fenêtres glissantes entraînement/test ; chaque fold est entraîné et évalué
+# dans un processus séparé. Les résultats (log-loss, Brier, calibration, ROI
+# simulé si data/lstm/odds.npy existe) sont mis en cache par couple
+# (configuration du modèle, empreinte des données) : relancer la même
+# évaluation est instantané.
+#
+# Usage : python evaluation/walk_forward.py --model lstm --folds 5 --workers 4
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from evaluation.metrics import evaluate_predictions, calibration_table
+from modeling.lstm_model_fixed import data_fingerprint
+
+X_PATH = "data/lstm/X.npy"
+Y_PATH = "data/lstm/y.npy"
+ODDS_PATH = "data/lstm/odds.npy"        # cotes historiques (n, 3), optionnel
+CACHE_DIR = "data/evaluation/walk_forward"
+
+DEFAULT_CONFIG = {
+    "model": "lstm",
+    "params": {"epochs": 20, "batch_size": 32},
+    "n_folds": 5,
+    "test_size": None,      # par défaut : 1/(n_folds + 1) de l'historique
+    "window": None,         # None = fenêtre d'entraînement croissante
+}
+
+
+def make_folds(n_samples, n_folds, test_size=None, window=None):
+    """
+    Découpe chronologique en folds (train_start, train_end, test_end).
+    Chaque fold teste sur le bloc qui suit immédiatement sa fenêtre d'entraînement.
+    """
+    test_size = test_size or n_samples // (n_folds + 1)
+    first_test = n_samples - n_folds * test_size
+    if test_size <= 0 or first_test <= 0:
+        raise ValueError(f"❌ Historique trop court ({n_samples}) pour {n_folds} folds")
+
+    folds = []
+    for k in range(n_folds):
+        train_end = first_test + k * test_size
+        train_start = max(0, train_end - window) if window else 0
+        folds.append((train_start, train_end, train_end + test_size))
+    return folds
+
+
+def _fit_predict(model_name, params, X_train, y_train, X_test):
+    """Entraîne un modèle sur un fold et renvoie ses probabilités de test"""
+    if model_name == "frequency":
+        # Référence naïve : fréquence des issues sur la fenêtre d'entraînement
+        freq = np.bincount(y_train, minlength=3) / len(y_train)
+        return np.tile(freq, (len(X_test), 1))
+
+    if model_name == "lstm":
+        from modeling import lstm_model_fixed as lstm
+        tf = lstm._require_tensorflow()
+        model = lstm.build_model(X_train.shape[1], X_train.shape[2])
+        model.fit(
+            X_train, y_train,
+            epochs=params.get("epochs", 20),
+            batch_size=params.get("batch_size", 32),
+            callbacks=[tf.keras.callbacks.EarlyStopping(monitor="loss", patience=3, restore_best_weights=True)],
+            verbose=0,
+        )
+        return model.predict_on_batch(X_test)
+
+    raise ValueError(f"❌ Modèle inconnu : {model_name}")
+
+
+def _init_worker(intra_op_threads):
+    """Limite les threads de chaque processus pour éviter la sur-souscription"""
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(intra_op_threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    os.environ["OMP_NUM_THREADS"] = str(intra_op_threads)
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+
+def _run_fold(task):
+    """Exécuté dans un processus : entraîne et prédit un fold"""
+    fold_id, (train_start, train_end, test_end), config, paths = task
+    start = time.perf_counter()
+    X = np.load(paths["X"], mmap_mode="r")
+    y = np.load(paths["y"], mmap_mode="r")
+    proba = _fit_predict(
+        config["model"], config["params"],
+        np.asarray(X[train_start:train_end]), np.asarray(y[train_start:train_end]),
+        np.asarray(X[train_end:test_end]),
+    )
+    return fold_id, np.asarray(proba, dtype=np.float64), time.perf_counter() - start
+
+
+def cache_key(config, fingerprint):
+    """Clé de cache d'une évaluation : configuration + empreinte des données"""
+    payload = json.dumps({"config": config, "data": fingerprint}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def load_cached(key, cache_dir=CACHE_DIR):
+    """Résultats et prédictions hors échantillon en cache (None si absents)"""
+    json_path = os.path.join(cache_dir, f"{key}.json")
+    npz_path = os.path.join(cache_dir, f"{key}.npz")
+    if not (os.path.exists(json_path) and os.path.exists(npz_path)):
+        return None
+    with open(json_path, "r") as f:
+        report = json.load(f)
+    oos = np.load(npz_path)
+    return report, {k: oos[k] for k in oos.files}
+
+
+def run_walk_forward(config=None, workers=None, x_path=X_PATH, y_path=Y_PATH,
+                     odds_path=ODDS_PATH, cache_dir=CACHE_DIR, use_cache=True):
+    """
+    Lance (ou relit depuis le cache) l'évaluation walk-forward.
+    :return: (rapport dict, prédictions hors échantillon {index, proba, y})
+    """
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    X = np.load(x_path, mmap_mode="r")
+    y = np.load(y_path, mmap_mode="r")
+    odds = np.load(odds_path) if odds_path and os.path.exists(odds_path) else None
+
+    fingerprint = data_fingerprint(X, y)
+    if odds is not None:
+        fingerprint = hashlib.sha256((fingerprint + data_fingerprint(odds, y)).encode()).hexdigest()
+    key = cache_key(config, fingerprint)
+
+    if use_cache:
+        cached = load_cached(key, cache_dir)
+        if cached is not None:
+            print(f"♻️ Résultats walk-forward relus depuis le cache ({key})")
+            return cached
+
+    folds = make_folds(len(X), config["n_folds"], config["test_size"], config["window"])
+    workers = workers or min(len(folds), os.cpu_count() or 1)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    tasks = [(k, fold, config, {"X": x_path, "y": y_path}) for k, fold in enumerate(folds)]
+
+    print(f"🚀 Walk-forward : {len(folds)} folds, modèle {config['model']}, {workers} processus")
+    results = {}
+    # "spawn" : TensorFlow ne supporte pas d'être hérité par fork
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                             initializer=_init_worker, initargs=(threads,)) as pool:
+        for fold_id, proba, elapsed in pool.map(_run_fold, tasks):
+            results[fold_id] = (proba, elapsed)
+            print(f"   ✅ Fold {fold_id + 1}/{len(folds)} terminé ({elapsed:.1f}s)")
+
+    fold_reports, all_idx, all_proba = [], [], []
+    for k, (train_start, train_end, test_end) in enumerate(folds):
+        proba, elapsed = results[k]
+        y_test = np.asarray(y[train_end:test_end])
+        odds_test = odds[train_end:test_end] if odds is not None else None
+        metrics = evaluate_predictions(y_test, proba, odds_test)
+        metrics.update({
+            "fold": k + 1,
+            "train_start": train_start,
+            "train_end": train_end,
+            "test_end": test_end,
+            "seconds": round(elapsed, 2),
+        })
+        fold_reports.append(metrics)
+        all_idx.append(np.arange(train_end, test_end))
+        all_proba.append(proba)
+
+    index = np.concatenate(all_idx)
+    proba = np.concatenate(all_proba)
+    y_oos = np.asarray(y)[index]
+    overall = evaluate_predictions(y_oos, proba, odds[index] if odds is not None else None)
+
+    report = {
+        "key": key,
+        "config": config,
+        "data_fingerprint": fingerprint,
+        "folds": fold_reports,
+        "overall": overall,
+        "calibration": calibration_table(y_oos, proba).to_dict(orient="records"),
+    }
+    oos = {"index": index, "proba": proba, "y": y_oos}
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, f"{key}.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    np.savez(os.path.join(cache_dir, f"{key}.npz"), **oos)
+    return report, oos
+
+
+def print_report(report):
+    """Affiche le rapport par fold et global"""
+    folds_df = pd.DataFrame(report["folds"])
+    cols = ["fold", "train_start", "train_end", "test_end", "log_loss", "brier", "accuracy", "ece"]
+    if "roi" in folds_df.columns:
+        cols += ["n_bets", "roi"]
+    print("\n📊 Résultats par fold:")
+    print(folds_df[cols].round(4).to_string(index=False))
+
+    overall = report["overall"]
+    print(f"\n📈 Global ({overall['n']} matchs hors échantillon):")
+    print(f"   - Log-loss: {overall['log_loss']:.4f} | Brier: {overall['brier']:.4f} | "
+          f"Précision: {overall['accuracy']:.1%} | ECE: {overall['ece']:.4f}")
+    if overall.get("roi") is not None:
+        print(f"   - ROI simulé: {overall['roi']:+.1%} sur {overall['n_bets']} paris")
+
+    print("\n🎯 Calibration (probabilité prédite vs fréquence observée):")
+    for row in report["calibration"]:
+        print(f"   {row['bin_low']:.1f}+ : {row['mean_pred']:.3f} vs {row['observed']:.3f} ({row['count']} issues)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Évaluation walk-forward du modèle")
+    parser.add_argument("--model", default=DEFAULT_CONFIG["model"], help="lstm ou frequency")
+    parser.add_argument("--folds", type=int, default=DEFAULT_CONFIG["n_folds"])
+    parser.add_argument("--test-size", type=int, default=None, help="échantillons par fold de test")
+    parser.add_argument("--window", type=int, default=None, help="taille de la fenêtre glissante d'entraînement")
+    parser.add_argument("--epochs", type=int, default=DEFAULT_CONFIG["params"]["epochs"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-cache", action="store_true", help="ignore les résultats en cache")
+    args = parser.parse_args()
+
+    config = {
+        "model": args.model,
+        "params": {**DEFAULT_CONFIG["params"], "epochs": args.epochs},
+        "n_folds": args.folds,
+        "test_size": args.test_size,
+        "window": args.window,
+    }
+    try:
+        report, _ = run_walk_forward(config, workers=args.workers, use_cache=not args.no_cache)
+        print_report(report)
+    except Exception as e:
+        print(f"❌ Erreur dans walk_forward.py : {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
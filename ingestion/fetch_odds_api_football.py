@@ -8,14 +8,29 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from utils.request_handler import get
 
-BOOKMAKER_ID = 8  # Bet365
+BOOKMAKER_ID = None  # None : tous les bookmakers (8 = Bet365 seul)
 SAVE_DIR = "data/raw"
 
+def fetch_fixture_odds(fixture_id, bookmaker_id=BOOKMAKER_ID):
+    """Cotes d'un match pour tous les bookmakers, toutes pages confondues"""
+    params = {"fixture": fixture_id}
+    if bookmaker_id is not None:
+        params["bookmaker"] = bookmaker_id
+    response = get("/odds", params)
+    odds = list(response.get("response", []))
+    total_pages = response.get("paging", {}).get("total", 1) or 1
+    for page in range(2, total_pages + 1):
+        time.sleep(1.2)
+        odds.extend(get("/odds", {**params, "page": page}).get("response", []))
+    return odds
+
 def fetch_and_save_odds():
     if not os.path.exists(SAVE_DIR):
         os.makedirs(SAVE_DIR)
 
     fixture_files = [f for f in os.listdir(SAVE_DIR) if f.startswith("fixtures_") and f.endswith(".json")]
+    # Un fichier par (ligue, date) regroupant tous les matchs de cette journée
+    odds_by_file = {}
 
     for file in fixture_files:
         file_path = os.path.join(SAVE_DIR, file)
@@ -36,24 +51,24 @@ def fetch_and_save_odds():
             try:
                 time.sleep(1.2)
 
-                response = get("/odds", {
-                    "fixture": fixture_id,
-                    "bookmaker": BOOKMAKER_ID
-                })
-                odds = response.get("response", [])
+                odds = fetch_fixture_odds(fixture_id)
                 if not odds:
                     print(f"⚠️ Aucune cote pour le match {fixture_id}")
                     continue
 
                 odds_filename = f"odds_{league_id}_{date}.json"
-                odds_path = os.path.join(SAVE_DIR, odds_filename)
-
-                with open(odds_path, "w", encoding="utf-8") as out:
-                    json.dump(response, out, indent=2)
-
-                print(f"✅ Cotes enregistrées pour match {fixture_id} ({league_id})")
+                odds_by_file.setdefault(odds_filename, {})[fixture_id] = odds
+                n_books = len({b.get("id") for o in odds for b in o.get("bookmakers", [])})
+                print(f"✅ Cotes récupérées pour match {fixture_id} ({league_id}, {n_books} bookmakers)")
             except Exception as e:
                 print(f"❌ Erreur cotes fixture {fixture_id} : {e}")
 
+    for odds_filename, fixtures in odds_by_file.items():
+        odds_path = os.path.join(SAVE_DIR, odds_filename)
+        response = [entry for odds in fixtures.values() for entry in odds]
+        with open(odds_path, "w", encoding="utf-8") as out:
+            json.dump({"results": len(response), "response": response}, out, indent=2)
+        print(f"💾 {len(fixtures)} matchs enregistrés dans {odds_path}")
+
 if __name__ == "__main__":
     fetch_and_save_odds() 
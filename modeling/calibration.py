@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# modeling/calibration.py
+# -----------------------------------------------------------------------------
+# Calibration des probabilités du modèle avant le calcul des value bets
+# Les calibrateurs (temperature scaling ou isotonique multiclasse) sont ajustés
+# sur les prédictions hors échantillon de l'évaluation walk-forward et
+# sauvegardés à côté du modèle (data/lstm/model/calibration.npz). À la
+# prédiction, la calibration est une transformation vectorisée NumPy.
+#
+# Usage : python modeling/calibration.py --method auto --folds 5
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from preprocessing.create_lstm_sequences_fixed import FEATURE_SCHEMA_VERSION
+
+CALIBRATION_PATH = "data/lstm/model/calibration.npz"
+METHODS = ("temperature", "isotonic")
+EPS = 1e-6
+# Bornes des probabilités isotoniques : un bloc sans aucune issue observée
+# donnerait sinon une probabilité nulle (log-loss infinie)
+ISOTONIC_FLOOR = 0.01
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def _normalize(proba):
+    proba = np.clip(proba, EPS, None)
+    return proba / proba.sum(axis=1, keepdims=True)
+
+
+def _nll(proba, y):
+    return float(-np.mean(np.log(np.clip(proba[np.arange(len(y)), y], 1e-12, None))))
+
+
+def _pav(values):
+    """
+    Régression isotonique croissante (pool adjacent violators) d'une suite
+    déjà triée par score.
+    :return: (début, fin, valeur) de chaque bloc
+    """
+    starts, ends, sums, counts = [], [], [], []
+    for i, v in enumerate(values):
+        starts.append(i)
+        ends.append(i)
+        sums.append(float(v))
+        counts.append(1)
+        # Fusionner tant que la moyenne du dernier bloc ne dépasse pas la précédente
+        while len(sums) > 1 and sums[-2] / counts[-2] >= sums[-1] / counts[-1]:
+            ends[-2] = ends[-1]
+            sums[-2] += sums[-1]
+            counts[-2] += counts[-1]
+            del starts[-1], ends[-1], sums[-1], counts[-1]
+    return np.array(starts), np.array(ends), np.array(sums) / np.array(counts)
+
+
+class Calibrator:
+    """Transformation des probabilités (n, 3) ajustée hors échantillon."""
+
+    def __init__(self, method, temperature=1.0, knots=None, meta=None):
+        if method not in METHODS:
+            raise ValueError(f"❌ Méthode de calibration inconnue : {method} ({', '.join(METHODS)})")
+        self.method = method
+        self.temperature = float(temperature)
+        self.knots = knots or []          # isotonique : (x, y) par issue
+        self.meta = meta or {}
+
+    @classmethod
+    def fit(cls, method, proba, y):
+        """Ajuste le calibrateur sur des probabilités hors échantillon et leurs issues"""
+        proba = _normalize(np.asarray(proba, dtype=np.float64))
+        y = np.asarray(y, dtype=np.int64)
+
+        if method == "temperature":
+            from scipy.optimize import minimize_scalar
+            logits = np.log(proba)
+            result = minimize_scalar(lambda t: _nll(_softmax(logits / t), y),
+                                     bounds=(0.05, 20.0), method="bounded")
+            return cls(method, temperature=result.x)
+
+        knots = []
+        for k in range(proba.shape[1]):
+            order = np.argsort(proba[:, k], kind="mergesort")
+            p = proba[order, k]
+            starts, ends, values = _pav((y[order] == k).astype(float))
+            # Chaque bloc est constant entre son premier et son dernier score
+            x = np.column_stack([p[starts], p[ends]]).ravel()
+            values = np.clip(values, ISOTONIC_FLOOR, 1 - ISOTONIC_FLOOR)
+            knots.append((x, np.repeat(values, 2)))
+        return cls(method, knots=knots)
+
+    def transform(self, proba):
+        """Probabilités calibrées, même forme que ``proba``"""
+        proba = _normalize(np.asarray(proba, dtype=np.float64))
+        if self.method == "temperature":
+            return _softmax(np.log(proba) / self.temperature)
+        calibrated = np.column_stack([
+            np.interp(proba[:, k], x, v) for k, (x, v) in enumerate(self.knots)
+        ])
+        return _normalize(calibrated)
+
+    def save(self, path=CALIBRATION_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        arrays = {}
+        for k, (x, v) in enumerate(self.knots):
+            arrays[f"knots_x_{k}"] = x
+            arrays[f"knots_y_{k}"] = v
+        header = {"method": self.method, "temperature": self.temperature,
+                  "n_classes": len(self.knots), **self.meta}
+        np.savez(path, header=np.array(json.dumps(header)), **arrays)
+
+    @classmethod
+    def load(cls, path=CALIBRATION_PATH):
+        data = np.load(path)
+        header = json.loads(str(data["header"]))
+        knots = [(data[f"knots_x_{k}"], data[f"knots_y_{k}"]) for k in range(header.pop("n_classes"))]
+        method, temperature = header.pop("method"), header.pop("temperature")
+        return cls(method, temperature, knots, header)
+
+
+def load_calibrator(model_version, model="lstm", path=CALIBRATION_PATH):
+    """
+    Calibrateur sauvegardé, ou None s'il manque ou s'il a été ajusté pour un
+    autre schéma de features, un autre modèle ou une autre version du modèle
+    (réentraînement, fine-tuning).
+    :param model_version: version du modèle dont les probabilités sont calibrées
+    """
+    if not os.path.exists(path):
+        return None
+    calibrator = Calibrator.load(path)
+    expected = {"schema_version": FEATURE_SCHEMA_VERSION, "model": model, "model_version": model_version}
+    for key, value in expected.items():
+        if calibrator.meta.get(key) != value:
+            print(f"⚠️ Calibration ignorée : {key} {calibrator.meta.get(key)} ≠ {value} "
+                  f"(relancer modeling/calibration.py)")
+            return None
+    return calibrator
+
+
+def fit_from_walk_forward(oos, method="auto"):
+    """
+    Ajuste la calibration sur les prédictions hors échantillon du walk-forward.
+    En mode auto, chaque méthode est ajustée sur la première moitié (dans le
+    temps) et évaluée sur la seconde ; la meilleure est réajustée sur le tout.
+    :return: (calibrateur, scores log-loss sur la seconde moitié)
+    """
+    from evaluation.metrics import log_loss
+    proba, y = oos["proba"], oos["y"]
+    order = np.argsort(oos["index"], kind="mergesort")
+    proba, y = proba[order], y[order]
+
+    half = len(y) // 2
+    scores = {"raw": log_loss(y[half:], proba[half:])}
+    for name in METHODS:
+        scores[name] = log_loss(y[half:], Calibrator.fit(name, proba[:half], y[:half]).transform(proba[half:]))
+
+    if method == "auto":
+        method = min(METHODS, key=scores.get)
+    return Calibrator.fit(method, proba, y), scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibration des probabilités sur les prédictions walk-forward")
+    parser.add_argument("--method", choices=("auto",) + METHODS, default="auto")
+    parser.add_argument("--model", default="lstm", help="modèle évalué par walk_forward.py")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        from evaluation.metrics import expected_calibration_error
+        from evaluation.walk_forward import run_walk_forward, DEFAULT_CONFIG
+        from modeling.lstm_model_fixed import load_model_meta
+
+        config = {"model": args.model, "n_folds": args.folds,
+                  "params": {**DEFAULT_CONFIG["params"], "epochs": args.epochs}}
+        report, oos = run_walk_forward(config, workers=args.workers)
+        print(f"✅ {len(oos['y'])} prédictions hors échantillon")
+
+        calibrator, scores = fit_from_walk_forward(oos, args.method)
+        model_meta = (load_model_meta() or {}) if args.model == "lstm" else {}
+        calibrator.meta = {
+            "schema_version": FEATURE_SCHEMA_VERSION,
+            "model": args.model,
+            "model_version": model_meta.get("model_version"),
+            "walk_forward_key": report["key"],
+            "n_samples": int(len(oos["y"])),
+            "fitted_at": datetime.now().isoformat(),
+        }
+        calibrator.save()
+
+        calibrated = calibrator.transform(oos["proba"])
+        print(f"\n📊 Log-loss sur la seconde moitié : brut {scores['raw']:.4f} | "
+              f"température {scores['temperature']:.4f} | isotonique {scores['isotonic']:.4f}")
+        print(f"🎯 ECE : {expected_calibration_error(oos['y'], oos['proba']):.4f} → "
+              f"{expected_calibration_error(oos['y'], calibrated):.4f}")
+        detail = f" (T = {calibrator.temperature:.3f})" if calibrator.method == "temperature" else ""
+        print(f"✅ Calibration {calibrator.method}{detail} sauvegardée : {CALIBRATION_PATH}")
+
+    except Exception as e:
+        print(f"❌ Erreur dans calibration.py : {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
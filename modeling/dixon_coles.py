@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# modeling/dixon_coles.py
+# -----------------------------------------------------------------------------
+# Modèle de buts Dixon-Coles (Poisson bivarié corrigé pour les petits scores)
+# Paramètres attaque/défense par équipe, avantage du terrain et corrélation rho,
+# ajustés par maximum de vraisemblance pondérée dans le temps sur l'historique
+# des matchs terminés de chaque ligue (matrices de design creuses).
+# Produit en un seul appel vectorisé les grilles de scores exacts, 1X2 et
+# over/under pour tous les matchs du jour. Les grilles sauvegardées portent
+# l'empreinte des entrées de l'ajustement (fichiers de fixtures et de matchs,
+# hyper-paramètres, date) : elles sont recalculées dès que celle-ci change.
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import hashlib
+from glob import glob
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from scipy import optimize, sparse
+from scipy.special import gammaln
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from preprocessing.fixture_history import load_fixture_table, RAW_DIR
+
+MATCHES_FILE = "data/processed/base_matches.csv"
+PREDICTIONS_PATH = "data/lstm/y_pred_proba.npy"
+PREDICTIONS_CSV = "data/lstm/predictions_today.csv"
+SCORE_GRID_PATH = "data/lstm/score_grid_today.npz"
+
+MAX_GOALS = 10                 # grille de scores 0..MAX_GOALS
+XI = 0.0019                    # décroissance temporelle par jour (demi-vie ~1 an)
+L2_PENALTY = 1.0               # régularisation des forces d'équipe
+MIN_LEAGUE_MATCHES = 30        # en dessous : modèle commun à toutes les ligues
+TOTAL_LINE = 2.5
+
+
+class DixonColes:
+    """Modèle Dixon-Coles ajusté sur un ensemble d'équipes."""
+
+    def __init__(self, xi=XI, l2=L2_PENALTY):
+        self.xi = xi
+        self.l2 = l2
+        self.team_index = {}
+        self.attack = np.zeros(0)
+        self.defence = np.zeros(0)
+        self.intercept = 0.0
+        self.home_adv = 0.0
+        self.rho = 0.0
+
+    @staticmethod
+    def time_weights(dates, xi=XI, ref_date=None):
+        """Poids exp(-xi * ancienneté en jours) des matchs"""
+        dates = pd.to_datetime(pd.Series(dates), utc=True)
+        ref = pd.Timestamp(ref_date or datetime.now(timezone.utc))
+        if ref.tzinfo is None:
+            ref = ref.tz_localize("UTC")
+        age = (ref - dates).dt.total_seconds().to_numpy() / 86400.0
+        return np.exp(-xi * np.clip(age, 0, None))
+
+    def _design(self, team_ids):
+        idx = np.array([self.team_index[t] for t in team_ids])
+        n = len(idx)
+        return sparse.csr_matrix((np.ones(n), (np.arange(n), idx)), shape=(n, len(self.team_index)))
+
+    def fit(self, home_ids, away_ids, goals_home, goals_away, weights=None):
+        """Maximum de vraisemblance pondérée (L-BFGS-B, gradient analytique)"""
+        teams = np.unique(np.concatenate([home_ids, away_ids]))
+        self.team_index = {t: i for i, t in enumerate(teams.tolist())}
+        n_teams = len(teams)
+        H, A = self._design(home_ids), self._design(away_ids)
+        x = np.asarray(goals_home, dtype=float)
+        y = np.asarray(goals_away, dtype=float)
+        w = np.ones(len(x)) if weights is None else np.asarray(weights, dtype=float)
+        w = w / w.sum() * len(w)
+
+        m00 = (x == 0) & (y == 0)
+        m01 = (x == 0) & (y == 1)
+        m10 = (x == 1) & (y == 0)
+        m11 = (x == 1) & (y == 1)
+
+        def unpack(theta):
+            return theta[:n_teams], theta[n_teams:2 * n_teams], theta[-3], theta[-2], theta[-1]
+
+        def objective(theta):
+            att, dfc, mu, home, rho = unpack(theta)
+            log_lam = mu + home + H @ att + A @ dfc
+            log_mu = mu + A @ att + H @ dfc
+            lam, mu_ = np.exp(log_lam), np.exp(log_mu)
+
+            # Correction tau pour les scores 0-0, 0-1, 1-0, 1-1
+            tau = np.ones_like(lam)
+            tau[m00] = 1 - lam[m00] * mu_[m00] * rho
+            tau[m01] = 1 + lam[m01] * rho
+            tau[m10] = 1 + mu_[m10] * rho
+            tau[m11] = 1 - rho
+            tau = np.clip(tau, 1e-10, None)
+
+            ll = w * (x * log_lam - lam + y * log_mu - mu_ + np.log(tau))
+            penalty = 0.5 * self.l2 * (att @ att + dfc @ dfc)
+
+            g_lam = x - lam
+            g_mu = y - mu_
+            g_rho = np.zeros_like(lam)
+            g_lam[m00] -= lam[m00] * mu_[m00] * rho / tau[m00]
+            g_mu[m00] -= lam[m00] * mu_[m00] * rho / tau[m00]
+            g_rho[m00] = -lam[m00] * mu_[m00] / tau[m00]
+            g_lam[m01] += lam[m01] * rho / tau[m01]
+            g_rho[m01] = lam[m01] / tau[m01]
+            g_mu[m10] += mu_[m10] * rho / tau[m10]
+            g_rho[m10] = mu_[m10] / tau[m10]
+            g_rho[m11] = -1 / tau[m11]
+            g_lam, g_mu, g_rho = w * g_lam, w * g_mu, w * g_rho
+
+            grad = np.concatenate([
+                H.T @ g_lam + A.T @ g_mu - self.l2 * att,
+                A.T @ g_lam + H.T @ g_mu - self.l2 * dfc,
+                [g_lam.sum() + g_mu.sum(), g_lam.sum(), g_rho.sum()],
+            ])
+            return -(ll.sum() - penalty), -grad
+
+        theta0 = np.zeros(2 * n_teams + 3)
+        theta0[-3] = np.log(max((x * w).sum() + (y * w).sum(), 1e-3) / (2 * w.sum()))
+        bounds = [(None, None)] * (2 * n_teams + 2) + [(-0.2, 0.2)]
+        result = optimize.minimize(objective, theta0, jac=True, method="L-BFGS-B", bounds=bounds)
+
+        self.attack, self.defence, self.intercept, self.home_adv, self.rho = unpack(result.x)
+        self.converged = bool(result.success)
+        return self
+
+    def expected_goals(self, home_ids, away_ids):
+        """Buts attendus (lambda domicile, mu extérieur) ; équipe inconnue = moyenne"""
+        def lookup(values, ids):
+            idx = np.array([self.team_index.get(t, -1) for t in ids])
+            return np.where(idx >= 0, values[np.clip(idx, 0, None)] if len(values) else 0.0, 0.0)
+
+        lam = np.exp(self.intercept + self.home_adv + lookup(self.attack, home_ids) + lookup(self.defence, away_ids))
+        mu = np.exp(self.intercept + lookup(self.attack, away_ids) + lookup(self.defence, home_ids))
+        return lam, mu
+
+    def score_grid(self, home_ids, away_ids, max_goals=MAX_GOALS):
+        """Grilles P(buts domicile = i, buts extérieur = j), forme (n, G+1, G+1)"""
+        lam, mu = self.expected_goals(home_ids, away_ids)
+        return score_grid_from_rates(lam, mu, self.rho, max_goals)
+
+
+def score_grid_from_rates(lam, mu, rho=0.0, max_goals=MAX_GOALS):
+    """Grilles de scores Dixon-Coles pour des vecteurs de buts attendus"""
+    goals = np.arange(max_goals + 1)
+    log_fact = gammaln(goals + 1)
+    p_home = np.exp(goals[None, :] * np.log(lam)[:, None] - lam[:, None] - log_fact)
+    p_away = np.exp(goals[None, :] * np.log(mu)[:, None] - mu[:, None] - log_fact)
+    grid = p_home[:, :, None] * p_away[:, None, :]
+
+    grid[:, 0, 0] *= 1 - lam * mu * rho
+    grid[:, 0, 1] *= 1 + lam * rho
+    grid[:, 1, 0] *= 1 + mu * rho
+    grid[:, 1, 1] *= 1 - rho
+    grid = np.clip(grid, 0, None)
+    return grid / grid.sum(axis=(1, 2), keepdims=True)
+
+
+def outcome_probabilities(grid, total_line=TOTAL_LINE):
+    """
+    Probabilités 1X2 et over/under dérivées des grilles de scores.
+    :return: (proba_1x2 (n, 3), proba_over (n,))
+    """
+    g = grid.shape[1]
+    i, j = np.meshgrid(np.arange(g), np.arange(g), indexing="ij")
+    home = (grid * (i > j)).sum(axis=(1, 2))
+    draw = (grid * (i == j)).sum(axis=(1, 2))
+    away = (grid * (i < j)).sum(axis=(1, 2))
+    over = (grid * (i + j > total_line)).sum(axis=(1, 2))
+    return np.stack([home, draw, away], axis=1), over
+
+
+def fit_league_models(history, ref_date=None):
+    """
+    Ajuste un modèle par ligue (et un modèle commun de repli).
+    :return: dict league_id -> DixonColes, clé None pour le modèle commun
+    """
+    weights = DixonColes.time_weights(history["date"], ref_date=ref_date)
+    models = {None: DixonColes().fit(
+        history["home_id"].to_numpy(), history["away_id"].to_numpy(),
+        history["goals_home"].to_numpy(), history["goals_away"].to_numpy(), weights,
+    )}
+    for league_id, league in history.groupby("league_id"):
+        if len(league) < MIN_LEAGUE_MATCHES:
+            continue
+        models[league_id] = DixonColes().fit(
+            league["home_id"].to_numpy(), league["away_id"].to_numpy(),
+            league["goals_home"].to_numpy(), league["goals_away"].to_numpy(),
+            weights[league.index.to_numpy()],
+        )
+    return models
+
+
+def predict_fixtures(models, league_ids, home_ids, away_ids, max_goals=MAX_GOALS):
+    """Grilles de scores de tous les matchs, chacun avec le modèle de sa ligue"""
+    league_ids = np.asarray(league_ids)
+    home_ids, away_ids = np.asarray(home_ids), np.asarray(away_ids)
+    grid = np.empty((len(home_ids), max_goals + 1, max_goals + 1))
+    keys = np.array([lid if lid in models else None for lid in league_ids], dtype=object)
+    for key in set(keys.tolist()):
+        mask = keys == key
+        grid[mask] = models[key].score_grid(home_ids[mask], away_ids[mask], max_goals)
+    return grid
+
+
+def predict_matches(matches_df):
+    """
+    Ajuste les modèles sur les matchs terminés et renvoie les grilles de
+    scores des matchs de ``matches_df`` (format base_matches.csv).
+    """
+    history = load_fixture_table(finished_only=True)
+    if history.empty:
+        raise ValueError("❌ Aucun match terminé dans data/raw/fixtures_*.json")
+    history = history.astype({"goals_home": int, "goals_away": int}).reset_index(drop=True)
+    print(f"✅ {len(history)} matchs terminés chargés ({history['league_id'].nunique()} ligues)")
+
+    models = fit_league_models(history)
+    print(f"✅ {len(models) - 1} modèle(s) de ligue + 1 modèle commun ajustés")
+
+    # Sans identifiant de ligue : modèle commun pour tous les matchs
+    league_ids = matches_df["league.id"].to_numpy() if "league.id" in matches_df else np.full(len(matches_df), None)
+    return predict_fixtures(
+        models, league_ids,
+        matches_df["teams.home.id"].to_numpy(), matches_df["teams.away.id"].to_numpy(),
+    )
+
+
+def fit_fingerprint(raw_dir=RAW_DIR, matches_file=MATCHES_FILE):
+    """
+    Empreinte des entrées de l'ajustement : fichiers de fixtures (nom, date
+    de modification), fichier des matchs du jour, hyper-paramètres et jour de
+    référence de la pondération temporelle.
+    """
+    files = sorted(glob(os.path.join(raw_dir, "fixtures_*.json"))) + [matches_file]
+    payload = {
+        "files": [(os.path.basename(p), os.path.getmtime(p)) for p in files if os.path.exists(p)],
+        "params": [MAX_GOALS, XI, L2_PENALTY, MIN_LEAGUE_MATCHES],
+        "day": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def save_score_grids(fixture_ids, grid, path=SCORE_GRID_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez(path, fixture_id=np.asarray(fixture_ids, dtype=np.int64), grid=grid,
+             fingerprint=np.array(fit_fingerprint()))
+
+
+def load_score_grids(fixture_ids, path=SCORE_GRID_PATH):
+    """
+    Grilles de scores des matchs ``fixture_ids``, relues depuis ``path`` si
+    elles y sont toutes et que les entrées de l'ajustement n'ont pas changé,
+    sinon recalculées (un seul ajustement) et sauvegardées. Tous les marchés (1X2, totaux, BTTS, handicaps) se règlent
+    ensuite sur ces mêmes grilles.
+    :return: (fixture_ids trouvés, grilles (n, G+1, G+1))
+    """
+    fixture_ids = np.asarray(fixture_ids, dtype=np.int64)
+    ids, grid = np.zeros(0, dtype=np.int64), None
+    if os.path.exists(path):
+        data = np.load(path)
+        if "fingerprint" in data and str(data["fingerprint"]) == fit_fingerprint():
+            ids, grid = data["fixture_id"], data["grid"]
+        else:
+            print("♻️ Grilles de scores périmées (résultats, matchs ou paramètres modifiés) : recalcul")
+    if not np.isin(fixture_ids, ids).all():
+        if not os.path.exists(MATCHES_FILE):
+            raise FileNotFoundError(f"❌ Fichier introuvable : {MATCHES_FILE}")
+        matches_df = pd.read_csv(MATCHES_FILE)
+        ids, grid = matches_df["fixture.id"].to_numpy(dtype=np.int64), predict_matches(matches_df)
+        save_score_grids(ids, grid, path)
+
+    common, rows, _ = np.intersect1d(ids, fixture_ids, return_indices=True)
+    return common, grid[rows]
+
+
+def main():
+    """Ajuste les modèles Dixon-Coles et prédit les matchs du jour"""
+    try:
+        if not os.path.exists(MATCHES_FILE):
+            raise FileNotFoundError(f"❌ Fichier introuvable : {MATCHES_FILE}")
+        matches_df = pd.read_csv(MATCHES_FILE)
+        grid = predict_matches(matches_df)
+        proba, over = outcome_probabilities(grid)
+
+        save_score_grids(matches_df["fixture.id"].to_numpy(), grid)
+        np.save(PREDICTIONS_PATH, proba)
+
+        outcomes = np.array(["Home", "Draw", "Away"])
+        predictions_df = pd.DataFrame({
+            "fixture_id": matches_df["fixture.id"].to_numpy(),
+            "match": matches_df["teams.home.name"] + " vs " + matches_df["teams.away.name"],
+            "home_team": matches_df["teams.home.name"],
+            "away_team": matches_df["teams.away.name"],
+            "prob_home": proba[:, 0].round(3),
+            "prob_draw": proba[:, 1].round(3),
+            "prob_away": proba[:, 2].round(3),
+            "predicted_outcome": outcomes[proba.argmax(axis=1)],
+            "confidence": proba.max(axis=1).round(3),
+            "prob_over_2_5": over.round(3),
+            "prob_under_2_5": (1 - over).round(3),
+        })
+        predictions_df.to_csv(PREDICTIONS_CSV, index=False)
+
+        print("✅ Prédictions Dixon-Coles sauvegardées:")
+        print(f"   - CSV détaillé: {PREDICTIONS_CSV}")
+        print(f"   - Grilles de scores: {SCORE_GRID_PATH}")
+
+    except Exception as e:
+        print(f"❌ Erreur dans dixon_coles.py : {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# modeling/ensemble.py
+# -----------------------------------------------------------------------------
+# Ensemble pondéré de plusieurs backends du registre (modeling/registry.py)
+# Les poids du mélange (positifs, de somme 1) minimisent la log-loss hors
+# échantillon sur les matchs les plus récents de l'historique. Les prédictions
+# de chaque membre sont mises en cache par (membre, version du modèle, match) :
+# relancer ou repondérer l'ensemble ne réentraîne aucun membre dont les
+# données n'ont pas changé.
+#
+# Usage : python modeling/ensemble.py --members lstm_model_fixed ranking dixon_coles
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modeling.registry import (
+    create_backend, load_config, save_predictions, HOLDOUT_FRACTION, COMPARISON_DIR,
+)
+
+ENSEMBLE_PATH = os.path.join(COMPARISON_DIR, "ensemble.json")
+CACHE_PATH = os.path.join(COMPARISON_DIR, "member_predictions.csv")
+DEFAULT_MEMBERS = ["lstm_model_fixed", "ranking", "dixon_coles"]
+PROBA_COLUMNS = ["prob_home", "prob_draw", "prob_away"]
+EPS = 1e-12
+
+
+def fit_stacking_weights(probas, y):
+    """
+    Poids du mélange linéaire sum_m w_m * p_m minimisant la log-loss, avec
+    w >= 0 et sum(w) = 1.
+    :param probas: liste de probabilités (n, 3), une par membre
+    """
+    from scipy.optimize import minimize
+    y = np.asarray(y, dtype=np.int64)
+    # Probabilité attribuée à l'issue observée par chaque membre : (n, M)
+    p_obs = np.column_stack([p[np.arange(len(y)), y] for p in probas])
+    n_members = p_obs.shape[1]
+
+    def objective(w):
+        mix = np.clip(p_obs @ w, EPS, None)
+        return -np.mean(np.log(mix)), -(p_obs / mix[:, None]).mean(axis=0)
+
+    result = minimize(
+        objective, np.full(n_members, 1 / n_members), jac=True, method="SLSQP",
+        bounds=[(0.0, 1.0)] * n_members,
+        constraints=[{"type": "eq", "fun": lambda w: w.sum() - 1, "jac": lambda w: np.ones_like(w)}],
+    )
+    weights = np.clip(result.x, 0, None)
+    return weights / weights.sum()
+
+
+def blend(probas, weights):
+    """Mélange pondéré des probabilités des membres"""
+    return np.tensordot(np.asarray(weights), np.stack(probas), axes=1)
+
+
+class MemberCache:
+    """
+    Prédictions des membres indexées par (membre, version, fixture_id).
+    L'empreinte de la ligne de features est conservée : un match dont les
+    features ont changé depuis (compositions, absences...) est recalculé.
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        columns = ["member", "version", "fixture_id", "row_hash"] + PROBA_COLUMNS
+        self.table = pd.read_csv(path) if os.path.exists(path) else pd.DataFrame(columns=columns)
+        self._dirty = False
+
+    @staticmethod
+    def row_hashes(frame):
+        return [f"{h:016x}" for h in pd.util.hash_pandas_object(frame, index=False)]
+
+    def get(self, member, version, frame):
+        """Probabilités (n, 3) des lignes de ``frame``, ou None si l'une manque"""
+        rows = self.table[(self.table["member"] == member) & (self.table["version"] == version)]
+        rows = rows.drop_duplicates("fixture_id", keep="last").set_index("fixture_id")
+        rows = rows.reindex(frame["fixture_id"].to_numpy())
+        if rows[PROBA_COLUMNS].isna().any().any() or (rows["row_hash"].to_numpy() != self.row_hashes(frame)).any():
+            return None
+        return rows[PROBA_COLUMNS].to_numpy(dtype=np.float64)
+
+    def put(self, member, version, frame, proba):
+        block = pd.DataFrame(proba, columns=PROBA_COLUMNS)
+        block.insert(0, "row_hash", self.row_hashes(frame))
+        block.insert(0, "fixture_id", frame["fixture_id"].to_numpy())
+        block.insert(0, "version", version)
+        block.insert(0, "member", member)
+        self.table = pd.concat([self.table, block], ignore_index=True) if len(self.table) else block
+        self._dirty = True
+
+    def save(self):
+        if self._dirty:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.table.to_csv(self.path, index=False)
+            self._dirty = False
+
+
+def member_predictions(members, fit_frame, fit_y, frame, cache, config=None):
+    """
+    Prédictions de chaque membre entraîné sur (fit_frame, fit_y), lues dans le
+    cache quand la version du membre et les matchs y sont déjà présents.
+    :return: (liste des probabilités, liste des versions)
+    """
+    probas, versions = [], []
+    for name in members:
+        backend = create_backend(name, config)
+        version = backend.version(fit_frame, fit_y)
+        proba = cache.get(name, version, frame)
+        if proba is None:
+            proba = backend.fit(fit_frame, fit_y).predict_proba(frame)
+            cache.put(name, version, frame, proba)
+            print(f"   🔄 {name} ({version}) : {len(frame)} prédictions calculées")
+        else:
+            print(f"   ♻️ {name} ({version}) : {len(frame)} prédictions relues du cache")
+        probas.append(proba)
+        versions.append(version)
+    return probas, versions
+
+
+def fit_ensemble(members, frame, y, cache, config=None, holdout_fraction=HOLDOUT_FRACTION):
+    """
+    Poids de l'ensemble ajustés sur les prédictions hors échantillon des
+    ``holdout_fraction`` matchs les plus récents.
+    :return: dict (membres, versions, poids, log-loss)
+    """
+    from evaluation.metrics import log_loss
+    split = int(len(frame) * (1 - holdout_fraction))
+    if split == 0 or split == len(frame):
+        raise ValueError(f"❌ Historique trop court ({len(frame)} matchs) pour ajuster l'ensemble")
+    train, test = frame.iloc[:split], frame.iloc[split:]
+
+    probas, versions = member_predictions(members, train, y[:split], test, cache, config)
+    weights = fit_stacking_weights(probas, y[split:])
+    return {
+        "members": list(members),
+        "holdout_versions": versions,
+        "weights": weights.round(6).tolist(),
+        "n_holdout": int(len(test)),
+        "member_log_loss": [log_loss(y[split:], p) for p in probas],
+        "ensemble_log_loss": log_loss(y[split:], blend(probas, weights)),
+        "fitted_at": datetime.now().isoformat(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ensemble pondéré des backends de prédiction")
+    parser.add_argument("--members", nargs="+", default=None,
+                        help="backends membres (défaut : ensemble.members de config/model.yaml)")
+    args = parser.parse_args()
+
+    try:
+        from preprocessing.feature_frame import training_frame, today_frame
+        config = load_config()
+        members = args.members or (config.get("ensemble") or {}).get("members") or DEFAULT_MEMBERS
+        frame, y = training_frame()
+        today = today_frame()
+        cache = MemberCache()
+        print(f"✅ {len(frame)} matchs terminés, {len(today)} matchs du jour, membres : {', '.join(members)}")
+
+        # 1. Poids ajustés hors échantillon
+        print("🚀 Ajustement des poids sur le holdout chronologique...")
+        report = fit_ensemble(members, frame, y, cache, config)
+        cache.save()
+
+        # 2. Membres réentraînés sur tout l'historique pour les matchs du jour
+        print("🎯 Prédictions des membres pour les matchs du jour...")
+        probas, versions = member_predictions(members, frame, y, today, cache, config)
+        cache.save()
+        proba = blend(probas, report["weights"])
+        save_predictions(today, proba)
+
+        report["versions"] = versions
+        os.makedirs(os.path.dirname(ENSEMBLE_PATH), exist_ok=True)
+        with open(ENSEMBLE_PATH, "w") as f:
+            json.dump(report, f, indent=2)
+
+        print(f"\n📊 Log-loss hors échantillon ({report['n_holdout']} matchs):")
+        for name, weight, loss in zip(members, report["weights"], report["member_log_loss"]):
+            print(f"   - {name}: poids {weight:.3f} | log-loss {loss:.4f}")
+        print(f"   - ensemble: log-loss {report['ensemble_log_loss']:.4f}")
+        print(f"✅ Prédictions de l'ensemble sauvegardées ({len(today)} matchs)")
+
+    except Exception as e:
+        print(f"❌ Erreur dans ensemble.py : {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# modeling/hparam_search.py
+# -----------------------------------------------------------------------------
+# Recherche d'hyperparamètres du LSTM (architecture et optimiseur)
+# Les essais sont tirés aléatoirement dans SEARCH_SPACE et entraînés en
+# parallèle, un processus TensorFlow par worker avec un nombre de threads
+# limité. Un essai est arrêté tôt (élagage médian) si sa meilleure val_loss
+# dépasse, à la même époque, la médiane des essais déjà terminés. Chaque essai
+# est ajouté à data/lstm/hparam_trials.jsonl : une recherche interrompue
+# reprend là où elle s'était arrêtée.
+#
+# Usage : python modeling/hparam_search.py --trials 30 --workers 4
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import multiprocessing as mp
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from evaluation.walk_forward import _init_worker
+
+DATA_DIR = "data/lstm"
+TRIALS_PATH = "data/lstm/hparam_trials.jsonl"
+
+SEARCH_SPACE = {
+    "lstm_units": [[32], [64], [64, 32], [128, 64], [128, 64, 32]],
+    "dense_units": [16, 32, 64],
+    "dropout": [0.0, 0.1, 0.2, 0.3],
+    "dense_dropout": [0.0, 0.2, 0.3, 0.5],
+    "learning_rate": (1e-4, 1e-2),          # tirage log-uniforme
+    "batch_size": [32, 64, 128],
+}
+
+MAX_EPOCHS = 30
+PATIENCE = 5
+WARMUP_EPOCHS = 3              # pas d'élagage avant cette époque
+MIN_TRIALS_FOR_PRUNING = 3     # essais terminés requis pour calculer la médiane
+
+
+def sample_params(rng):
+    """Tire une configuration dans SEARCH_SPACE"""
+    params = {}
+    for name, space in SEARCH_SPACE.items():
+        if isinstance(space, tuple):
+            low, high = space
+            params[name] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+        else:
+            params[name] = space[rng.integers(len(space))]
+    return params
+
+
+def trial_id(params):
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def load_trials(path=TRIALS_PATH):
+    """Essais déjà enregistrés, par identifiant"""
+    trials = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    trial = json.loads(line)
+                    trials[trial["trial_id"]] = trial
+    return trials
+
+
+def append_trial(trial, path=TRIALS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(trial) + "\n")
+
+
+def median_curve(trials):
+    """
+    Médiane, époque par époque, de la meilleure val_loss atteinte par les
+    essais terminés (None si trop peu d'essais).
+    """
+    curves = [np.minimum.accumulate(t["val_losses"]) for t in trials
+              if t["status"] == "complete" and t["val_losses"]]
+    if len(curves) < MIN_TRIALS_FOR_PRUNING:
+        return None
+    length = max(len(c) for c in curves)
+    # Un essai arrêté par early stopping garde sa meilleure valeur ensuite
+    padded = np.array([np.pad(c, (0, length - len(c)), mode="edge") for c in curves])
+    return np.median(padded, axis=0).tolist()
+
+
+def _run_trial(task):
+    """Exécuté dans un processus : entraîne un essai, avec élagage médian"""
+    tid, params, settings, median = task
+    start = time.perf_counter()
+    from modeling import lstm_model_fixed as lstm
+    from modeling.lstm_dataset import open_shards, make_datasets
+    tf = lstm._require_tensorflow()
+    threads = int(os.environ.get("TF_NUM_INTRAOP_THREADS", "1"))
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    tf.keras.utils.set_random_seed(settings["seed"])
+
+    class MedianPruning(tf.keras.callbacks.Callback):
+        def __init__(self):
+            super().__init__()
+            self.val_losses = []
+            self.pruned = False
+
+        def on_epoch_end(self, epoch, logs=None):
+            self.val_losses.append(float(logs["val_loss"]))
+            best = min(self.val_losses)
+            if (median is not None and epoch + 1 >= settings["warmup"]
+                    and epoch < len(median) and best > median[epoch]):
+                self.pruned = True
+                self.model.stop_training = True
+
+    xs, ys = open_shards(settings["data_dir"])
+    train_ds, val_ds, _, _ = make_datasets(xs, ys, batch_size=params["batch_size"], val_fraction=0.2)
+    model = lstm.build_model(
+        xs[0].shape[1], xs[0].shape[2],
+        **{k: v for k, v in params.items() if k != "batch_size"},
+    )
+    pruning = MedianPruning()
+    model.fit(
+        train_ds, validation_data=val_ds, epochs=settings["max_epochs"], verbose=0,
+        callbacks=[
+            pruning,
+            tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=settings["patience"]),
+        ],
+    )
+    return {
+        "trial_id": tid,
+        "params": params,
+        "status": "pruned" if pruning.pruned else "complete",
+        "best_val_loss": min(pruning.val_losses),
+        "epochs": len(pruning.val_losses),
+        "val_losses": pruning.val_losses,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+
+
+def run_search(n_trials, workers=None, seed=42, data_dir=DATA_DIR, trials_path=TRIALS_PATH,
+               max_epochs=MAX_EPOCHS, patience=PATIENCE, warmup=WARMUP_EPOCHS):
+    """
+    Lance (ou reprend) la recherche : les ``n_trials`` premières configurations
+    tirées avec ``seed`` qui ne figurent pas déjà dans le fichier d'essais.
+    :return: DataFrame de tous les essais enregistrés
+    """
+    trials = load_trials(trials_path)
+    rng = np.random.default_rng(seed)
+    candidates = {}
+    while len(candidates) < n_trials:
+        params = sample_params(rng)
+        candidates.setdefault(trial_id(params), params)
+    pending = [(tid, p) for tid, p in candidates.items() if tid not in trials]
+    print(f"🔎 {len(candidates)} essais demandés, {len(candidates) - len(pending)} déjà enregistrés, "
+          f"{len(pending)} à lancer")
+
+    workers = workers or min(max(len(pending), 1), os.cpu_count() or 1)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    settings = {"data_dir": data_dir, "max_epochs": max_epochs, "patience": patience,
+                "warmup": warmup, "seed": seed}
+
+    # Soumission au fil de l'eau : chaque nouvel essai est élagué par rapport
+    # à la médiane des essais terminés au moment de son lancement
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                             initializer=_init_worker, initargs=(threads,)) as pool:
+        running = set()
+        queue = list(pending)
+        while queue or running:
+            while queue and len(running) < workers:
+                tid, params = queue.pop(0)
+                median = median_curve(trials.values())
+                running.add(pool.submit(_run_trial, (tid, params, settings, median)))
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    trial = future.result()
+                except Exception as e:
+                    print(f"   ❌ Essai en échec : {e}")
+                    continue
+                trials[trial["trial_id"]] = trial
+                append_trial(trial, trials_path)
+                icon = "✂️" if trial["status"] == "pruned" else "✅"
+                print(f"   {icon} {trial['trial_id']} : val_loss {trial['best_val_loss']:.4f} "
+                      f"({trial['epochs']} époques, {trial['seconds']:.1f}s)")
+
+    results = pd.DataFrame(trials.values())
+    return results.sort_values("best_val_loss").reset_index(drop=True) if len(results) else results
+
+
+def save_best(results):
+    """Enregistre le meilleur essai terminé pour lstm_model_fixed.py --mode train"""
+    from modeling.lstm_model_fixed import HPARAMS_PATH
+    complete = results[results["status"] == "complete"]
+    if complete.empty:
+        return None
+    best = complete.iloc[0]
+    params = dict(best["params"])
+    hparams = {
+        "batch_size": params.pop("batch_size"),
+        "model": params,
+        "trial_id": best["trial_id"],
+        "best_val_loss": float(best["best_val_loss"]),
+    }
+    os.makedirs(os.path.dirname(HPARAMS_PATH), exist_ok=True)
+    with open(HPARAMS_PATH, "w") as f:
+        json.dump(hparams, f, indent=2)
+    return hparams
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recherche d'hyperparamètres du LSTM")
+    parser.add_argument("--trials", type=int, default=20, help="nombre total d'essais")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-epochs", type=int, default=MAX_EPOCHS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--apply", action="store_true",
+                        help="enregistre le meilleur essai pour le prochain --mode train")
+    args = parser.parse_args()
+
+    try:
+        results = run_search(args.trials, args.workers, args.seed, max_epochs=args.max_epochs)
+        if results.empty:
+            print("⚠️ Aucun essai terminé")
+            return
+
+        summary = results.assign(
+            lstm_units=results["params"].map(lambda p: "/".join(map(str, p["lstm_units"]))),
+            learning_rate=results["params"].map(lambda p: p["learning_rate"]),
+            batch_size=results["params"].map(lambda p: p["batch_size"]),
+        )
+        print("\n🏆 Meilleurs essais:")
+        print(summary[["trial_id", "status", "best_val_loss", "epochs", "lstm_units",
+                       "learning_rate", "batch_size", "seconds"]].head(10).round(5).to_string(index=False))
+        counts = results["status"].value_counts()
+        print(f"\n   {counts.get('complete', 0)} terminés, {counts.get('pruned', 0)} élagués")
+
+        if args.apply:
+            hparams = save_best(results)
+            if hparams:
+                print(f"✅ Essai {hparams['trial_id']} retenu pour le prochain entraînement complet")
+
+    except Exception as e:
+        print(f"❌ Erreur dans hparam_search.py : {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
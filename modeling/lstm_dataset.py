@@ -0,0 +1,138 @@
+# modeling/lstm_dataset.py
+# -----------------------------------------------------------------------------
+# Pipeline d'entrée tf.data pour l'entraînement du LSTM
+# Les échantillons sont lus par blocs depuis des fichiers .npy mappés en
+# mémoire (X.npy / y.npy ou fragments X_000.npy, y_000.npy, ...), mis en cache,
+# mélangés avec un tampon borné et préchargés. La validation est constituée des
+# échantillons les plus récents (découpage chronologique).
+# -----------------------------------------------------------------------------
+
+import os
+import time
+import shutil
+import tempfile
+from glob import glob
+
+import numpy as np
+import tensorflow as tf
+
+DATA_DIR = "data/lstm"
+CHUNK_SIZE = 4096               # échantillons lus par bloc depuis le disque
+SHUFFLE_BUFFER = 10_000         # taille du tampon de mélange
+MEMORY_CACHE_BYTES = 512 * 1024 ** 2  # au-delà, cache sur disque
+
+
+def open_shards(data_dir=DATA_DIR):
+    """
+    Ouvre les fragments d'entraînement en lecture mappée, dans l'ordre
+    chronologique : X_000.npy, X_001.npy, ... ou à défaut X.npy.
+    :return: (liste des X, liste des y)
+    """
+    x_paths = sorted(glob(os.path.join(data_dir, "X_[0-9]*.npy")))
+    if not x_paths:
+        x_paths = [os.path.join(data_dir, "X.npy")]
+
+    xs, ys = [], []
+    for x_path in x_paths:
+        y_path = os.path.join(os.path.dirname(x_path), os.path.basename(x_path).replace("X", "y", 1))
+        if not os.path.exists(x_path) or not os.path.exists(y_path):
+            raise FileNotFoundError(f"❌ Fragment manquant : {x_path} / {y_path}")
+        xs.append(np.load(x_path, mmap_mode="r"))
+        ys.append(np.load(y_path, mmap_mode="r"))
+    return xs, ys
+
+
+def _chunk_generator(xs, ys, start, stop, chunk_size):
+    """Produit les blocs (X, y) des indices globaux [start, stop) des fragments."""
+    def generate():
+        offset = 0
+        for X, y in zip(xs, ys):
+            lo, hi = max(start - offset, 0), min(stop - offset, len(X))
+            for i in range(lo, hi, chunk_size):
+                j = min(i + chunk_size, hi)
+                yield np.asarray(X[i:j], dtype=np.float32), np.asarray(y[i:j], dtype=np.int32)
+            offset += len(X)
+    return generate
+
+
+def _dataset(xs, ys, start, stop, chunk_size):
+    sample_shape = xs[0].shape[1:]
+    signature = (
+        tf.TensorSpec(shape=(None,) + sample_shape, dtype=tf.float32),
+        tf.TensorSpec(shape=(None,), dtype=tf.int32),
+    )
+    ds = tf.data.Dataset.from_generator(
+        _chunk_generator(xs, ys, start, stop, chunk_size), output_signature=signature
+    )
+    return ds.unbatch()
+
+
+def make_datasets(xs, ys, batch_size=32, val_fraction=0.2,
+                  shuffle_buffer=SHUFFLE_BUFFER, chunk_size=CHUNK_SIZE, cache_dir=None):
+    """
+    Construit les jeux tf.data d'entraînement et de validation.
+    Les ``val_fraction`` derniers échantillons (les plus récents) servent à la
+    validation ; seul le jeu d'entraînement est mélangé.
+    :param cache_dir: dossier du cache disque (utilisé si les données dépassent
+                      MEMORY_CACHE_BYTES)
+    :return: (train_ds, val_ds, n_train, n_val)
+    """
+    n_total = sum(len(X) for X in xs)
+    n_train = int(n_total * (1 - val_fraction))
+    n_val = n_total - n_train
+    if n_train == 0:
+        raise ValueError("❌ Pas assez d'échantillons pour l'entraînement")
+
+    # Cache en mémoire ("") si les données y tiennent, sinon fichiers sur disque
+    on_disk = cache_dir is not None and sum(X.nbytes for X in xs) > MEMORY_CACHE_BYTES
+    train_cache = os.path.join(cache_dir, "train") if on_disk else ""
+    val_cache = os.path.join(cache_dir, "val") if on_disk else ""
+
+    train_ds = (
+        _dataset(xs, ys, 0, n_train, chunk_size)
+        .cache(train_cache)
+        .shuffle(min(shuffle_buffer, n_train), reshuffle_each_iteration=True)
+        .batch(batch_size)
+        .prefetch(tf.data.AUTOTUNE)
+    )
+    val_ds = None
+    if n_val > 0:
+        val_ds = (
+            _dataset(xs, ys, n_train, n_total, chunk_size)
+            .cache(val_cache)
+            .batch(batch_size)
+            .prefetch(tf.data.AUTOTUNE)
+        )
+    return train_ds, val_ds, n_train, n_val
+
+
+class ThroughputCallback(tf.keras.callbacks.Callback):
+    """Mesure le débit d'entraînement (échantillons/s) à chaque époque."""
+
+    def __init__(self, n_samples):
+        super().__init__()
+        self.n_samples = n_samples
+        self.samples_per_sec = []
+        self._start = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self._start
+        rate = self.n_samples / elapsed if elapsed > 0 else float("inf")
+        self.samples_per_sec.append(rate)
+        if logs is not None:
+            logs["samples_per_sec"] = rate
+        print(f"⚡ Époque {epoch + 1} : {rate:,.0f} échantillons/s ({elapsed:.1f}s)")
+
+
+class TemporaryCache:
+    """Dossier de cache tf.data supprimé en fin d'entraînement."""
+
+    def __enter__(self):
+        self.path = tempfile.mkdtemp(prefix="lstm_tfdata_")
+        return self.path
+
+    def __exit__(self, *exc):
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -2,20 +2,35 @@
 # modeling/lstm_model_fixed.py
 # -----------------------------------------------------------------------------
 # Entraîne un modèle LSTM et génère des prédictions pour les matchs d'aujourd'hui
+#
+# Le modèle entraîné est sauvegardé dans data/lstm/model/ avec la version du
+# schéma de features et l'empreinte des données d'entraînement. Modes :
+#   --mode auto      (défaut) réutilise le modèle sauvegardé s'il est valide,
+#                    le ré-entraîne légèrement si de nouveaux matchs sont réglés
+#   --mode train     entraînement complet depuis zéro
+#   --mode predict   prédiction seule avec le modèle sauvegardé
+#   --mode finetune  reprise des derniers poids sur les nouveaux matchs réglés
 # -----------------------------------------------------------------------------
 
 import os
+import sys
+import json
+import hashlib
+import argparse
+from datetime import datetime
+
 import numpy as np
 import pandas as pd
 
-# Import TensorFlow
-try:
-    import tensorflow as tf
-except ImportError as exc:
-    raise ImportError(
-        "TensorFlow est requis pour entraîner le modèle LSTM. "
-        "Installez-le avec: pip install tensorflow"
-    ) from exc
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from preprocessing.create_lstm_sequences_fixed import FEATURE_SCHEMA_VERSION
+from modeling.numpy_lstm import NumpyLSTM, export_weights, verify_against_keras
+from modeling.calibration import load_calibrator
+from modeling.prediction_cache import PredictionCache
+
+# TensorFlow n'est importé que pour entraîner : la prédiction seule passe par
+# le runtime NumPy (modeling/numpy_lstm.py)
+tf = None
 
 # Chemins des fichiers
 X_TRAIN_PATH = "data/lstm/X.npy"
@@ -25,6 +40,33 @@ TEAMS_PATH = "data/lstm/team_pairs.csv"
 OUTPUT_PATH = "data/lstm/y_pred_proba.npy"
 PREDICTIONS_CSV = "data/lstm/predictions_today.csv"
 
+# Artefacts du modèle
+MODEL_DIR = "data/lstm/model"
+MODEL_PATH = os.path.join(MODEL_DIR, "lstm.keras")
+META_PATH = os.path.join(MODEL_DIR, "lstm_meta.json")
+NUMPY_WEIGHTS_PATH = os.path.join(MODEL_DIR, "lstm_weights.npz")
+HPARAMS_PATH = os.path.join(MODEL_DIR, "hparams.json")   # meilleur essai de hparam_search.py
+
+# Ré-entraînement incrémental
+FINETUNE_MIN_SAMPLES = 50      # nouveaux matchs réglés requis en mode auto
+FINETUNE_EPOCHS = 5
+FINETUNE_LEARNING_RATE = 1e-4
+REPLAY_SAMPLES = 500           # anciens échantillons rejoués pour limiter l'oubli
+
+def _require_tensorflow():
+    """Importe TensorFlow à la demande"""
+    global tf
+    if tf is None:
+        try:
+            import tensorflow
+        except ImportError as exc:
+            raise ImportError(
+                "TensorFlow est requis pour entraîner le modèle LSTM. "
+                "Installez-le avec: pip install tensorflow"
+            ) from exc
+        tf = tensorflow
+    return tf
+
 def load_data():
     """Charge toutes les données nécessaires"""
     # Vérifier l'existence des fichiers
@@ -33,8 +75,9 @@ def load_data():
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"❌ Fichier manquant : {filepath}")
     
-    X_train = np.load(X_TRAIN_PATH)
-    y_train = np.load(Y_TRAIN_PATH)
+    # Lecture mappée : l'entraînement lit les échantillons par blocs via tf.data
+    X_train = np.load(X_TRAIN_PATH, mmap_mode="r")
+    y_train = np.load(Y_TRAIN_PATH, mmap_mode="r")
     X_today = np.load(X_TODAY_PATH)
     teams_df = pd.read_csv(TEAMS_PATH)
     
@@ -43,103 +86,295 @@ def load_data():
     
     return X_train, y_train, X_today, teams_df
 
-def build_model(timesteps, n_features, n_classes=3):
-    """Construit un modèle LSTM optimisé"""
-    model = tf.keras.Sequential([
-        tf.keras.layers.Input(shape=(timesteps, n_features)),
-        tf.keras.layers.LSTM(64, return_sequences=True, dropout=0.2),
-        tf.keras.layers.LSTM(32, dropout=0.2),
-        tf.keras.layers.Dense(32, activation="relu"),
-        tf.keras.layers.Dropout(0.3),
+def data_fingerprint(X, y, n_samples=None):
+    """Empreinte SHA-256 des ``n_samples`` premiers échantillons (tous par défaut)"""
+    n = len(X) if n_samples is None else n_samples
+    digest = hashlib.sha256()
+    digest.update(str(X.shape[1:]).encode())
+    digest.update(np.ascontiguousarray(X[:n]).tobytes())
+    digest.update(np.ascontiguousarray(y[:n]).tobytes())
+    return digest.hexdigest()
+
+def load_model_meta():
+    """Métadonnées du modèle sauvegardé (None si absent)"""
+    if not (os.path.exists(MODEL_PATH) and os.path.exists(META_PATH)):
+        return None
+    with open(META_PATH, "r") as f:
+        return json.load(f)
+
+def load_hparams():
+    """Hyperparamètres retenus par la recherche (dict vide : architecture de référence)"""
+    if not os.path.exists(HPARAMS_PATH):
+        return {}
+    with open(HPARAMS_PATH, "r") as f:
+        return json.load(f)
+
+def save_model(model, X_train, y_train, meta=None):
+    """Sauvegarde le modèle et ses métadonnées (schéma, empreinte des données)"""
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    model.save(MODEL_PATH)
+
+    now = datetime.now().isoformat()
+    meta = dict(meta or {})
+    meta.update({
+        "schema_version": FEATURE_SCHEMA_VERSION,
+        "timesteps": int(X_train.shape[1]),
+        "n_features": int(X_train.shape[2]),
+        "n_samples": int(len(X_train)),
+        "data_fingerprint": data_fingerprint(X_train, y_train),
+        "updated_at": now,
+    })
+    meta.setdefault("trained_at", now)
+    meta["model_version"] = hashlib.sha1(
+        f"{meta['schema_version']}:{meta['data_fingerprint']}:{meta['trained_at']}".encode()
+    ).hexdigest()[:12]
+
+    # Export des poids pour l'inférence sans TensorFlow
+    export_weights(model, NUMPY_WEIGHTS_PATH, meta["model_version"])
+    max_diff = verify_against_keras(model, NumpyLSTM.load(NUMPY_WEIGHTS_PATH), X_train[:256])
+    print(f"✅ Poids exportés pour le runtime NumPy (écart max vs Keras : {max_diff:.1e})")
+
+    with open(META_PATH, "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+def check_compatibility(meta, X_train, y_train):
+    """
+    Vérifie qu'un modèle sauvegardé peut être réutilisé.
+    :return: (compatible, nombre de nouveaux échantillons depuis le dernier entraînement)
+    """
+    if meta is None:
+        return False, 0
+    if meta.get("schema_version") != FEATURE_SCHEMA_VERSION:
+        return False, 0
+    if (meta.get("timesteps"), meta.get("n_features")) != tuple(X_train.shape[1:]):
+        return False, 0
+    n_known = meta.get("n_samples", 0)
+    if n_known > len(X_train):
+        return False, 0
+    # Les échantillons déjà vus doivent être identiques (historique append-only)
+    if data_fingerprint(X_train, y_train, n_known) != meta.get("data_fingerprint"):
+        return False, 0
+    return True, len(X_train) - n_known
+
+def build_model(timesteps, n_features, n_classes=3, lstm_units=(64, 32), dense_units=32,
+                dropout=0.2, dense_dropout=0.3, learning_rate=0.001):
+    """
+    Construit un modèle LSTM optimisé
+    Les valeurs par défaut sont l'architecture de référence ; la recherche
+    d'hyperparamètres (modeling/hparam_search.py) en explore d'autres.
+    """
+    _require_tensorflow()
+    layers = [tf.keras.layers.Input(shape=(timesteps, n_features))]
+    for i, units in enumerate(lstm_units):
+        # Seule la dernière couche LSTM renvoie uniquement son dernier état
+        layers.append(tf.keras.layers.LSTM(units, return_sequences=i < len(lstm_units) - 1, dropout=dropout))
+    layers += [
+        tf.keras.layers.Dense(dense_units, activation="relu"),
+        tf.keras.layers.Dropout(dense_dropout),
         tf.keras.layers.Dense(n_classes, activation="softmax"),
-    ])
+    ]
+    model = tf.keras.Sequential(layers)
     
     model.compile(
-        optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
+        optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
         loss="sparse_categorical_crossentropy",
         metrics=["accuracy"],
     )
     
     return model
 
-def train_model(model, X_train, y_train):
-    """Entraîne le modèle LSTM"""
+def train_model(model, X_train, y_train, batch_size=32):
+    """
+    Entraîne le modèle LSTM à partir d'un pipeline tf.data.
+    ``X_train``/``y_train`` peuvent être des tableaux (éventuellement mappés en
+    mémoire) ou des listes de fragments dans l'ordre chronologique.
+    """
+    _require_tensorflow()
+    from modeling.lstm_dataset import make_datasets, ThroughputCallback, TemporaryCache
     print("🚀 Début de l'entraînement du modèle LSTM...")
     
-    # Callback pour arrêter l'entraînement si pas d'amélioration
-    early_stopping = tf.keras.callbacks.EarlyStopping(
-        monitor='loss',
-        patience=5,
-        restore_best_weights=True
-    )
+    xs = X_train if isinstance(X_train, list) else [X_train]
+    ys = y_train if isinstance(y_train, list) else [y_train]
+    
+    with TemporaryCache() as cache_dir:
+        # Validation sur les 20% d'échantillons les plus récents
+        train_ds, val_ds, n_train, n_val = make_datasets(
+            xs, ys, batch_size=batch_size, val_fraction=0.2, cache_dir=cache_dir
+        )
+        print(f"   - {n_train} échantillons d'entraînement, {n_val} de validation (chronologique)")
+        
+        # Callback pour arrêter l'entraînement si pas d'amélioration
+        early_stopping = tf.keras.callbacks.EarlyStopping(
+            monitor='val_loss' if val_ds is not None else 'loss',
+            patience=5,
+            restore_best_weights=True
+        )
+        throughput = ThroughputCallback(n_train)
+        
+        # Entraînement
+        history = model.fit(
+            train_ds,
+            validation_data=val_ds,
+            epochs=50,
+            callbacks=[early_stopping, throughput],
+            verbose=1
+        )
     
-    # Entraînement
-    history = model.fit(
-        X_train, y_train,
-        epochs=50,
+    return history
+
+def finetune_model(model, X_train, y_train, n_new):
+    """
+    Reprend l'entraînement à partir des derniers poids sur les ``n_new``
+    échantillons les plus récents, mêlés à un échantillon des plus anciens.
+    """
+    print(f"🔁 Fine-tuning sur {n_new} nouveaux matchs réglés...")
+
+    n_old = len(X_train) - n_new
+    replay = np.random.default_rng(0).choice(n_old, size=min(REPLAY_SAMPLES, n_old), replace=False)
+    idx = np.concatenate([np.sort(replay), np.arange(n_old, len(X_train))])
+
+    model.optimizer.learning_rate.assign(FINETUNE_LEARNING_RATE)
+    return model.fit(
+        X_train[idx], y_train[idx],
+        epochs=FINETUNE_EPOCHS,
         batch_size=32,
-        validation_split=0.2,
-        callbacks=[early_stopping],
+        shuffle=True,
         verbose=1
     )
-    
-    return history
+
+def prepare_model(mode, X_train, y_train):
+    """
+    Construit, charge ou met à jour le modèle selon le mode demandé.
+    :return: modèle prêt pour la prédiction (Keras, ou NumpyLSTM en mode predict)
+    """
+    timesteps, n_features = X_train.shape[1], X_train.shape[2]
+    meta = load_model_meta()
+    compatible, n_new = check_compatibility(meta, X_train, y_train)
+
+    if mode == "auto":
+        if not compatible:
+            mode = "train"
+        elif n_new >= FINETUNE_MIN_SAMPLES:
+            mode = "finetune"
+        else:
+            mode = "predict"
+        print(f"ℹ️ Mode auto → {mode}")
+
+    if mode == "train":
+        hparams = load_hparams()
+        model = build_model(timesteps, n_features, **hparams.get("model", {}))
+        print(f"✅ Modèle LSTM construit avec {timesteps} timesteps, {n_features} features")
+        train_model(model, X_train, y_train, batch_size=hparams.get("batch_size", 32))
+        meta = save_model(model, X_train, y_train)
+        print(f"✅ Entraînement terminé, modèle {meta['model_version']} sauvegardé dans {MODEL_DIR}")
+        return model
+
+    if meta is None:
+        raise FileNotFoundError(f"❌ Aucun modèle sauvegardé dans {MODEL_DIR} (lancer --mode train)")
+    if meta.get("schema_version") != FEATURE_SCHEMA_VERSION:
+        raise ValueError(
+            f"❌ Modèle sauvegardé pour le schéma v{meta.get('schema_version')}, "
+            f"features actuelles v{FEATURE_SCHEMA_VERSION} (lancer --mode train)"
+        )
+
+    if mode == "predict" and os.path.exists(NUMPY_WEIGHTS_PATH):
+        runtime = NumpyLSTM.load(NUMPY_WEIGHTS_PATH)
+        if runtime.model_version == meta["model_version"]:
+            print(f"✅ Modèle {meta['model_version']} chargé (runtime NumPy, sans TensorFlow)")
+            return runtime
+
+    _require_tensorflow()
+    model = tf.keras.models.load_model(MODEL_PATH)
+    print(f"✅ Modèle {meta['model_version']} chargé ({meta['n_samples']} échantillons d'entraînement)")
+
+    if mode == "finetune":
+        if not compatible:
+            raise ValueError("❌ Historique d'entraînement modifié, fine-tuning impossible (lancer --mode train)")
+        if n_new == 0:
+            print("ℹ️ Aucun nouveau match réglé, fine-tuning ignoré")
+            return model
+        finetune_model(model, X_train, y_train, n_new)
+        meta["last_finetune_at"] = datetime.now().isoformat()
+        meta = save_model(model, X_train, y_train, meta)
+        print(f"✅ Fine-tuning terminé, modèle {meta['model_version']} sauvegardé")
+
+    return model
+
+def save_predictions(predictions_proba, teams_df):
+    """Sauvegarde les probabilités brutes et le CSV lisible des prédictions"""
+    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
+    np.save(OUTPUT_PATH, predictions_proba)
+
+    results = []
+    for i, (_, row) in enumerate(teams_df.iterrows()):
+        home_team = row['home_team']
+        away_team = row['away_team']
+
+        prob_home = predictions_proba[i][0]
+        prob_draw = predictions_proba[i][1]
+        prob_away = predictions_proba[i][2]
+
+        # Prédiction la plus probable
+        predicted_outcome = ["Home", "Draw", "Away"][np.argmax(predictions_proba[i])]
+        confidence = np.max(predictions_proba[i])
+
+        results.append({
+            "fixture_id": row.get('fixture_id'),
+            "match": f"{home_team} vs {away_team}",
+            "home_team": home_team,
+            "away_team": away_team,
+            "prob_home": round(prob_home, 3),
+            "prob_draw": round(prob_draw, 3),
+            "prob_away": round(prob_away, 3),
+            "predicted_outcome": predicted_outcome,
+            "confidence": round(confidence, 3)
+        })
+
+    predictions_df = pd.DataFrame(results)
+    predictions_df.to_csv(PREDICTIONS_CSV, index=False)
+    return results
 
 def main():
     """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Modèle LSTM : entraînement et prédictions du jour")
+    parser.add_argument(
+        "--mode", choices=["auto", "train", "predict", "finetune"], default="auto",
+        help="auto (défaut), train, predict ou finetune",
+    )
+    args = parser.parse_args()
+
     try:
         # 1. Charger les données
         X_train, y_train, X_today, teams_df = load_data()
-        timesteps, n_features = X_train.shape[1], X_train.shape[2]
         
         print(f"✅ Données chargées:")
         print(f"   - Entraînement: {X_train.shape} samples, {np.unique(y_train)} classes")
         print(f"   - Matchs aujourd'hui: {X_today.shape}")
         
-        # 2. Construire le modèle
-        model = build_model(timesteps, n_features)
-        print(f"✅ Modèle LSTM construit avec {timesteps} timesteps, {n_features} features")
-        
-        # 3. Entraîner le modèle
-        history = train_model(model, X_train, y_train)
-        print(f"✅ Entraînement terminé")
+        # 2-3. Construire / charger / mettre à jour le modèle
+        model = prepare_model(args.mode, X_train, y_train)
         
         # 4. Prédictions sur les matchs d'aujourd'hui
         print("🎯 Génération des prédictions pour les matchs d'aujourd'hui...")
-        predictions_proba = model.predict(X_today, verbose=0)
-        
-        # 5. Sauvegarder les probabilités brutes
-        os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-        np.save(OUTPUT_PATH, predictions_proba)
+        # Seuls les matchs dont les entrées ont changé passent par le modèle
+        model_version = load_model_meta()["model_version"]
+        cache = PredictionCache()
+        predictions_proba, missing = cache.lookup(model_version, X_today)
+        if missing.any():
+            predictions_proba[missing] = model.predict(X_today[missing], verbose=0)
+            cache.update(model_version, X_today[missing], predictions_proba[missing])
+            cache.save()
+        print(f"♻️ {int((~missing).sum())} prédictions relues du cache, {int(missing.sum())} calculées")
         
-        # 6. Créer un CSV lisible avec les prédictions
-        results = []
-        for i, (_, row) in enumerate(teams_df.iterrows()):
-            home_team = row['home_team']
-            away_team = row['away_team']
-            
-            prob_home = predictions_proba[i][0]
-            prob_draw = predictions_proba[i][1] 
-            prob_away = predictions_proba[i][2]
-            
-            # Prédiction la plus probable
-            predicted_outcome = ["Home", "Draw", "Away"][np.argmax(predictions_proba[i])]
-            confidence = np.max(predictions_proba[i])
-            
-            results.append({
-                "match": f"{home_team} vs {away_team}",
-                "home_team": home_team,
-                "away_team": away_team,
-                "prob_home": round(prob_home, 3),
-                "prob_draw": round(prob_draw, 3),
-                "prob_away": round(prob_away, 3),
-                "predicted_outcome": predicted_outcome,
-                "confidence": round(confidence, 3)
-            })
+        # Calibration ajustée hors échantillon (modeling/calibration.py)
+        calibrator = load_calibrator(model_version)
+        if calibrator is not None:
+            predictions_proba = calibrator.transform(predictions_proba)
+            print(f"🎯 Probabilités calibrées ({calibrator.method})")
         
-        # Sauvegarder le CSV des prédictions
-        predictions_df = pd.DataFrame(results)
-        predictions_df.to_csv(PREDICTIONS_CSV, index=False)
+        # 5-6. Sauvegarder les probabilités brutes et le CSV lisible
+        results = save_predictions(predictions_proba, teams_df)
         
         print(f"✅ Prédictions sauvegardées:")
         print(f"   - Probabilités: {OUTPUT_PATH}")
@@ -161,4 +396,4 @@ def main():
         raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,158 @@
+# modeling/numpy_lstm.py
+# -----------------------------------------------------------------------------
+# Runtime d'inférence NumPy pour le modèle LSTM, sans dépendance à TensorFlow.
+# export_weights() extrait les poids des couches LSTM/Dense d'un modèle Keras
+# entraîné ; NumpyLSTM reproduit la passe avant (cellules LSTM, ReLU, softmax)
+# par lots, à la tolérance numérique près.
+# -----------------------------------------------------------------------------
+
+import json
+
+import numpy as np
+
+# Écart maximal accepté entre les sorties Keras et NumPy
+DEFAULT_TOLERANCE = 1e-4
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+def _hard_sigmoid(x):
+    # Définition Keras 3 : relu6(x + 3) / 6
+    return np.clip((x + 3.0) / 6.0, 0.0, 1.0)
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": _hard_sigmoid,
+    "softmax": _softmax,
+}
+
+
+def _activation_name(activation):
+    name = getattr(activation, "__name__", str(activation))
+    if name not in ACTIVATIONS:
+        raise ValueError(f"❌ Activation non supportée par le runtime NumPy : {name}")
+    return name
+
+
+def export_weights(model, path, model_version=None):
+    """
+    Sauvegarde les poids LSTM/Dense d'un modèle Keras séquentiel dans un .npz.
+    Les couches Dropout et Input (inactives en inférence) sont ignorées.
+    """
+    spec = []
+    arrays = {}
+    for layer in model.layers:
+        kind = layer.__class__.__name__
+        if kind in ("Dropout", "InputLayer"):
+            continue
+        idx = len(spec)
+        if kind == "LSTM":
+            kernel, recurrent_kernel, bias = layer.get_weights()
+            arrays[f"l{idx}_kernel"] = kernel
+            arrays[f"l{idx}_recurrent_kernel"] = recurrent_kernel
+            arrays[f"l{idx}_bias"] = bias
+            spec.append({
+                "kind": "lstm",
+                "units": int(layer.units),
+                "return_sequences": bool(layer.return_sequences),
+                "activation": _activation_name(layer.activation),
+                "recurrent_activation": _activation_name(layer.recurrent_activation),
+            })
+        elif kind == "Dense":
+            kernel, bias = layer.get_weights()
+            arrays[f"l{idx}_kernel"] = kernel
+            arrays[f"l{idx}_bias"] = bias
+            spec.append({"kind": "dense", "activation": _activation_name(layer.activation)})
+        else:
+            raise ValueError(f"❌ Couche non supportée par le runtime NumPy : {kind}")
+
+    header = {"layers": spec, "model_version": model_version}
+    np.savez(path, spec=np.array(json.dumps(header)), **arrays)
+
+
+class NumpyLSTM:
+    """Passe avant d'un modèle LSTM/Dense exporté, calculée avec NumPy."""
+
+    def __init__(self, layers, weights, model_version=None):
+        self.layers = layers
+        self.weights = weights
+        self.model_version = model_version
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        header = json.loads(str(data["spec"]))
+        weights = {k: data[k].astype(np.float32) for k in data.files if k != "spec"}
+        return cls(header["layers"], weights, header.get("model_version"))
+
+    def _lstm(self, x, idx, layer):
+        kernel = self.weights[f"l{idx}_kernel"]
+        recurrent_kernel = self.weights[f"l{idx}_recurrent_kernel"]
+        bias = self.weights[f"l{idx}_bias"]
+        act = ACTIVATIONS[layer["activation"]]
+        rec_act = ACTIVATIONS[layer["recurrent_activation"]]
+        units = layer["units"]
+
+        n, timesteps, _ = x.shape
+        # Projection des entrées pour tous les pas de temps en une fois
+        x_proj = x @ kernel + bias
+        h = np.zeros((n, units), dtype=np.float32)
+        c = np.zeros((n, units), dtype=np.float32)
+        outputs = []
+        for t in range(timesteps):
+            z = x_proj[:, t] + h @ recurrent_kernel
+            # Ordre des portes Keras : input, forget, cellule, output
+            i = rec_act(z[:, :units])
+            f = rec_act(z[:, units:2 * units])
+            g = act(z[:, 2 * units:3 * units])
+            o = rec_act(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * act(c)
+            if layer["return_sequences"]:
+                outputs.append(h)
+        return np.stack(outputs, axis=1) if layer["return_sequences"] else h
+
+    def predict(self, X, batch_size=1024, verbose=0):
+        """
+        Probabilités de sortie pour un lot ``(n, timesteps, n_features)``.
+        Signature compatible avec ``keras.Model.predict``.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        results = []
+        for start in range(0, len(X), batch_size):
+            out = X[start:start + batch_size]
+            for idx, layer in enumerate(self.layers):
+                if layer["kind"] == "lstm":
+                    out = self._lstm(out, idx, layer)
+                else:
+                    out = out @ self.weights[f"l{idx}_kernel"] + self.weights[f"l{idx}_bias"]
+                    out = ACTIVATIONS[layer["activation"]](out)
+            results.append(out)
+        if not results:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(results, axis=0)
+
+
+def verify_against_keras(model, runtime, X, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare les sorties Keras et NumPy sur le lot ``X``.
+    :return: écart absolu maximal
+    :raises ValueError: si l'écart dépasse la tolérance
+    """
+    expected = model.predict(X, verbose=0)
+    actual = runtime.predict(X)
+    max_diff = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+    if max_diff > tolerance:
+        raise ValueError(f"❌ Écart Keras/NumPy trop élevé : {max_diff:.2e} > {tolerance:.0e}")
+    return max_diff
@@ -0,0 +1,85 @@
+# modeling/prediction_cache.py
+# -----------------------------------------------------------------------------
+# Cache des prédictions par (version du modèle, empreinte de la ligne d'entrée)
+# Les clés sont des entiers 64 bits triés, les probabilités un tableau float32 :
+# la recherche de tous les matchs du jour est un seul np.searchsorted. Seules
+# les entrées des dernières versions du modèle sont conservées.
+# -----------------------------------------------------------------------------
+
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+CACHE_PATH = "data/lstm/prediction_cache.npz"
+KEEP_VERSIONS = 3              # versions du modèle conservées dans le cache
+
+
+def _version_hash(model_version):
+    return pd.util.hash_array(np.array([str(model_version)], dtype=object))[0]
+
+
+def row_keys(model_version, X):
+    """Clé uint64 de chaque ligne de ``X`` (toutes dimensions hors la première) pour ce modèle"""
+    X = np.ascontiguousarray(X, dtype=np.float32).reshape(len(X), -1)
+    rows = pd.util.hash_pandas_object(pd.DataFrame(X), index=False).to_numpy()
+    return pd.util.hash_array(rows ^ _version_hash(model_version))
+
+
+class PredictionCache:
+    """Probabilités déjà calculées, relues sans exécuter le modèle."""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.proba = np.zeros((0, 3), dtype=np.float32)
+        self.entry_versions = np.zeros(0, dtype=np.uint64)
+        self.versions = []     # versions récentes, de la plus ancienne à la plus récente
+        if os.path.exists(path):
+            data = np.load(path)
+            self.keys = data["keys"]
+            self.proba = data["proba"]
+            self.entry_versions = data["entry_versions"]
+            self.versions = json.loads(str(data["versions"]))
+
+    def lookup(self, model_version, X):
+        """
+        :return: (probabilités (n, k) avec NaN pour les absents, masque des absents)
+        """
+        keys = row_keys(model_version, X)
+        pos = np.searchsorted(self.keys, keys)
+        found = pos < len(self.keys)
+        found[found] = self.keys[pos[found]] == keys[found]
+
+        proba = np.full((len(keys), self.proba.shape[1]), np.nan, dtype=np.float32)
+        proba[found] = self.proba[pos[found]]
+        return proba, ~found
+
+    def update(self, model_version, X, proba):
+        """Ajoute (ou remplace) les prédictions des lignes de ``X``"""
+        if str(model_version) in self.versions:
+            self.versions.remove(str(model_version))
+        self.versions.append(str(model_version))
+
+        keys = row_keys(model_version, X)
+        keep = ~np.isin(self.keys, keys)
+        keys = np.concatenate([self.keys[keep], keys])
+        proba = np.concatenate([self.proba[keep], np.asarray(proba, dtype=np.float32)])
+        entry_versions = np.concatenate([
+            self.entry_versions[keep],
+            np.full(len(X), _version_hash(model_version), dtype=np.uint64),
+        ])
+
+        # Oublier les versions trop anciennes
+        self.versions = self.versions[-KEEP_VERSIONS:]
+        recent = np.isin(entry_versions, [_version_hash(v) for v in self.versions])
+        order = np.argsort(keys[recent], kind="mergesort")
+        self.keys = keys[recent][order]
+        self.proba = proba[recent][order]
+        self.entry_versions = entry_versions[recent][order]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        np.savez(self.path, keys=self.keys, proba=self.proba,
+                 entry_versions=self.entry_versions, versions=np.array(json.dumps(self.versions)))
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# modeling/registry.py
+# -----------------------------------------------------------------------------
+# Registre des backends de prédiction
+# Chaque backend implémente fit(frame, y) et predict_proba(frame) -> (n, 3)
+# (Home / Draw / Away) sur la même table de features
+# (preprocessing/feature_frame.py). Le backend exécuté par les pipelines est
+# choisi par ``backend:`` dans config/model.yaml ; --compare entraîne et évalue
+# plusieurs backends dans le même processus (latence, log-loss, précision).
+#
+# Usage : python modeling/registry.py --backend ranking
+#         python modeling/registry.py --compare
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import time
+import json
+import hashlib
+import argparse
+
+import numpy as np
+import pandas as pd
+import yaml
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from preprocessing.feature_frame import training_frame, today_frame
+
+CONFIG_PATH = "config/model.yaml"
+DEFAULT_BACKEND = "lstm_model_fixed"
+PREDICTIONS_PATH = "data/lstm/y_pred_proba.npy"
+PREDICTIONS_CSV = "data/lstm/predictions_today.csv"
+COMPARISON_DIR = "data/models"
+HOLDOUT_FRACTION = 0.2
+
+# Colonnes de la table qui ne sont pas des features
+NON_FEATURE_COLUMNS = {
+    "fixture_id", "date", "league_id", "home_id", "away_id", "home_team",
+    "away_team", "status", "goals_home", "goals_away",
+}
+
+BACKENDS = {}
+
+
+def register(name):
+    """Décorateur : enregistre une classe de backend sous ``name``"""
+    def decorator(cls):
+        cls.name = name
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+class ModelBackend:
+    """Interface commune des backends de prédiction."""
+
+    name = None
+    # Script autonome exécuté par les pipelines (gestion de ses propres
+    # artefacts) ; sinon le pipeline lance registry.py --backend <nom>
+    script = None
+    description = None
+
+    def __init__(self, **params):
+        self.params = params
+
+    def fit(self, frame, y):
+        """Entraîne le backend sur les matchs terminés de ``frame``"""
+        return self
+
+    def predict_proba(self, frame):
+        """Probabilités (n, 3) Home / Draw / Away pour chaque ligne de ``frame``"""
+        raise NotImplementedError
+
+    def version(self, frame, y):
+        """Version du modèle entraîné sur (frame, y) : backend, paramètres et empreinte des données"""
+        digest = hashlib.sha1(json.dumps({"name": self.name, "params": self.params}, sort_keys=True).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+        digest.update(np.asarray(y, dtype=np.int64).tobytes())
+        return digest.hexdigest()[:12]
+
+
+@register("ranking")
+class RankingBackend(ModelBackend):
+    """
+    Heuristique vectorisée de utils/strategies.py (sans entraînement) ;
+    ``strategy`` choisit la stratégie enregistrée (ranking_elo par défaut).
+    """
+
+    description = "Heuristique rankings"
+
+    def predict_proba(self, frame):
+        from utils.strategies import predict_strategy, DEFAULT_STRATEGY
+        # Forme récente (features événements) si disponible
+        columns = {
+            "home_ranking": frame["home_ranking"].to_numpy(),
+            "away_ranking": frame["away_ranking"].to_numpy(),
+        }
+        for side in ("home", "away"):
+            for stat in ("goals_for", "goals_against"):
+                if f"{side}_form_{stat}" in frame:
+                    columns[f"{side}_{stat}"] = frame[f"{side}_form_{stat}"].to_numpy()
+        proba = predict_strategy(columns, self.params.get("strategy", DEFAULT_STRATEGY))
+        # L'heuristique peut sortir de [0, 1] (scores négatifs) : ramener à une distribution
+        proba = np.clip(proba, 0.0, 1.0)
+        total = proba.sum(axis=1, keepdims=True)
+        return np.divide(proba, total, out=np.full_like(proba, 1 / 3), where=total > 0)
+
+
+@register("dixon_coles")
+class DixonColesBackend(ModelBackend):
+    """Modèle de buts Dixon-Coles (modeling/dixon_coles.py), un modèle par ligue."""
+
+    script = "python modeling/dixon_coles.py"
+    description = "Modèle Dixon-Coles"
+
+    def fit(self, frame, y):
+        from modeling.dixon_coles import fit_league_models
+        history = frame.reset_index(drop=True).astype({"goals_home": int, "goals_away": int})
+        self.models = fit_league_models(history, ref_date=history["date"].max())
+        return self
+
+    def predict_proba(self, frame):
+        from modeling.dixon_coles import predict_fixtures, outcome_probabilities
+        grid = predict_fixtures(self.models, frame["league_id"].to_numpy(),
+                                frame["home_id"].to_numpy(), frame["away_id"].to_numpy())
+        return outcome_probabilities(grid)[0]
+
+
+@register("lstm_model_fixed")
+class LSTMBackend(ModelBackend):
+    """
+    LSTM sur les features de ranking. Sans appel à fit, prédit avec le modèle
+    sauvegardé par lstm_model_fixed.py (runtime NumPy) et sa calibration, sur
+    les rankings de data/rankings.csv comme à son entraînement (et non sur
+    l'Elo de la table, hors de sa distribution d'entraînement).
+    """
+
+    script = "python modeling/lstm_model_fixed.py"
+    description = "Modèle LSTM"
+
+    @staticmethod
+    def _sequences(home_ranking, away_ranking):
+        from preprocessing.create_lstm_sequences_fixed import ranking_features
+        X = ranking_features(home_ranking, away_ranking)
+        return X.reshape(X.shape[0], 1, X.shape[1]).astype(np.float32)
+
+    @staticmethod
+    def _saved_model_rankings(frame):
+        """Rankings de data/rankings.csv par nom d'équipe (entrées du modèle sauvegardé)"""
+        from preprocessing.feature_frame import load_rankings, RANKINGS_FILE, DEFAULT_RANKING
+        if not os.path.exists(RANKINGS_FILE):
+            raise FileNotFoundError(f"❌ Fichier introuvable : {RANKINGS_FILE} (entrées du modèle LSTM sauvegardé)")
+        rankings = load_rankings(RANKINGS_FILE)
+        return (frame["home_team"].map(rankings).fillna(DEFAULT_RANKING),
+                frame["away_team"].map(rankings).fillna(DEFAULT_RANKING))
+
+    def fit(self, frame, y):
+        from modeling import lstm_model_fixed as lstm
+        tf = lstm._require_tensorflow()
+        X = self._sequences(frame["home_ranking"], frame["away_ranking"])
+        self.model = lstm.build_model(X.shape[1], X.shape[2])
+        self.model.fit(
+            X, y,
+            epochs=self.params.get("epochs", 20),
+            batch_size=self.params.get("batch_size", 32),
+            callbacks=[tf.keras.callbacks.EarlyStopping(monitor="loss", patience=3, restore_best_weights=True)],
+            verbose=0,
+        )
+        return self
+
+    def predict_proba(self, frame):
+        if getattr(self, "model", None) is None:
+            from modeling.lstm_model_fixed import NUMPY_WEIGHTS_PATH
+            from modeling.numpy_lstm import NumpyLSTM
+            if not os.path.exists(NUMPY_WEIGHTS_PATH):
+                raise FileNotFoundError(f"❌ Aucun modèle LSTM sauvegardé : {NUMPY_WEIGHTS_PATH}")
+            from modeling.calibration import load_calibrator
+            self.model = NumpyLSTM.load(NUMPY_WEIGHTS_PATH)
+            self.calibrator = load_calibrator(self.model.model_version)
+            self.saved_model = True
+        if getattr(self, "saved_model", False):
+            X = self._sequences(*self._saved_model_rankings(frame))
+        else:
+            X = self._sequences(frame["home_ranking"], frame["away_ranking"])
+        proba = np.asarray(self.model.predict(X, verbose=0), dtype=np.float64)
+        if getattr(self, "calibrator", None) is not None:
+            proba = self.calibrator.transform(proba)
+        return proba
+
+
+@register("gradient_boosting")
+class GradientBoostingBackend(ModelBackend):
+    """Gradient boosting (scikit-learn) sur toutes les colonnes numériques."""
+
+    description = "Gradient boosting"
+
+    def fit(self, frame, y):
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        # Colonnes numériques renseignées sur au moins un match d'entraînement
+        self.columns = [c for c in frame.columns
+                        if c not in NON_FEATURE_COLUMNS and pd.api.types.is_numeric_dtype(frame[c])
+                        and frame[c].notna().any()]
+        self.model = HistGradientBoostingClassifier(
+            max_iter=self.params.get("max_iter", 200),
+            learning_rate=self.params.get("learning_rate", 0.05),
+            max_depth=self.params.get("max_depth", 3),
+            random_state=42,
+        )
+        self.model.fit(frame[self.columns].to_numpy(dtype=float), y)
+        return self
+
+    def predict_proba(self, frame):
+        X = frame.reindex(columns=self.columns).to_numpy(dtype=float)
+        proba = np.zeros((len(frame), 3))
+        proba[:, self.model.classes_] = self.model.predict_proba(X)
+        return proba
+
+
+@register("ensemble")
+class EnsembleBackend(ModelBackend):
+    """Mélange pondéré d'autres backends (modeling/ensemble.py)."""
+
+    script = "python modeling/ensemble.py"
+    description = "Ensemble de modèles"
+
+    def fit(self, frame, y):
+        from modeling.ensemble import MemberCache, fit_ensemble, DEFAULT_MEMBERS
+        self.config = load_config()
+        self.members = (self.params.get("members") or (self.config.get("ensemble") or {}).get("members")
+                        or DEFAULT_MEMBERS)
+        self.cache = MemberCache()
+        self.weights = fit_ensemble(self.members, frame, y, self.cache, self.config)["weights"]
+        self.frame, self.y = frame, y
+        return self
+
+    def predict_proba(self, frame):
+        from modeling.ensemble import member_predictions, blend
+        probas, _ = member_predictions(self.members, self.frame, self.y, frame, self.cache, self.config)
+        self.cache.save()
+        return blend(probas, self.weights)
+
+
+def load_config(config_path=CONFIG_PATH):
+    """Configuration des modèles (dictionnaire vide si le fichier manque)"""
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f) or {}
+
+
+def create_backend(name, config=None):
+    """Instancie un backend avec ses paramètres de config/model.yaml"""
+    if name not in BACKENDS:
+        raise ValueError(f"❌ Backend inconnu : {name} ({', '.join(BACKENDS)})")
+    params = ((config or {}).get("params") or {}).get(name) or {}
+    return BACKENDS[name](**params)
+
+
+def selected_backend(config_path=CONFIG_PATH):
+    """Nom du backend configuré (défaut : LSTM si la configuration est absente)"""
+    name = load_config(config_path).get("backend", DEFAULT_BACKEND)
+    if name not in BACKENDS:
+        raise ValueError(f"❌ Backend inconnu dans {config_path} : {name} ({', '.join(BACKENDS)})")
+    return name
+
+
+def model_step(config_path=CONFIG_PATH):
+    """Étape de pipeline (commande, description) du backend configuré"""
+    cls = BACKENDS[selected_backend(config_path)]
+    command = cls.script or f"python modeling/registry.py --backend {cls.name}"
+    return command, cls.description
+
+
+def save_predictions(frame, proba, csv_path=PREDICTIONS_CSV, npy_path=PREDICTIONS_PATH):
+    """Écrit les prédictions au format de data/lstm/predictions_today.csv"""
+    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    if npy_path:
+        np.save(npy_path, proba)
+    outcomes = np.array(["Home", "Draw", "Away"])
+    pd.DataFrame({
+        "fixture_id": frame["fixture_id"].to_numpy(),
+        "match": (frame["home_team"] + " vs " + frame["away_team"]).to_numpy(),
+        "home_team": frame["home_team"].to_numpy(),
+        "away_team": frame["away_team"].to_numpy(),
+        "prob_home": proba[:, 0].round(3),
+        "prob_draw": proba[:, 1].round(3),
+        "prob_away": proba[:, 2].round(3),
+        "predicted_outcome": outcomes[proba.argmax(axis=1)],
+        "confidence": proba.max(axis=1).round(3),
+    }).to_csv(csv_path, index=False)
+
+
+def compare_backends(names, frame, y, today=None, config=None, holdout_fraction=HOLDOUT_FRACTION):
+    """
+    Entraîne chaque backend sur les matchs les plus anciens, l'évalue sur les
+    ``holdout_fraction`` plus récents, puis le réentraîne sur tout l'historique
+    pour prédire ``today``.
+    :return: (tableau comparatif, {nom: probabilités holdout}, {nom: probabilités du jour})
+    """
+    from evaluation.metrics import evaluate_predictions
+    split = int(len(frame) * (1 - holdout_fraction))
+    if split == 0 or split == len(frame):
+        raise ValueError(f"❌ Historique trop court ({len(frame)} matchs) pour la comparaison")
+    train, test = frame.iloc[:split], frame.iloc[split:]
+
+    rows, holdout, today_proba = [], {}, {}
+    for name in names:
+        backend = create_backend(name, config)
+        start = time.perf_counter()
+        backend.fit(train, y[:split])
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        proba = backend.predict_proba(test)
+        predict_seconds = time.perf_counter() - start
+
+        holdout[name] = proba
+        metrics = evaluate_predictions(y[split:], proba)
+        rows.append({
+            "backend": name,
+            "fit_s": fit_seconds,
+            "predict_ms": predict_seconds * 1000,
+            "us_per_match": predict_seconds / len(test) * 1e6,
+            "log_loss": metrics["log_loss"],
+            "brier": metrics["brier"],
+            "accuracy": metrics["accuracy"],
+        })
+        print(f"   ✅ {name} : fit {fit_seconds:.2f}s, log-loss {metrics['log_loss']:.4f}")
+
+        if today is not None and len(today):
+            today_proba[name] = backend.fit(frame, y).predict_proba(today)
+    return pd.DataFrame(rows), holdout, today_proba
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backends de prédiction : prédiction du jour ou comparaison")
+    parser.add_argument("--backend", default=None, help=f"backend à exécuter ({', '.join(BACKENDS)})")
+    parser.add_argument("--compare", nargs="*", default=None,
+                        help="compare les backends listés (défaut : liste compare de config/model.yaml)")
+    args = parser.parse_args()
+
+    try:
+        config = load_config()
+        frame, y = training_frame()
+        today = today_frame()
+        print(f"✅ {len(frame)} matchs terminés, {len(today)} matchs du jour")
+
+        if args.compare is not None:
+            names = args.compare or config.get("compare") or list(BACKENDS)
+            print(f"🚀 Comparaison de {len(names)} backends sur les mêmes matchs")
+            table, holdout, today_proba = compare_backends(names, frame, y, today, config)
+
+            os.makedirs(COMPARISON_DIR, exist_ok=True)
+            table.to_csv(os.path.join(COMPARISON_DIR, "comparison.csv"), index=False)
+            for name, proba in today_proba.items():
+                save_predictions(today, proba, os.path.join(COMPARISON_DIR, f"predictions_{name}.csv"), None)
+            print("\n📊 Comparaison des backends (holdout chronologique):")
+            print(table.round(4).to_string(index=False))
+            return
+
+        name = args.backend or selected_backend()
+        backend = create_backend(name, config)
+        if len(frame):
+            backend.fit(frame, y)
+        proba = backend.predict_proba(today)
+        save_predictions(today, proba)
+        print(f"✅ Prédictions {name} sauvegardées : {PREDICTIONS_CSV}")
+
+    except Exception as e:
+        print(f"❌ Erreur dans registry.py : {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# modeling/tflite_runtime.py
+# -----------------------------------------------------------------------------
+# Export TensorFlow Lite du modèle LSTM et inférence CPU via l'interpréteur
+# TFLite (nombre de threads configurable). Les couches LSTM sont déroulées
+# (unroll=True) avant conversion : le graphe n'utilise alors que des opérations
+# TFLite natives, sans délégué Flex. La quantification dynamique (poids int8)
+# est optionnelle.
+#
+# Usage : python modeling/tflite_runtime.py --export --quantize
+#         python modeling/tflite_runtime.py --benchmark --threads 2 --batch 256
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from modeling.lstm_model_fixed import MODEL_DIR
+
+TFLITE_PATH = os.path.join(MODEL_DIR, "lstm.tflite")
+TFLITE_QUANT_PATH = os.path.join(MODEL_DIR, "lstm_quant.tflite")
+
+
+def _interpreter_class():
+    """Interpréteur TFLite le plus léger disponible"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+def unrolled_copy(model):
+    """Copie du modèle Keras avec des couches LSTM déroulées (mêmes poids)"""
+    import tensorflow as tf
+    config = model.get_config()
+    for layer in config["layers"]:
+        if layer["class_name"] == "LSTM":
+            layer["config"]["unroll"] = True
+    clone = tf.keras.Sequential.from_config(config)
+    clone.set_weights(model.get_weights())
+    return clone
+
+
+def export_tflite(model, path=TFLITE_PATH, quantize=False, model_version=None):
+    """
+    Convertit le modèle en TFLite (quantification dynamique si ``quantize``).
+    La version du modèle est écrite à côté (<path>.json).
+    :return: taille du fichier en octets
+    """
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(unrolled_copy(model))
+    if quantize:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    content = converter.convert()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    with open(f"{path}.json", "w") as f:
+        json.dump({"model_version": model_version, "quantized": quantize}, f)
+    return len(content)
+
+
+class TFLiteLSTM:
+    """Prédictions du modèle exporté via l'interpréteur TFLite."""
+
+    def __init__(self, path=TFLITE_PATH, num_threads=None):
+        self.interpreter = _interpreter_class()(model_path=path, num_threads=num_threads)
+        self.input_index = self.interpreter.get_input_details()[0]["index"]
+        self.output_index = self.interpreter.get_output_details()[0]["index"]
+        self._shape = None
+        self.model_version = None
+        if os.path.exists(f"{path}.json"):
+            with open(f"{path}.json", "r") as f:
+                self.model_version = json.load(f).get("model_version")
+
+    def _run(self, batch):
+        if batch.shape != self._shape:
+            self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+            self.interpreter.allocate_tensors()
+            self._shape = batch.shape
+        self.interpreter.set_tensor(self.input_index, batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index)
+
+    def predict(self, X, batch_size=1024, verbose=0):
+        """Probabilités pour ``(n, timesteps, n_features)`` ; signature de ``keras.Model.predict``"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        results = [self._run(X[i:i + batch_size]) for i in range(0, len(X), batch_size)]
+        return np.concatenate(results, axis=0) if results else np.zeros((0, 0), dtype=np.float32)
+
+
+def _latency_ms(predict, X, repeats):
+    predict(X)     # préchauffage (allocation, traçage)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times) * 1000)
+
+
+def benchmark(model, X, num_threads=None, repeats=20, model_version=None):
+    """
+    Compare Keras, le runtime NumPy et TFLite (float et quantifié) sur le même lot.
+    :return: DataFrame (runtime, taille, écart max et accord des prédictions vs Keras, latence)
+    """
+    from modeling.lstm_model_fixed import MODEL_PATH, NUMPY_WEIGHTS_PATH
+    from modeling.numpy_lstm import NumpyLSTM
+
+    reference = model.predict(X, verbose=0)
+    runtimes = [("keras", lambda b: model.predict(b, verbose=0), os.path.getsize(MODEL_PATH))]
+    if os.path.exists(NUMPY_WEIGHTS_PATH):
+        runtimes.append(("numpy", NumpyLSTM.load(NUMPY_WEIGHTS_PATH).predict, os.path.getsize(NUMPY_WEIGHTS_PATH)))
+    for name, path, quantize in (("tflite", TFLITE_PATH, False), ("tflite_int8", TFLITE_QUANT_PATH, True)):
+        size = export_tflite(model, path, quantize, model_version)
+        runtimes.append((name, TFLiteLSTM(path, num_threads).predict, size))
+
+    rows = []
+    for name, predict, size in runtimes:
+        proba = predict(X)
+        rows.append({
+            "runtime": name,
+            "size_kb": size / 1024,
+            "max_abs_diff": float(np.max(np.abs(proba - reference))),
+            "argmax_agreement": float(np.mean(proba.argmax(axis=1) == reference.argmax(axis=1))),
+            "latency_ms": _latency_ms(predict, X, repeats),
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export TFLite et benchmark d'inférence CPU du LSTM")
+    parser.add_argument("--export", action="store_true", help="exporte le modèle sauvegardé en TFLite")
+    parser.add_argument("--quantize", action="store_true", help="quantification dynamique (poids int8)")
+    parser.add_argument("--benchmark", action="store_true", help="compare Keras, NumPy et TFLite")
+    parser.add_argument("--threads", type=int, default=None, help="threads de l'interpréteur TFLite")
+    parser.add_argument("--batch", type=int, default=256, help="taille du lot de benchmark")
+    args = parser.parse_args()
+
+    try:
+        from modeling import lstm_model_fixed as lstm
+        tf = lstm._require_tensorflow()
+        meta = lstm.load_model_meta()
+        if meta is None:
+            raise FileNotFoundError(f"❌ Aucun modèle sauvegardé dans {MODEL_DIR} (lancer --mode train)")
+        model = tf.keras.models.load_model(lstm.MODEL_PATH)
+
+        if args.export or not args.benchmark:
+            path = TFLITE_QUANT_PATH if args.quantize else TFLITE_PATH
+            size = export_tflite(model, path, args.quantize, meta["model_version"])
+            print(f"✅ Modèle {meta['model_version']} exporté : {path} ({size / 1024:.1f} Ko)")
+
+        if args.benchmark:
+            X = np.load(lstm.X_TRAIN_PATH, mmap_mode="r")
+            X = np.asarray(X[-args.batch:], dtype=np.float32)
+            table = benchmark(model, X, args.threads, model_version=meta["model_version"])
+            print(f"\n⚡ Inférence sur un lot de {len(X)} matchs ({args.threads or 'auto'} threads TFLite):")
+            print(table.to_string(index=False, float_format=lambda v: f"{v:.4g}"))
+
+    except Exception as e:
+        print(f"❌ Erreur dans tflite_runtime.py : {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,9 @@ STEPS = [
     "python ingestion/fetch_odds_api_football.py",
     "python preprocessing/match_odds_mapper.py",
     "python ingestion/merge_dataset.py",
+    "python preprocessing/player_strength.py",
+    "python preprocessing/absence_impact.py",
+    "python preprocessing/match_events.py",
     "python preprocessing/create_lstm_sequences.py",
     "python modeling/lstm_model.py",
     "python preprocessing/generate_rankings.py",  # Génére rankings.csv
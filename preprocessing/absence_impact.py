@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# preprocessing/absence_impact.py
+# -----------------------------------------------------------------------------
+# Features d'absences à partir des blessures (data/raw/injuries) et des
+# compositions (data/raw/lineups). Les joueurs absents sont pondérés par leur
+# part des minutes de l'équipe, issue de l'état joueurs de player_strength.py.
+# Les index blessures/compositions sont mis à jour de façon incrémentale :
+# seuls les fichiers nouveaux ou modifiés depuis le dernier passage sont relus.
+# Pour les matchs de l'historique (table d'entraînement), chaque absent est
+# pondéré par sa part des minutes avant le match
+# (data/processed/minutes_share_history.csv).
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+from glob import glob
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from preprocessing.feature_store import save_features
+from preprocessing.player_strength import (
+    PlayerState, player_minutes_share, minutes_share_before, load_share_history, SHARE_HISTORY_PATH,
+)
+
+INJURIES_DIR = "data/raw/injuries"
+LINEUPS_DIR = "data/raw/lineups"
+MATCHES_FILE = "data/processed/base_matches.csv"
+INJURIES_INDEX = "data/processed/injuries_index.csv"
+LINEUPS_INDEX = "data/processed/lineups_index.csv"
+MANIFEST_PATH = "data/processed/absence_manifest.json"
+
+INJURY_COLUMNS = ["source", "team_id", "date", "player_id", "fixture_id", "missing"]
+LINEUP_COLUMNS = ["source", "fixture_id", "team_id", "player_id", "starter"]
+
+
+def parse_injuries(path):
+    """Lit un fichier /injuries et renvoie une ligne par joueur indisponible."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    rows = []
+    source = os.path.basename(path)
+    for entry in data.get("response", []):
+        player = entry.get("player", {})
+        team_id = entry.get("team", {}).get("id")
+        fixture = entry.get("fixture", {})
+        if player.get("id") is None or team_id is None:
+            continue
+        rows.append((
+            source,
+            team_id,
+            (fixture.get("date") or "")[:10],
+            player["id"],
+            fixture.get("id"),
+            # "Missing Fixture" = forfait certain, "Questionable" = incertain
+            player.get("type") == "Missing Fixture",
+        ))
+    return pd.DataFrame(rows, columns=INJURY_COLUMNS)
+
+
+def parse_lineups(path):
+    """Lit un fichier /fixtures/lineups et renvoie une ligne par joueur convoqué."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    rows = []
+    source = os.path.basename(path)
+    fixture_id = (data.get("parameters") or {}).get("fixture")
+    if fixture_id is None:
+        fixture_id = source.replace("lineups_", "").replace(".json", "")
+    for team_block in data.get("response", []):
+        team_id = team_block.get("team", {}).get("id")
+        if team_id is None:
+            continue
+        for key, starter in (("startXI", True), ("substitutes", False)):
+            for entry in team_block.get(key) or []:
+                pid = entry.get("player", {}).get("id")
+                if pid is not None:
+                    rows.append((source, int(fixture_id), team_id, pid, starter))
+    return pd.DataFrame(rows, columns=LINEUP_COLUMNS)
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {"injuries": {}, "lineups": {}}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def refresh_index(index_path, columns, files, seen, parser):
+    """
+    Met à jour un index CSV : les lignes des fichiers modifiés sont remplacées,
+    celles des fichiers inchangés conservées telles quelles.
+    :param seen: dictionnaire fichier -> mtime du dernier passage (mis à jour)
+    :return: (index DataFrame, nombre de fichiers relus)
+    """
+    if os.path.exists(index_path):
+        index_df = pd.read_csv(index_path)
+    else:
+        index_df = pd.DataFrame(columns=columns)
+
+    changed = []
+    for path in files:
+        mtime = os.path.getmtime(path)
+        if seen.get(os.path.basename(path)) != mtime:
+            changed.append((path, mtime))
+    if not changed:
+        return index_df, 0
+
+    sources = {os.path.basename(p) for p, _ in changed}
+    blocks = [index_df[~index_df["source"].isin(sources)]]
+    for path, mtime in changed:
+        try:
+            blocks.append(parser(path))
+            seen[os.path.basename(path)] = mtime
+        except Exception as e:
+            print(f"⚠️ Erreur lecture {path}: {e}")
+
+    blocks = [b for b in blocks if not b.empty]
+    index_df = pd.concat(blocks, ignore_index=True) if blocks else pd.DataFrame(columns=columns)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    index_df.to_csv(index_path, index=False)
+    return index_df, len(changed)
+
+
+def _side_sums(keys_df, rows_df, on, value_cols):
+    """Somme des colonnes ``value_cols`` de ``rows_df`` pour chaque clé de ``keys_df``."""
+    if rows_df.empty:
+        return np.zeros((len(keys_df), len(value_cols)))
+    grouped = rows_df.groupby(on, as_index=False)[value_cols].sum()
+    merged = keys_df[on].merge(grouped, on=on, how="left")
+    return merged[value_cols].fillna(0).to_numpy(dtype=float)
+
+
+def build_absence_features(matches_df, injuries_df, lineups_df, state, share_history=None):
+    """
+    Calcule les features d'absence pour chaque match, côté domicile et extérieur :
+    - ``absent_count`` / ``absent_share`` : forfaits et part des minutes perdues
+    - ``doubtful_share`` : part des minutes des joueurs incertains
+    - ``lineup_share`` : part des minutes habituelles présentes dans le XI de départ
+      (``lineup_known`` vaut 0 tant que la composition n'est pas publiée)
+    :param share_history: historique des parts de minutes ; si fourni, chaque
+        joueur est pondéré par sa part avant le match (sinon : état courant)
+    """
+    match_date = matches_df.get("fixture.date", pd.Series([""] * len(matches_df))).astype(str).str[:10]
+
+    def shares(player_ids, dates):
+        if share_history is None:
+            return player_minutes_share(state, player_ids)
+        return minutes_share_before(share_history, player_ids, dates)
+
+    injuries = injuries_df.copy()
+    if not injuries.empty:
+        injuries["missing"] = injuries["missing"].astype(str).str.lower() == "true"
+        injuries["share"] = shares(injuries["player_id"].to_numpy(), injuries["date"].astype(str).to_numpy())
+        injuries["absent_count"] = injuries["missing"].astype(float)
+        injuries["absent_share"] = injuries["share"] * injuries["missing"]
+        injuries["doubtful_share"] = injuries["share"] * ~injuries["missing"]
+        injuries = injuries.drop_duplicates(["team_id", "date", "player_id"])
+
+    starters = lineups_df[lineups_df["starter"].astype(str).str.lower() == "true"].copy()
+    if not starters.empty:
+        dates = starters["fixture_id"].map(dict(zip(matches_df["fixture.id"], match_date)))
+        starters["lineup_share"] = shares(starters["player_id"].to_numpy(), dates.to_numpy())
+        starters["lineup_known"] = 1.0
+
+    features = {"fixture.id": matches_df["fixture.id"].to_numpy()}
+    injury_cols = ["absent_count", "absent_share", "doubtful_share"]
+
+    for side in ("home", "away"):
+        keys = pd.DataFrame({
+            "team_id": matches_df[f"teams.{side}.id"].to_numpy(),
+            "date": match_date.to_numpy(),
+            "fixture_id": matches_df["fixture.id"].to_numpy(),
+        })
+        inj = _side_sums(keys, injuries, ["team_id", "date"], injury_cols)
+        lin = _side_sums(keys, starters, ["fixture_id", "team_id"], ["lineup_share", "lineup_known"])
+        for j, col in enumerate(injury_cols):
+            features[f"{side}_{col}"] = inj[:, j].round(4)
+        features[f"{side}_lineup_share"] = lin[:, 0].round(4)
+        features[f"{side}_lineup_known"] = (lin[:, 1] > 0).astype(int)
+
+    features_df = pd.DataFrame(features)
+    features_df["absence_share_diff"] = (
+        features_df["home_absent_share"] - features_df["away_absent_share"]
+    ).round(4)
+    return features_df
+
+
+def load_index(path, columns):
+    return pd.read_csv(path) if os.path.exists(path) else pd.DataFrame(columns=columns)
+
+
+def historical_absence_features(fixtures, injuries_path=INJURIES_INDEX, lineups_path=LINEUPS_INDEX,
+                                share_path=SHARE_HISTORY_PATH):
+    """
+    Features d'absence des matchs de l'historique, chaque absent étant pondéré
+    par sa part des minutes avant le match.
+    :param fixtures: table de fixture_history (fixture_id, date, home_id, away_id)
+    """
+    matches_df = pd.DataFrame({
+        "fixture.id": fixtures["fixture_id"].to_numpy(),
+        "fixture.date": pd.to_datetime(fixtures["date"], utc=True).dt.strftime("%Y-%m-%d").to_numpy(),
+        "teams.home.id": fixtures["home_id"].to_numpy(),
+        "teams.away.id": fixtures["away_id"].to_numpy(),
+    })
+    features_df = build_absence_features(
+        matches_df, load_index(injuries_path, INJURY_COLUMNS), load_index(lineups_path, LINEUP_COLUMNS),
+        None, share_history=load_share_history(fixtures, share_path),
+    )
+    return features_df.rename(columns={"fixture.id": "fixture_id"})
+
+
+def main():
+    """Met à jour les index d'absences puis exporte les features du jour"""
+    try:
+        manifest = load_manifest()
+
+        injuries_df, n_inj = refresh_index(
+            INJURIES_INDEX, INJURY_COLUMNS,
+            sorted(glob(os.path.join(INJURIES_DIR, "injuries_*.json"))),
+            manifest.setdefault("injuries", {}), parse_injuries,
+        )
+        lineups_df, n_lin = refresh_index(
+            LINEUPS_INDEX, LINEUP_COLUMNS,
+            sorted(glob(os.path.join(LINEUPS_DIR, "lineups_*.json"))),
+            manifest.setdefault("lineups", {}), parse_lineups,
+        )
+        save_manifest(manifest)
+        print(f"✅ Index mis à jour : {n_inj} fichier(s) blessures, {n_lin} fichier(s) compositions relus")
+
+        if not os.path.exists(MATCHES_FILE):
+            print(f"⚠️ {MATCHES_FILE} introuvable, features d'absence non générées")
+            return
+
+        matches_df = pd.read_csv(MATCHES_FILE)
+        required = ["fixture.id", "teams.home.id", "teams.away.id"]
+        if matches_df.empty or not all(c in matches_df.columns for c in required):
+            print("⚠️ Matchs du jour absents ou incomplets, features ignorées")
+            return
+
+        state = PlayerState.load()
+        features_df = build_absence_features(matches_df, injuries_df, lineups_df, state)
+        path = save_features(features_df, "absence")
+        print(f"✅ Features d'absence calculées pour {len(features_df)} matchs : {path}")
+
+    except Exception as e:
+        print(f"❌ Erreur dans absence_impact.py : {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
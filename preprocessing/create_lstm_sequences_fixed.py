@@ -6,12 +6,22 @@
 # -----------------------------------------------------------------------------
 
 import os
+import sys
 import pandas as pd
 import numpy as np
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from preprocessing.feature_store import join_features
+
 INPUT_FILE = "data/processed/base_matches.csv"
 RANKINGS_FILE = "data/rankings.csv"
 OUTPUT_DIR = "data/lstm"
+FEATURES_TODAY_FILE = os.path.join(OUTPUT_DIR, "features_today.csv")
+
+# Version du schéma des features : à incrémenter à chaque changement de
+# create_features (ordre, normalisation, nombre de colonnes). Un modèle
+# sauvegardé avec une autre version n'est pas réutilisé.
+FEATURE_SCHEMA_VERSION = 1
 
 def load_data():
     """Charge les données de matchs et rankings"""
@@ -27,42 +37,38 @@ def load_data():
     if matches_df.empty:
         raise ValueError(f"⚠️ Fichier de matchs vide : {INPUT_FILE}")
     
+    # Ajouter les features calculées par les autres étapes (compositions, etc.)
+    matches_df = join_features(matches_df)
+    
     # Créer un dictionnaire de rankings pour mapping rapide
     rankings_dict = dict(zip(rankings_df["team"], rankings_df["ranking"]))
     
     return matches_df, rankings_dict
 
+def ranking_features(home_ranking, away_ranking):
+    """Features LSTM (n, 5) à partir des rankings domicile / extérieur"""
+    home_ranking = np.asarray(home_ranking, dtype=float)
+    away_ranking = np.asarray(away_ranking, dtype=float)
+    home_advantage = 50  # Avantage domicile fixe
+    
+    return np.column_stack([
+        (home_ranking - away_ranking) / 1000,   # Positif = domicile plus fort
+        (home_ranking + away_ranking) / 2000,   # Force globale du match
+        np.full(len(home_ranking), home_advantage / 100),
+        home_ranking / 1000,                    # Ranking domicile normalisé
+        away_ranking / 1000,                    # Ranking extérieur normalisé
+    ])
+
 def create_features(matches_df, rankings_dict):
     """Crée les features pour le modèle LSTM basées sur les rankings"""
-    features = []
-    team_pairs = []
+    home_teams = matches_df["teams.home.name"].tolist()
+    away_teams = matches_df["teams.away.name"].tolist()
     
-    for _, match in matches_df.iterrows():
-        home_team = match["teams.home.name"]
-        away_team = match["teams.away.name"]
-        
-        # Récupérer les rankings (score neutre si équipe inconnue)
-        home_ranking = rankings_dict.get(home_team, 500)
-        away_ranking = rankings_dict.get(away_team, 500)
-        
-        # Features basiques
-        ranking_diff = home_ranking - away_ranking  # Positif = domicile plus fort
-        ranking_sum = home_ranking + away_ranking    # Force globale du match
-        home_advantage = 50  # Avantage domicile fixe
-        
-        # Feature vector pour ce match
-        match_features = [
-            ranking_diff / 1000,      # Normaliser
-            ranking_sum / 2000,       # Normaliser  
-            home_advantage / 100,     # Normaliser
-            home_ranking / 1000,      # Ranking domicile normalisé
-            away_ranking / 1000,      # Ranking extérieur normalisé
-        ]
-        
-        features.append(match_features)
-        team_pairs.append((home_team, away_team))
+    # Récupérer les rankings (score neutre si équipe inconnue)
+    home_ranking = [rankings_dict.get(team, 500) for team in home_teams]
+    away_ranking = [rankings_dict.get(team, 500) for team in away_teams]
     
-    return np.array(features), team_pairs
+    return ranking_features(home_ranking, away_ranking), list(zip(home_teams, away_teams))
 
 def simulate_training_data(n_samples=1000):
     """Simule des données d'entraînement historiques"""
@@ -148,13 +154,19 @@ def main():
         
         # Sauvegarder les noms des équipes pour référence
         team_pairs_df = pd.DataFrame(team_pairs, columns=["home_team", "away_team"])
+        if "fixture.id" in matches_df.columns:
+            team_pairs_df.insert(0, "fixture_id", matches_df["fixture.id"].to_numpy())
         team_pairs_df.to_csv(os.path.join(OUTPUT_DIR, "team_pairs.csv"), index=False)
         
+        # Sauvegarder la table complète des matchs du jour avec leurs features
+        matches_df.to_csv(FEATURES_TODAY_FILE, index=False)
+        
         print(f"✅ Données LSTM sauvegardées dans {OUTPUT_DIR}")
         print(f"   - X.npy: données d'entraînement {X_train_reshaped.shape}")  
         print(f"   - y.npy: résultats d'entraînement {y_train.shape}")
         print(f"   - X_today.npy: matchs d'aujourd'hui {X_today_reshaped.shape}")
-        print(f"   - team_pairs.csv: noms des équipes")
+        print("   - team_pairs.csv: identifiants et noms des équipes")
+        print("   - features_today.csv: matchs du jour et features jointes")
         
     except Exception as e:
         print(f"❌ Erreur lors de la génération des séquences : {e}")
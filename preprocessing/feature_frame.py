@@ -0,0 +1,177 @@
+# preprocessing/feature_frame.py
+# -----------------------------------------------------------------------------
+# Table de features commune à tous les backends de modèles (modeling/registry)
+# Une ligne par match : identifiants, équipes, rankings, forme et features
+# jointes depuis data/processed/features_*.csv. Les features de l'historique
+# (entraînement) et des matchs du jour (prédiction) ont la même définition et
+# ne regardent jamais après le coup d'envoi :
+#   - rankings : Elo calculé sur les matchs terminés, avant chaque match pour
+#     l'historique et courant pour les matchs du jour (data/rankings.csv
+#     n'existe qu'à la date du jour : il ne sert que sans historique) ;
+#   - forme : moyenne des features d'événements des FORM_WINDOW matchs
+#     précédents de chaque équipe (data/processed/team_match_events.csv) ;
+#   - force des compositions : force de chaque équipe après son dernier match
+#     antérieur (data/processed/lineup_strength_history.csv) ;
+#   - absences : blessures et compositions indexées par absence_impact.py,
+#     chaque joueur pondéré par sa part des minutes avant le match.
+# Les blocs features_*.csv couvrent les matchs du jour : ils ne sont joints
+# qu'à la table du jour, sous les mêmes noms de colonnes que les versions
+# historiques (les backends entraînés ignorent les colonnes absentes de
+# l'historique).
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from preprocessing.feature_store import join_features, FIXTURE_KEY
+from preprocessing.fixture_history import load_fixture_table
+from preprocessing.match_events import TEAM_MATCH_FILE, FORM_FEATURES, FORM_WINDOW
+from preprocessing.player_strength import historical_lineup_features
+from preprocessing.absence_impact import historical_absence_features
+
+MATCHES_FILE = "data/processed/base_matches.csv"
+RANKINGS_FILE = "data/rankings.csv"
+DEFAULT_RANKING = 500          # score neutre d'une équipe absente des rankings
+ELO_INITIAL = 1500             # Elo d'une équipe sans match terminé
+ELO_K = 20
+ELO_HOME_ADVANTAGE = 60
+# Version de la construction de la table (2 : rankings et forme d'avant-match) ;
+# les artefacts dérivés de l'historique (candidats de backtest) la conservent
+FRAME_VERSION = 2
+
+# Colonnes de base_matches.csv (json_normalize de l'API) -> colonnes de la table
+MATCH_COLUMNS = {
+    "fixture.id": "fixture_id",
+    "fixture.date": "date",
+    "league.id": "league_id",
+    "teams.home.id": "home_id",
+    "teams.away.id": "away_id",
+    "teams.home.name": "home_team",
+    "teams.away.name": "away_team",
+    "goals.home": "goals_home",
+    "goals.away": "goals_away",
+}
+
+
+def load_rankings(path=RANKINGS_FILE):
+    """
+    Rankings par nom d'équipe (dictionnaire vide si le fichier manque) ;
+    colonne ``ranking`` (generate_rankings_from_standings.py) ou ``score``
+    (generate_rankings.py).
+    """
+    if not os.path.exists(path):
+        return {}
+    rankings_df = pd.read_csv(path)
+    score_column = "ranking" if "ranking" in rankings_df.columns else "score"
+    return dict(zip(rankings_df.iloc[:, 0].astype(str), rankings_df[score_column]))
+
+
+def elo_ratings(history):
+    """
+    Elo de chaque équipe avant chacun des matchs terminés de ``history``
+    (triés par date), puis Elo courant après le dernier match.
+    :return: (Elo domicile (n,), Elo extérieur (n,), {team_id: Elo courant})
+    """
+    ratings = {}
+    n = len(history)
+    pre_home, pre_away = np.empty(n), np.empty(n)
+    diff = history["goals_home"].to_numpy(dtype=float) - history["goals_away"].to_numpy(dtype=float)
+    result = np.where(diff > 0, 1.0, np.where(diff == 0, 0.5, 0.0))
+    for i, (home, away) in enumerate(zip(history["home_id"].to_numpy(), history["away_id"].to_numpy())):
+        r_home, r_away = ratings.get(home, ELO_INITIAL), ratings.get(away, ELO_INITIAL)
+        pre_home[i], pre_away[i] = r_home, r_away
+        expected = 1 / (1 + 10 ** ((r_away - r_home - ELO_HOME_ADVANTAGE) / 400))
+        delta = ELO_K * (result[i] - expected)
+        ratings[home], ratings[away] = r_home + delta, r_away - delta
+    return pre_home, pre_away, ratings
+
+
+def load_team_matches(path=TEAM_MATCH_FILE):
+    """Features d'événements par (match, équipe) (table vide si le fichier manque)"""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=["fixture_id", "team_id", "date"] + FORM_FEATURES)
+    return pd.read_csv(path, parse_dates=["date"])
+
+
+def event_form(team_matches, window=FORM_WINDOW):
+    """
+    Forme glissante (moyenne des ``window`` derniers matchs) de chaque équipe.
+    :return: (forme avant chaque (fixture_id, team_id), forme courante par team_id)
+    """
+    if team_matches.empty:
+        empty = pd.DataFrame({"fixture_id": pd.Series(dtype=np.int64), "team_id": pd.Series(dtype=np.int64),
+                              **{c: pd.Series(dtype=np.float64) for c in FORM_FEATURES}})
+        return empty, empty.drop(columns="fixture_id")
+    ordered = team_matches.sort_values("date", kind="mergesort").reset_index(drop=True)
+    rolled = (ordered.groupby("team_id")[FORM_FEATURES]
+              .rolling(window, min_periods=1).mean()
+              .reset_index(level=0, drop=True).sort_index())
+    before = rolled.groupby(ordered["team_id"]).shift(1)
+    before[["fixture_id", "team_id"]] = ordered[["fixture_id", "team_id"]]
+    current = rolled.assign(team_id=ordered["team_id"]).groupby("team_id").tail(1)
+    return before, current
+
+
+def _add_form(frame, form, by_fixture):
+    """Ajoute home_form_* / away_form_* (forme de chaque équipe, par match si ``by_fixture``)"""
+    for side in ("home", "away"):
+        side_form = form.rename(columns={"team_id": f"{side}_id",
+                                         **{c: f"{side}_form_{c}" for c in FORM_FEATURES}})
+        keys = ["fixture_id", f"{side}_id"] if by_fixture else [f"{side}_id"]
+        frame = frame.merge(side_form, on=keys, how="left")
+    return frame
+
+
+def training_frame(raw_dir="data/raw", team_match_file=TEAM_MATCH_FILE):
+    """
+    Matchs terminés de l'historique, triés par date, et leurs issues, avec
+    rankings (Elo), forme, force des compositions et absences tels qu'ils
+    étaient avant chaque match.
+    :return: (frame, y) avec y = 0 domicile, 1 nul, 2 extérieur
+    """
+    history = load_fixture_table(raw_dir, finished_only=True)
+    frame = history.copy()
+    frame["home_ranking"], frame["away_ranking"], _ = elo_ratings(history)
+    before, _ = event_form(load_team_matches(team_match_file))
+    frame = _add_form(frame, before, by_fixture=True)
+    frame = frame.merge(historical_lineup_features(history), on="fixture_id", how="left")
+    frame = frame.merge(historical_absence_features(history), on="fixture_id", how="left")
+    return frame, match_outcomes(frame)
+
+
+def today_frame(matches_file=MATCHES_FILE, raw_dir="data/raw", team_match_file=TEAM_MATCH_FILE):
+    """Matchs du jour (data/processed/base_matches.csv), rankings et forme courants"""
+    if not os.path.exists(matches_file):
+        raise FileNotFoundError(f"❌ Fichier introuvable : {matches_file}")
+    matches_df = pd.read_csv(matches_file)
+    frame = matches_df[[c for c in MATCH_COLUMNS if c in matches_df.columns]].rename(columns=MATCH_COLUMNS)
+    for column in MATCH_COLUMNS.values():
+        if column not in frame.columns:
+            frame[column] = np.nan
+
+    history = load_fixture_table(raw_dir, finished_only=True)
+    if history.empty:
+        # Sans historique : rankings du jour (aucun backend ne peut être entraîné)
+        rankings = load_rankings()
+        frame["home_ranking"] = frame["home_team"].map(rankings).fillna(DEFAULT_RANKING).astype(float)
+        frame["away_ranking"] = frame["away_team"].map(rankings).fillna(DEFAULT_RANKING).astype(float)
+    else:
+        ratings = pd.Series(elo_ratings(history)[2])
+        frame["home_ranking"] = frame["home_id"].map(ratings).fillna(ELO_INITIAL).astype(float)
+        frame["away_ranking"] = frame["away_id"].map(ratings).fillna(ELO_INITIAL).astype(float)
+    _, current = event_form(load_team_matches(team_match_file))
+    frame = _add_form(frame, current, by_fixture=False)
+
+    # Les colonnes déjà présentes (forme) ne sont pas écrasées par les blocs du jour
+    frame = join_features(frame.rename(columns={"fixture_id": FIXTURE_KEY}))
+    return frame.rename(columns={FIXTURE_KEY: "fixture_id"})
+
+
+def match_outcomes(frame):
+    """Issue de chaque match terminé : 0 domicile, 1 nul, 2 extérieur"""
+    diff = frame["goals_home"].to_numpy(dtype=float) - frame["goals_away"].to_numpy(dtype=float)
+    return np.where(diff > 0, 0, np.where(diff == 0, 1, 2)).astype(np.int64)
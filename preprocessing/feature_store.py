@@ -0,0 +1,58 @@
+# preprocessing/feature_store.py
+# -----------------------------------------------------------------------------
+# Stockage et jointure des features additionnelles par match
+# Chaque étape de preprocessing écrit data/processed/features_<nom>.csv indexé
+# par ``fixture.id`` ; ces fichiers sont fusionnés sur la table des matchs.
+# -----------------------------------------------------------------------------
+
+import os
+from glob import glob
+
+import pandas as pd
+
+FEATURES_DIR = "data/processed"
+FEATURE_PREFIX = "features_"
+FIXTURE_KEY = "fixture.id"
+
+
+def feature_path(name: str) -> str:
+    """Chemin du fichier de features pour une étape donnée."""
+    return os.path.join(FEATURES_DIR, f"{FEATURE_PREFIX}{name}.csv")
+
+
+def save_features(features_df: pd.DataFrame, name: str) -> str:
+    """
+    Sauvegarde un bloc de features indexé par ``fixture.id``.
+    :return: chemin du fichier écrit
+    """
+    if FIXTURE_KEY not in features_df.columns:
+        raise ValueError(f"❌ Colonne {FIXTURE_KEY} absente des features '{name}'")
+    os.makedirs(FEATURES_DIR, exist_ok=True)
+    path = feature_path(name)
+    features_df.to_csv(path, index=False)
+    return path
+
+
+def join_features(matches_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ajoute à la table des matchs toutes les features disponibles.
+    Les fichiers absents ou illisibles sont ignorés : la table est renvoyée
+    telle quelle si aucune feature n'a encore été calculée.
+    """
+    if FIXTURE_KEY not in matches_df.columns:
+        return matches_df
+
+    merged = matches_df
+    for path in sorted(glob(os.path.join(FEATURES_DIR, f"{FEATURE_PREFIX}*.csv"))):
+        try:
+            block = pd.read_csv(path)
+        except Exception as e:
+            print(f"⚠️ Features ignorées ({path}) : {e}")
+            continue
+        if block.empty or FIXTURE_KEY not in block.columns:
+            continue
+        # Ne pas écraser les colonnes déjà présentes
+        new_cols = [c for c in block.columns if c == FIXTURE_KEY or c not in merged.columns]
+        block = block[new_cols].drop_duplicates(FIXTURE_KEY, keep="last")
+        merged = merged.merge(block, on=FIXTURE_KEY, how="left")
+    return merged
@@ -0,0 +1,68 @@
+# preprocessing/fixture_history.py
+# -----------------------------------------------------------------------------
+# Table plate de tous les matchs présents dans data/raw/fixtures_*.json
+# (identifiants, date, équipes, statut et score), utilisée par les étapes qui
+# ont besoin de l'historique des rencontres.
+# -----------------------------------------------------------------------------
+
+import os
+import json
+from glob import glob
+
+import pandas as pd
+
+RAW_DIR = "data/raw"
+FINISHED_STATUSES = ("FT", "AET", "PEN")
+
+FIXTURE_COLUMNS = [
+    "fixture_id", "date", "league_id", "home_id", "away_id",
+    "home_team", "away_team", "status", "goals_home", "goals_away",
+]
+
+
+def load_fixture_table(raw_dir=RAW_DIR, finished_only=False):
+    """
+    Charge tous les fichiers de fixtures en une table triée par date.
+    Un match présent dans plusieurs fichiers garde sa version la plus récente.
+    """
+    rows = []
+    for path in sorted(glob(os.path.join(raw_dir, "fixtures_*.json")), key=os.path.getmtime):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Erreur lecture fixtures {path}: {e}")
+            continue
+
+        for match in data.get("response", []):
+            fixture = match.get("fixture", {})
+            teams = match.get("teams", {})
+            goals = match.get("goals", {})
+            if fixture.get("id") is None:
+                continue
+            rows.append((
+                fixture["id"],
+                fixture.get("date"),
+                match.get("league", {}).get("id"),
+                teams.get("home", {}).get("id"),
+                teams.get("away", {}).get("id"),
+                teams.get("home", {}).get("name"),
+                teams.get("away", {}).get("name"),
+                (fixture.get("status") or {}).get("short"),
+                goals.get("home"),
+                goals.get("away"),
+            ))
+
+    table = pd.DataFrame(rows, columns=FIXTURE_COLUMNS)
+    if table.empty:
+        return table
+
+    table = table.drop_duplicates("fixture_id", keep="last")
+    table["date"] = pd.to_datetime(table["date"], utc=True, errors="coerce")
+    if finished_only:
+        table = table[
+            table["status"].isin(FINISHED_STATUSES)
+            & table["goals_home"].notna()
+            & table["goals_away"].notna()
+        ]
+    return table.sort_values("date").reset_index(drop=True)
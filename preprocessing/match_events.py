@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# preprocessing/match_events.py
+# -----------------------------------------------------------------------------
+# Transforme les événements de match (data/raw/events) en une table colonnaire
+# (data/processed/events_table.npz), en déduit des features par équipe et par
+# match (timing des buts, infériorité numérique, buts tardifs, proxy xG) puis
+# calcule la forme glissante de chaque équipe pour les matchs du jour.
+# Le manifeste (data/processed/events_manifest.json) garde la date de
+# modification de chaque fichier : un fichier réécrit après le match (événements
+# partiels récupérés pendant la rencontre) remplace les lignes de son match.
+#
+# Usage : python preprocessing/match_events.py [--benchmark]
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from glob import glob
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from preprocessing.feature_store import save_features
+from preprocessing.fixture_history import load_fixture_table
+
+EVENTS_DIR = "data/raw/events"
+MATCHES_FILE = "data/processed/base_matches.csv"
+EVENTS_TABLE = "data/processed/events_table.npz"
+MANIFEST_PATH = "data/processed/events_manifest.json"
+TEAM_MATCH_FILE = "data/processed/team_match_events.csv"
+
+FORM_WINDOW = 5                # nombre de matchs de la forme glissante
+LATE_MINUTE = 76               # un but est "tardif" à partir de la 76e minute
+MATCH_MINUTES = 90
+PENALTY_XG = 0.76              # valeur xG conventionnelle d'un penalty
+
+# Codes des types et détails d'événements
+GOAL, CARD, SUBST, VAR, OTHER = 0, 1, 2, 3, 4
+TYPE_CODES = {"goal": GOAL, "card": CARD, "subst": SUBST, "var": VAR}
+
+NORMAL_GOAL, OWN_GOAL, PENALTY, MISSED_PENALTY, YELLOW, RED, SECOND_YELLOW, NO_DETAIL = range(8)
+DETAIL_CODES = {
+    "normal goal": NORMAL_GOAL,
+    "own goal": OWN_GOAL,
+    "penalty": PENALTY,
+    "missed penalty": MISSED_PENALTY,
+    "yellow card": YELLOW,
+    "red card": RED,
+    "second yellow card": SECOND_YELLOW,
+}
+
+EVENT_COLUMNS = ("fixture_id", "team_id", "minute", "type", "detail")
+
+FORM_FEATURES = [
+    "goals_for", "goals_against", "xg_proxy", "mean_goal_minute",
+    "late_goals_for", "late_goals_against", "red_minutes_short",
+    "opp_red_minutes_short", "first_sub_minute",
+]
+
+
+def _empty_table():
+    return {
+        "fixture_id": np.zeros(0, dtype=np.int64),
+        "team_id": np.zeros(0, dtype=np.int64),
+        "minute": np.zeros(0, dtype=np.int16),
+        "type": np.zeros(0, dtype=np.int8),
+        "detail": np.zeros(0, dtype=np.int8),
+    }
+
+
+def _fixture_id_from_name(path):
+    """Identifiant du match d'après le nom ``events_<fixture_id>.json``."""
+    stem = os.path.basename(path).replace("events_", "").replace(".json", "")
+    return int(stem) if stem.isdigit() else None
+
+
+def parse_event_files(paths):
+    """
+    Lit un lot de fichiers /fixtures/events et les concatène en une table
+    colonnaire (dictionnaire de tableaux NumPy, une entrée par événement).
+    """
+    fixture_ids, team_ids, minutes, types, details = [], [], [], [], []
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Erreur lecture {path}: {e}")
+            continue
+
+        fixture_id = (data.get("parameters") or {}).get("fixture")
+        fixture_id = int(fixture_id) if fixture_id is not None else _fixture_id_from_name(path)
+        if fixture_id is None:
+            continue
+
+        for event in data.get("response", []):
+            team_id = (event.get("team") or {}).get("id")
+            if team_id is None:
+                continue
+            t = event.get("time") or {}
+            fixture_ids.append(fixture_id)
+            team_ids.append(team_id)
+            minutes.append((t.get("elapsed") or 0) + (t.get("extra") or 0))
+            types.append(TYPE_CODES.get(str(event.get("type", "")).lower(), OTHER))
+            details.append(DETAIL_CODES.get(str(event.get("detail", "")).lower(), NO_DETAIL))
+
+    return {
+        "fixture_id": np.asarray(fixture_ids, dtype=np.int64),
+        "team_id": np.asarray(team_ids, dtype=np.int64),
+        "minute": np.asarray(minutes, dtype=np.int16),
+        "type": np.asarray(types, dtype=np.int8),
+        "detail": np.asarray(details, dtype=np.int8),
+    }
+
+
+def load_events_table(path=EVENTS_TABLE):
+    if not os.path.exists(path):
+        return _empty_table()
+    data = np.load(path)
+    return {col: data[col] for col in EVENT_COLUMNS}
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def update_events_table(events_dir=EVENTS_DIR, path=EVENTS_TABLE, manifest_path=MANIFEST_PATH):
+    """
+    Ajoute à la table les fichiers d'événements nouveaux ou modifiés depuis le
+    dernier passage : les lignes des matchs concernés sont remplacées (une
+    table antérieure au manifeste est ainsi relue une fois en entier).
+    :return: (table, nombre de fichiers lus)
+    """
+    table = load_events_table(path)
+    manifest = load_manifest(manifest_path)
+    files = sorted(glob(os.path.join(events_dir, "events_*.json")))
+    mtimes = {os.path.basename(p): os.path.getmtime(p) for p in files}
+    changed = [p for p in files if manifest.get(os.path.basename(p)) != mtimes[os.path.basename(p)]]
+    if not changed:
+        return table, 0
+
+    stale = np.array([_fixture_id_from_name(p) or -1 for p in changed], dtype=np.int64)
+    keep = ~np.isin(table["fixture_id"], stale)
+    new = parse_event_files(changed)
+    table = {col: np.concatenate([table[col][keep], new[col]]) for col in EVENT_COLUMNS}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez(path, **table)
+    manifest.update({os.path.basename(p): mtimes[os.path.basename(p)] for p in changed})
+    save_manifest(manifest, manifest_path)
+    return table, len(changed)
+
+
+def team_match_features(events, fixtures):
+    """
+    Agrège la table d'événements en features par (match, équipe).
+    :param fixtures: table de fixture_history (équipes domicile/extérieur, date)
+    """
+    ev = pd.DataFrame(events)
+    meta = fixtures[["fixture_id", "date", "home_id", "away_id"]]
+    ev = ev.merge(meta, on="fixture_id", how="inner")
+    if ev.empty:
+        return pd.DataFrame(columns=["fixture_id", "team_id", "date"] + FORM_FEATURES)
+
+    opponent = np.where(ev["team_id"] == ev["home_id"], ev["away_id"], ev["home_id"])
+    minute = ev["minute"].to_numpy(dtype=float)
+    is_goal = (ev["type"] == GOAL) & (ev["detail"] != MISSED_PENALTY)
+    own_goal = is_goal & (ev["detail"] == OWN_GOAL)
+    is_red = (ev["type"] == CARD) & ev["detail"].isin([RED, SECOND_YELLOW])
+    is_pen_attempt = (ev["type"] == GOAL) & ev["detail"].isin([PENALTY, MISSED_PENALTY])
+    is_sub = ev["type"] == SUBST
+
+    # Un but contre son camp est crédité à l'adversaire
+    scorer = np.where(own_goal, opponent, ev["team_id"])
+    conceder = np.where(own_goal, ev["team_id"], opponent)
+    red_short = np.clip(MATCH_MINUTES - minute, 0, None) * is_red
+
+    rows_for = pd.DataFrame({
+        "fixture_id": ev["fixture_id"],
+        "team_id": scorer,
+        "goals_for": is_goal.astype(float),
+        "np_goals": (is_goal & (ev["detail"] == NORMAL_GOAL)).astype(float),
+        "goal_minute_sum": minute * is_goal,
+        "late_goals_for": (is_goal & (minute >= LATE_MINUTE)).astype(float),
+    })
+    rows_against = pd.DataFrame({
+        "fixture_id": ev["fixture_id"],
+        "team_id": conceder,
+        "goals_against": is_goal.astype(float),
+        "late_goals_against": (is_goal & (minute >= LATE_MINUTE)).astype(float),
+    })
+    rows_own = pd.DataFrame({
+        "fixture_id": ev["fixture_id"],
+        "team_id": ev["team_id"],
+        "pen_attempts": is_pen_attempt.astype(float),
+        "red_minutes_short": red_short,
+        "first_sub_minute": np.where(is_sub, minute, np.inf),
+    })
+    rows_opp = pd.DataFrame({
+        "fixture_id": ev["fixture_id"],
+        "team_id": opponent,
+        "opp_red_minutes_short": red_short,
+    })
+
+    key = ["fixture_id", "team_id"]
+    # Chaque match apparaît pour ses deux équipes, même sans événement
+    base = pd.concat([
+        meta.rename(columns={"home_id": "team_id"})[["fixture_id", "team_id", "date"]],
+        meta.rename(columns={"away_id": "team_id"})[["fixture_id", "team_id", "date"]],
+    ])
+    base = base[base["fixture_id"].isin(ev["fixture_id"].unique())]
+
+    out = (
+        base
+        .merge(rows_for.groupby(key).sum().reset_index(), on=key, how="left")
+        .merge(rows_against.groupby(key).sum().reset_index(), on=key, how="left")
+        .merge(rows_own.groupby(key).agg({
+            "pen_attempts": "sum", "red_minutes_short": "sum", "first_sub_minute": "min",
+        }).reset_index(), on=key, how="left")
+        .merge(rows_opp.groupby(key).sum().reset_index(), on=key, how="left")
+    )
+    out = out.fillna({c: 0.0 for c in out.columns if c not in ("date", "first_sub_minute")})
+    out["first_sub_minute"] = out["first_sub_minute"].replace(np.inf, np.nan).fillna(MATCH_MINUTES)
+
+    goals = out["goals_for"].to_numpy()
+    out["mean_goal_minute"] = np.divide(
+        out["goal_minute_sum"].to_numpy(), goals,
+        out=np.full(len(out), float(MATCH_MINUTES)), where=goals > 0,
+    )
+    out["xg_proxy"] = out["np_goals"] + PENALTY_XG * out["pen_attempts"]
+    return out[["fixture_id", "team_id", "date"] + FORM_FEATURES].sort_values("date").reset_index(drop=True)
+
+
+def rolling_form(team_matches, window=FORM_WINDOW):
+    """
+    Moyenne glissante des features d'événements sur les ``window`` derniers
+    matchs de chaque équipe. Renvoie la forme la plus récente par équipe.
+    """
+    if team_matches.empty:
+        return pd.DataFrame({"team_id": pd.Series(dtype=np.int64),
+                             **{col: pd.Series(dtype=np.float64) for col in FORM_FEATURES}})
+    ordered = team_matches.sort_values("date")
+    form = (
+        ordered.groupby("team_id")[FORM_FEATURES]
+        .rolling(window, min_periods=1).mean()
+        .reset_index(level=0)
+    )
+    return form.groupby("team_id").tail(1).reset_index(drop=True)
+
+
+def build_event_features(matches_df, form):
+    """
+    Joint la forme des deux équipes sur les matchs du jour. Une équipe sans
+    historique reçoit la forme moyenne de toutes les équipes connues (0 si
+    aucun événement n'est indexé).
+    """
+    features = pd.DataFrame({"fixture.id": matches_df["fixture.id"].to_numpy()})
+    neutral = form[FORM_FEATURES].mean().fillna(0) if not form.empty else pd.Series(0.0, index=FORM_FEATURES)
+    for side in ("home", "away"):
+        side_form = matches_df[[f"teams.{side}.id"]].rename(columns={f"teams.{side}.id": "team_id"})
+        side_form = side_form.merge(form, on="team_id", how="left").fillna(neutral)
+        for col in FORM_FEATURES:
+            features[f"{side}_form_{col}"] = side_form[col].to_numpy(dtype=np.float64).round(3)
+    return features
+
+
+def benchmark(n_fixtures=380, events_per_match=16, seed=0):
+    """
+    Mesure le débit du parsing et de l'agrégation sur une saison simulée
+    (380 matchs, soit un championnat à 20 équipes).
+    """
+    rng = np.random.default_rng(seed)
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        teams = np.arange(1, 21)
+        fixture_rows = []
+        for fid in range(1, n_fixtures + 1):
+            home, away = rng.choice(teams, size=2, replace=False)
+            fixture_rows.append((fid, pd.Timestamp("2024-08-01", tz="UTC") + pd.Timedelta(days=fid // 10),
+                                 home, away))
+            events = []
+            for _ in range(events_per_match):
+                kind = rng.choice(["Goal", "Card", "subst"], p=[0.2, 0.3, 0.5])
+                detail = {"Goal": "Normal Goal", "Card": "Yellow Card", "subst": "Substitution 1"}[kind]
+                events.append({
+                    "time": {"elapsed": int(rng.integers(1, 91)), "extra": None},
+                    "team": {"id": int(rng.choice([home, away]))},
+                    "type": kind, "detail": detail,
+                })
+            with open(os.path.join(tmp_dir, f"events_{fid}.json"), "w") as f:
+                json.dump({"parameters": {"fixture": str(fid)}, "response": events}, f)
+        fixtures = pd.DataFrame(fixture_rows, columns=["fixture_id", "date", "home_id", "away_id"])
+
+        paths = sorted(glob(os.path.join(tmp_dir, "events_*.json")))
+        start = time.perf_counter()
+        events = parse_event_files(paths)
+        parse_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        form = rolling_form(team_match_features(events, fixtures))
+        feature_time = time.perf_counter() - start
+
+        n_events = len(events["fixture_id"])
+        print(f"📊 Benchmark événements ({n_fixtures} matchs, {n_events} événements)")
+        print(f"   - Parsing : {parse_time:.3f}s ({n_events / parse_time:,.0f} événements/s)")
+        print(f"   - Features + forme : {feature_time:.3f}s ({len(form)} équipes)")
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def main():
+    """Indexe les événements nouveaux ou modifiés puis exporte la forme des équipes du jour"""
+    parser = argparse.ArgumentParser(description="Features dérivées des événements de match")
+    parser.add_argument("--benchmark", action="store_true", help="mesure le débit sur une saison simulée")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+        return
+
+    try:
+        events, n_read = update_events_table()
+        print(f"✅ {n_read} fichier(s) d'événements nouveau(x) ou modifié(s) lu(s) "
+              f"({len(events['fixture_id'])} événements indexés)")
+
+        # Seuls les matchs terminés alimentent la forme
+        fixtures = load_fixture_table(finished_only=True)
+        if fixtures.empty:
+            print("⚠️ Aucun match terminé dans les fixtures, features d'événements non générées")
+            return
+
+        team_matches = team_match_features(events, fixtures)
+        team_matches.to_csv(TEAM_MATCH_FILE, index=False)
+        form = rolling_form(team_matches)
+
+        if not os.path.exists(MATCHES_FILE):
+            print(f"⚠️ {MATCHES_FILE} introuvable, features d'événements non générées")
+            return
+        matches_df = pd.read_csv(MATCHES_FILE)
+        if matches_df.empty or "fixture.id" not in matches_df.columns:
+            print("⚠️ Matchs du jour absents ou incomplets, features ignorées")
+            return
+
+        features_df = build_event_features(matches_df, form)
+        path = save_features(features_df, "events")
+        print(f"✅ Forme issue des événements calculée pour {len(features_df)} matchs : {path}")
+
+    except Exception as e:
+        print(f"❌ Erreur dans match_events.py : {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+# preprocessing/player_strength.py
+# -----------------------------------------------------------------------------
+# Agrège en continu les statistiques joueurs (data/raw/player_stats) et calcule
+# une "force de composition projetée" par équipe pour les matchs du jour.
+# Seuls les fichiers apparus depuis la dernière exécution sont relus ; l'état
+# par joueur (note et minutes moyennes glissantes) est stocké dans des tableaux
+# NumPy compacts (data/processed/player_state.npz). Le manifeste garde la date
+# de modification de chaque fichier : un fichier re-téléchargé (souvent
+# partiel le jour du match) fait rejouer tous les fichiers dans l'ordre, les
+# moyennes glissantes ne permettant pas de retirer une contribution isolée.
+# Chaque match rejoué ajoute la force de ses deux équipes après le match à
+# l'historique (data/processed/lineup_strength_history.csv), et la part des
+# minutes de chacun de leurs joueurs (data/processed/minutes_share_history.csv) :
+# la table d'entraînement y lit la force de chaque équipe et le poids de
+# chaque absent avant chacun de leurs matchs.
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+from glob import glob
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from preprocessing.feature_store import save_features
+
+PLAYER_STATS_DIR = "data/raw/player_stats"
+MATCHES_FILE = "data/processed/base_matches.csv"
+STATE_PATH = "data/processed/player_state.npz"
+MANIFEST_PATH = "data/processed/player_state_manifest.json"
+LINEUP_HISTORY_PATH = "data/processed/lineup_strength_history.csv"
+LINEUP_HISTORY_COLUMNS = ["fixture_id", "date", "team_id", "lineup_strength"]
+SHARE_HISTORY_PATH = "data/processed/minutes_share_history.csv"
+SHARE_HISTORY_COLUMNS = ["fixture_id", "date", "team_id", "player_id", "minutes_share"]
+
+HALF_LIFE_MATCHES = 5          # demi-vie (en matchs) des moyennes glissantes
+ALPHA = 1 - 0.5 ** (1 / HALF_LIFE_MATCHES)
+LINEUP_SIZE = 11
+DEFAULT_RATING = 6.5           # note neutre pour une équipe sans historique
+
+
+class PlayerState:
+    """État glissant par joueur stocké dans des tableaux contigus."""
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.player_ids = np.zeros(capacity, dtype=np.int64)
+        self.team_ids = np.zeros(capacity, dtype=np.int64)
+        self.rating = np.zeros(capacity, dtype=np.float32)
+        self.minutes = np.zeros(capacity, dtype=np.float32)
+        self.appearances = np.zeros(capacity, dtype=np.int32)
+        self.index = {}
+
+    def clear(self):
+        """Vide l'état (avant de rejouer tous les fichiers)"""
+        self.__init__(len(self.player_ids))
+
+    def _grow(self, needed):
+        capacity = len(self.player_ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("player_ids", "team_ids", "rating", "minutes", "appearances"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def rows_for(self, player_ids):
+        """Retourne les lignes des joueurs, en créant celles des nouveaux."""
+        rows = np.empty(len(player_ids), dtype=np.int64)
+        for i, pid in enumerate(player_ids):
+            row = self.index.get(pid)
+            if row is None:
+                self._grow(self.size + 1)
+                row = self.size
+                self.index[pid] = row
+                self.player_ids[row] = pid
+                self.size += 1
+            rows[i] = row
+        return rows
+
+    def update_match(self, player_ids, team_ids, minutes, ratings):
+        """
+        Intègre un match : moyennes exponentielles des minutes (tous les joueurs
+        de la feuille de match) et des notes (joueurs ayant joué et noté).
+        """
+        rows = self.rows_for(player_ids.tolist())
+        first = self.appearances[rows] == 0
+
+        self.team_ids[rows] = team_ids
+        self.minutes[rows] = np.where(
+            first, minutes, (1 - ALPHA) * self.minutes[rows] + ALPHA * minutes
+        )
+
+        rated = ~np.isnan(ratings)
+        r_rows = rows[rated]
+        r_first = self.rating[r_rows] == 0
+        self.rating[r_rows] = np.where(
+            r_first, ratings[rated],
+            (1 - ALPHA) * self.rating[r_rows] + ALPHA * ratings[rated],
+        )
+        self.appearances[rows] += 1
+
+    def save(self, path=STATE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        n = self.size
+        np.savez(
+            path,
+            player_ids=self.player_ids[:n],
+            team_ids=self.team_ids[:n],
+            rating=self.rating[:n],
+            minutes=self.minutes[:n],
+            appearances=self.appearances[:n],
+        )
+
+    @classmethod
+    def load(cls, path=STATE_PATH):
+        if not os.path.exists(path):
+            return cls()
+        data = np.load(path)
+        n = len(data["player_ids"])
+        state = cls(capacity=max(1024, 2 * n))
+        state.size = n
+        for name in ("player_ids", "team_ids", "rating", "minutes", "appearances"):
+            getattr(state, name)[:n] = data[name]
+        state.index = {int(pid): i for i, pid in enumerate(state.player_ids[:n])}
+        return state
+
+
+def parse_player_stats(path):
+    """
+    Lit un fichier /fixtures/players et renvoie (date, player_ids, team_ids,
+    minutes, ratings) sous forme de tableaux NumPy.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    player_ids, team_ids, minutes, ratings = [], [], [], []
+    match_date = None
+    for team_block in data.get("response", []):
+        team = team_block.get("team", {})
+        team_id = team.get("id")
+        match_date = match_date or team.get("update")
+        if team_id is None:
+            continue
+        for entry in team_block.get("players", []):
+            pid = entry.get("player", {}).get("id")
+            stats = (entry.get("statistics") or [{}])[0]
+            games = stats.get("games", {}) or {}
+            if pid is None:
+                continue
+            rating = games.get("rating")
+            player_ids.append(pid)
+            team_ids.append(team_id)
+            minutes.append(games.get("minutes") or 0)
+            ratings.append(float(rating) if rating not in (None, "", "-") else np.nan)
+
+    if match_date is None:
+        match_date = datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+
+    return (
+        match_date,
+        np.asarray(player_ids, dtype=np.int64),
+        np.asarray(team_ids, dtype=np.int64),
+        np.asarray(minutes, dtype=np.float32),
+        np.asarray(ratings, dtype=np.float32),
+    )
+
+
+def _fixture_id_from_name(path):
+    """Identifiant du match d'après le nom ``player_stats_<fixture_id>.json``."""
+    stem = os.path.basename(path).replace("player_stats_", "").replace(".json", "")
+    return int(stem) if stem.isdigit() else None
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def load_history(path, columns):
+    if not os.path.exists(path):
+        return []
+    return list(pd.read_csv(path)[columns].itertuples(index=False, name=None))
+
+
+def save_history(rows, path, columns):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.DataFrame(rows, columns=columns).to_csv(path, index=False)
+
+
+def update_state(state, manifest, stats_dir=PLAYER_STATS_DIR, history=None, share_history=None):
+    """
+    Intègre dans l'état les fichiers jamais traités, dans l'ordre chronologique.
+    Si un fichier déjà intégré a été modifié (ou si le manifeste ne connaît pas
+    sa date de modification), l'état est reconstruit à partir de tous les
+    fichiers.
+    :param manifest: dictionnaire fichier -> {"date", "mtime"} (mis à jour)
+    :param history: lignes (fixture_id, date, team_id, force après le match)
+        de l'historique des forces (mis à jour, vidé si l'état est reconstruit)
+    :param share_history: lignes (fixture_id, date, team_id, player_id, part
+        des minutes après le match) des joueurs des deux équipes (idem)
+    :return: nombre de fichiers intégrés
+    """
+    files = sorted(glob(os.path.join(stats_dir, "player_stats_*.json")))
+    mtimes = {os.path.basename(p): os.path.getmtime(p) for p in files}
+    changed = [name for name, entry in manifest.items()
+               if name in mtimes and (not isinstance(entry, dict) or entry.get("mtime") != mtimes[name])]
+    if changed:
+        print(f"♻️ {len(changed)} fichier(s) de stats joueurs modifié(s), état reconstruit")
+        state.clear()
+        manifest.clear()
+        for rows in (history, share_history):
+            if rows is not None:
+                rows.clear()
+    new_files = [p for p in files if os.path.basename(p) not in manifest]
+    if not new_files:
+        return 0
+
+    parsed = []
+    for path in new_files:
+        try:
+            parsed.append((path, parse_player_stats(path)))
+        except Exception as e:
+            print(f"⚠️ Erreur lecture {path}: {e}")
+    parsed.sort(key=lambda item: item[1][0])
+
+    for path, (match_date, pids, tids, minutes, ratings) in parsed:
+        if len(pids):
+            state.update_match(pids, tids, minutes, ratings)
+            if history is not None:
+                teams = np.unique(tids)
+                strength = team_lineup_strength(state, teams)
+                history.extend((_fixture_id_from_name(path), match_date, int(team), float(value))
+                               for team, value in zip(teams, strength))
+            if share_history is not None:
+                players, teams, shares = team_minutes_shares(state, np.unique(tids))
+                share_history.extend((_fixture_id_from_name(path), match_date, int(team), int(pid),
+                                      round(float(share), 4))
+                                     for pid, team, share in zip(players, teams, shares))
+        name = os.path.basename(path)
+        manifest[name] = {"date": match_date, "mtime": mtimes[name]}
+
+    return len(parsed)
+
+
+def team_lineup_strength(state, team_ids):
+    """
+    Force projetée des compositions : moyenne des notes des 11 joueurs les plus
+    utilisés de chaque équipe, pondérée par leurs minutes moyennes.
+    :return: tableau aligné sur ``team_ids`` (NaN si équipe inconnue)
+    """
+    team_ids = np.asarray(team_ids, dtype=np.int64)
+    n = state.size
+    result = np.full(len(team_ids), np.nan)
+    if n == 0 or len(team_ids) == 0:
+        return result
+
+    teams = state.team_ids[:n]
+    minutes = state.minutes[:n].astype(np.float64)
+    rating = state.rating[:n].astype(np.float64)
+    valid = rating > 0
+
+    # Tri par équipe puis minutes décroissantes, rang du joueur dans son équipe
+    order = np.lexsort((-minutes, teams))
+    sorted_teams = teams[order]
+    group_start = np.r_[0, np.flatnonzero(np.diff(sorted_teams)) + 1]
+    group_len = np.diff(np.r_[group_start, n])
+    rank = np.arange(n) - np.repeat(group_start, group_len)
+
+    keep = order[(rank < LINEUP_SIZE) & valid[order]]
+    uniq, codes = np.unique(teams[keep], return_inverse=True)
+    weighted = np.bincount(codes, weights=rating[keep] * minutes[keep], minlength=len(uniq))
+    total = np.bincount(codes, weights=minutes[keep], minlength=len(uniq))
+    strength = np.divide(weighted, total, out=np.full(len(uniq), np.nan), where=total > 0)
+    if len(uniq) == 0:
+        return result
+
+    pos = np.clip(np.searchsorted(uniq, team_ids), 0, len(uniq) - 1)
+    found = uniq[pos] == team_ids
+    result[found] = strength[pos[found]]
+    return result
+
+
+def player_minutes_share(state, player_ids):
+    """
+    Part des minutes de son équipe jouée par chaque joueur (moyennes glissantes).
+    :return: tableau aligné sur ``player_ids`` (0 si joueur inconnu)
+    """
+    player_ids = np.asarray(player_ids, dtype=np.int64)
+    shares = np.zeros(len(player_ids))
+    n = state.size
+    if n == 0 or len(player_ids) == 0:
+        return shares
+
+    teams = state.team_ids[:n]
+    minutes = state.minutes[:n].astype(np.float64)
+    uniq, codes = np.unique(teams, return_inverse=True)
+    team_total = np.bincount(codes, weights=minutes, minlength=len(uniq))
+    player_share = np.divide(minutes, team_total[codes], out=np.zeros(n), where=team_total[codes] > 0)
+
+    rows = np.array([state.index.get(int(pid), -1) for pid in player_ids], dtype=np.int64)
+    known = rows >= 0
+    shares[known] = player_share[rows[known]]
+    return shares
+
+
+def lineup_columns(home, away):
+    """Features de composition à partir des forces domicile / extérieur (NaN : équipe inconnue)"""
+    home = np.where(np.isnan(home), DEFAULT_RATING, home)
+    away = np.where(np.isnan(away), DEFAULT_RATING, away)
+    return {
+        "home_lineup_strength": home.round(3),
+        "away_lineup_strength": away.round(3),
+        "lineup_strength_diff": (home - away).round(3),
+    }
+
+
+def team_minutes_shares(state, team_ids):
+    """
+    Part des minutes de son équipe de chaque joueur des équipes ``team_ids``.
+    :return: (player_ids, team_ids, parts)
+    """
+    n = state.size
+    teams = state.team_ids[:n]
+    rows = np.flatnonzero(np.isin(teams, np.asarray(team_ids, dtype=np.int64)))
+    minutes = state.minutes[rows].astype(np.float64)
+    _, codes = np.unique(teams[rows], return_inverse=True)
+    team_total = np.bincount(codes, weights=minutes)[codes] if len(rows) else np.zeros(0)
+    shares = np.divide(minutes, team_total, out=np.zeros(len(rows)), where=team_total > 0)
+    return state.player_ids[rows], teams[rows], shares
+
+
+def build_lineup_features(matches_df, state):
+    """Construit les features de composition projetée pour chaque match."""
+    home = team_lineup_strength(state, matches_df["teams.home.id"].to_numpy())
+    away = team_lineup_strength(state, matches_df["teams.away.id"].to_numpy())
+    return pd.DataFrame({"fixture.id": matches_df["fixture.id"].to_numpy(), **lineup_columns(home, away)})
+
+
+def history_dates(history, fixtures):
+    """
+    Date de chaque ligne d'historique : coup d'envoi du match s'il est connu,
+    sinon date de mise à jour du fichier de stats (UTC).
+    """
+    recorded = pd.to_datetime(history["date"], utc=True, errors="coerce")
+    kickoff = history["fixture_id"].map(fixtures.drop_duplicates("fixture_id").set_index("fixture_id")["date"])
+    return pd.to_datetime(kickoff, utc=True).fillna(recorded)
+
+
+def lineup_strength_before(history, fixtures, side):
+    """
+    Force de l'équipe ``side`` (home / away) de chaque match de ``fixtures``
+    après son dernier match antérieur au coup d'envoi (NaN si aucun).
+    """
+    left = pd.DataFrame({
+        "row": np.arange(len(fixtures)),
+        "date": pd.to_datetime(fixtures["date"], utc=True).reset_index(drop=True),
+        "team_id": fixtures[f"{side}_id"].to_numpy(dtype=np.int64),
+    }).dropna(subset=["date"]).sort_values("date")
+    result = np.full(len(fixtures), np.nan)
+    right = history.dropna(subset=["date"]).sort_values("date")
+    if left.empty or right.empty:
+        return result
+    merged = pd.merge_asof(left, right[["date", "team_id", "lineup_strength"]], on="date",
+                           by="team_id", allow_exact_matches=False)
+    result[merged["row"].to_numpy()] = merged["lineup_strength"].to_numpy(dtype=float)
+    return result
+
+
+def minutes_share_before(share_history, player_ids, dates):
+    """
+    Part des minutes de chaque joueur après le dernier match de son équipe
+    antérieur à ``dates`` (0 si joueur inconnu à cette date).
+    :param share_history: historique des parts daté (voir history_dates)
+    """
+    left = pd.DataFrame({
+        "row": np.arange(len(player_ids)),
+        "date": pd.to_datetime(pd.Series(np.asarray(dates)), utc=True, errors="coerce"),
+        "player_id": np.asarray(player_ids, dtype=np.int64),
+    }).dropna(subset=["date"]).sort_values("date")
+    result = np.zeros(len(player_ids))
+    right = share_history.dropna(subset=["date"]).sort_values("date")
+    if left.empty or right.empty:
+        return result
+    merged = pd.merge_asof(left, right[["date", "player_id", "minutes_share"]], on="date",
+                           by="player_id", allow_exact_matches=False)
+    result[merged["row"].to_numpy()] = merged["minutes_share"].fillna(0).to_numpy(dtype=float)
+    return result
+
+
+def load_share_history(fixtures, path=SHARE_HISTORY_PATH):
+    """Historique des parts de minutes, daté par coup d'envoi (voir history_dates)"""
+    share_history = pd.DataFrame(load_history(path, SHARE_HISTORY_COLUMNS), columns=SHARE_HISTORY_COLUMNS)
+    share_history["player_id"] = share_history["player_id"].astype(np.int64)
+    share_history["date"] = history_dates(share_history, fixtures)
+    return share_history
+
+
+def historical_lineup_features(fixtures, path=LINEUP_HISTORY_PATH):
+    """
+    Features de composition des matchs de l'historique, telles qu'elles
+    étaient avant chaque coup d'envoi.
+    :param fixtures: table de fixture_history (fixture_id, date, home_id, away_id)
+    """
+    history = pd.DataFrame(load_history(path, LINEUP_HISTORY_COLUMNS), columns=LINEUP_HISTORY_COLUMNS)
+    history["team_id"] = history["team_id"].astype(np.int64)
+    history["date"] = history_dates(history, fixtures)
+    home = lineup_strength_before(history, fixtures, "home")
+    away = lineup_strength_before(history, fixtures, "away")
+    return pd.DataFrame({"fixture_id": fixtures["fixture_id"].to_numpy(), **lineup_columns(home, away)})
+
+
+def main():
+    """Met à jour l'état joueurs puis exporte les features du jour"""
+    try:
+        state = PlayerState.load()
+        manifest = load_manifest()
+        history = load_history(LINEUP_HISTORY_PATH, LINEUP_HISTORY_COLUMNS)
+        share_history = load_history(SHARE_HISTORY_PATH, SHARE_HISTORY_COLUMNS)
+        if manifest and not (os.path.exists(LINEUP_HISTORY_PATH) and os.path.exists(SHARE_HISTORY_PATH)):
+            # État antérieur aux historiques : rejouer tous les fichiers
+            print("♻️ Historique des forces ou des parts de minutes absent, état reconstruit")
+            state.clear()
+            manifest.clear()
+            history.clear()
+            share_history.clear()
+
+        n_new = update_state(state, manifest, history=history, share_history=share_history)
+        state.save()
+        save_manifest(manifest)
+        save_history(history, LINEUP_HISTORY_PATH, LINEUP_HISTORY_COLUMNS)
+        save_history(share_history, SHARE_HISTORY_PATH, SHARE_HISTORY_COLUMNS)
+        print(f"✅ {n_new} nouveau(x) fichier(s) de stats joueurs intégré(s) "
+              f"({state.size} joueurs suivis)")
+
+        if not os.path.exists(MATCHES_FILE):
+            print(f"⚠️ {MATCHES_FILE} introuvable, features de composition non générées")
+            return
+
+        matches_df = pd.read_csv(MATCHES_FILE)
+        required = ["fixture.id", "teams.home.id", "teams.away.id"]
+        if matches_df.empty or not all(c in matches_df.columns for c in required):
+            print("⚠️ Matchs du jour absents ou incomplets, features ignorées")
+            return
+
+        features_df = build_lineup_features(matches_df, state)
+        path = save_features(features_df, "lineup_strength")
+        print(f"✅ Force de composition calculée pour {len(features_df)} matchs : {path}")
+
+    except Exception as e:
+        print(f"❌ Erreur dans player_strength.py : {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
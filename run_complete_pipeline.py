@@ -10,6 +10,7 @@ import sys
 import subprocess
 import time
 from datetime import datetime
+from modeling.registry import model_step
 
 def run_command(command, description, required=True):
     """
@@ -91,10 +92,13 @@ def main():
         # Étape 2: Preprocessing  
         ("python generate_rankings_from_standings.py", "Génération des rankings", True),
         ("python ingestion/merge_dataset.py", "Fusion des datasets", True),
+        ("python preprocessing/player_strength.py", "Force des compositions", False),
+        ("python preprocessing/absence_impact.py", "Impact des absences", False),
+        ("python preprocessing/match_events.py", "Features événements", False),
         ("python preprocessing/create_lstm_sequences_fixed.py", "Création séquences LSTM", True),
         
         # Étape 3: Modélisation
-        ("python modeling/lstm_model_fixed.py", "Entraînement modèle LSTM", True),
+        (*model_step(), True),
         
         # Étape 4: Analyse
         ("python analyse_bets_fixed.py", "Analyse des value bets", True),
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# utils/arbitrage.py
+# -----------------------------------------------------------------------------
+# Détection des arbitrages (surebets) et des middles entre bookmakers
+# Le scanner garde pour chaque match un tableau (bookmakers × sélections) des
+# dernières cotes et la meilleure cote de chaque sélection. Une mise à jour
+# de cote ne recalcule que la meilleure cote de la cellule touchée (O(1), ou
+# O(bookmakers) si le meilleur prix baisse), puis, une fois par match touché,
+# les marchés complets et les paires de middle qui contiennent les sélections
+# modifiées :
+#   arbitrage : marché complet (1X2, BTTS, over / under ou handicap d'une
+#               même ligne) dont la somme des 1 / meilleure cote est < 1 ;
+#               mises réparties pour un gain identique quelle que soit l'issue
+#   middle    : over L1 / under L2 (L1 < L2) ou domicile +h / extérieur +a
+#               (h + a > 0) sur demi-lignes, dont la perte au pire reste sous
+#               MAX_MIDDLE_LOSS et qui paient deux fois si le score tombe
+#               entre les lignes
+# Les lignes au quart (remboursement partiel) sont ignorées.
+#
+# Usage : python utils/arbitrage.py                 (cotes de data/raw/odds_*.json)
+#         python utils/arbitrage.py --benchmark 100000
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.markets import parse_selection, complete_markets
+from utils.odds_book import OddsBook
+
+MAX_MIDDLE_LOSS = 0.02         # perte maximale acceptée si le middle ne tombe pas
+ARBITRAGE_COLUMNS = ["fixture_id", "kind", "market", "outcomes", "odds", "bookmakers", "stakes",
+                     "profit", "middle_profit"]
+
+
+def stake_split(odds):
+    """
+    Répartition d'une mise totale de 1 pour un retour identique sur chaque
+    issue : mise_i ∝ 1 / cote_i.
+    :return: (fractions de mise, retour garanti par unité misée - 1)
+    """
+    inverse = 1.0 / np.asarray(odds, dtype=np.float64)
+    booksum = inverse.sum()
+    return inverse / booksum, 1.0 / booksum - 1
+
+
+def _settles_fully(line):
+    """Ligne entière ou demi-ligne : gain, perte ou remboursement complet"""
+    return line is None or float(line * 2).is_integer()
+
+
+def _half_line(line):
+    """Demi-ligne (x.5) : jamais de remboursement"""
+    return line is not None and not float(line).is_integer() and float(line * 2).is_integer()
+
+
+class _FixtureState:
+    """Cotes (bookmakers × sélections) d'un match et meilleure cote par sélection"""
+
+    def __init__(self, n_books, n_selections):
+        self.prices = np.full((n_books, n_selections), np.nan)
+        self.best = np.full(n_selections, np.nan)
+        self.best_book = np.full(n_selections, -1, dtype=np.int64)
+
+    def grow(self, n_books, n_selections):
+        extra_b = n_books - self.prices.shape[0]
+        extra_s = n_selections - self.prices.shape[1]
+        if extra_b > 0 or extra_s > 0:
+            self.prices = np.pad(self.prices, ((0, max(extra_b, 0)), (0, max(extra_s, 0))), constant_values=np.nan)
+        if extra_s > 0:
+            self.best = np.pad(self.best, (0, extra_s), constant_values=np.nan)
+            self.best_book = np.pad(self.best_book, (0, extra_s), constant_values=-1)
+
+    def set_price(self, b, s, odd):
+        """Nouvelle cote ; met à jour la meilleure cote de la sélection ``s``"""
+        self.prices[b, s] = odd
+        if odd > 1.0 and not odd < self.best[s]:       # NaN compris
+            self.best[s], self.best_book[s] = odd, b
+        elif self.best_book[s] == b:
+            # Le meilleur prix a baissé ou disparu : recherche sur la colonne
+            column = self.prices[:, s]
+            valid = np.isfinite(column) & (column > 1.0)
+            if valid.any():
+                b_best = int(np.where(valid, column, -np.inf).argmax())
+                self.best[s], self.best_book[s] = column[b_best], b_best
+            else:
+                self.best[s], self.best_book[s] = np.nan, -1
+
+
+class ArbitrageScanner:
+    """
+    Scanner incrémental d'arbitrages et de middles sur un flux de cotes
+    ``(fixture_id, bookmaker, marché, issue, cote)``.
+    """
+
+    def __init__(self, max_middle_loss=MAX_MIDDLE_LOSS):
+        self.max_middle_loss = max_middle_loss
+        self.bookmakers, self.bookmaker_index = [], {}
+        self.selections, self.selection_index = [], {}
+        self.fixtures = {}
+        self.opportunities = {}        # (fixture_id, kind, colonnes) -> opportunité
+        self._rebuild_markets()
+
+    @classmethod
+    def from_book(cls, book, **kwargs):
+        """Scanner initialisé avec toutes les cotes d'un OddsBook"""
+        scanner = cls(**kwargs)
+        f, b, s = np.nonzero(np.isfinite(book.prices))
+        scanner.update(zip(book.fixture_ids[f], np.asarray(book.bookmakers, dtype=object)[b],
+                           (book.selections[k][0] for k in s), (book.selections[k][1] for k in s),
+                           book.prices[f, b, s]))
+        return scanner
+
+    # --- Index des sélections, marchés complets et paires de middle ----------
+
+    def _rebuild_markets(self):
+        """Marchés complets et paires de middle, par colonne de sélection"""
+        parsed = [parse_selection(m, o) for m, o in self.selections]
+        valid = [k for k, sel in enumerate(parsed) if sel is not None and _settles_fully(sel[2])]
+        self.groups = [tuple(valid[i] for i in group) for group in complete_markets([parsed[k] for k in valid])]
+
+        by_side = {}
+        for k in valid:
+            if not _half_line(parsed[k][2]):
+                continue
+            by_side.setdefault(parsed[k][:2], []).append(k)
+        pairs = []
+        for low in by_side.get(("total", "over"), []):
+            pairs += [(low, high) for high in by_side.get(("total", "under"), [])
+                      if parsed[high][2] > parsed[low][2]]
+        for home in by_side.get(("asian_handicap", "home"), []):
+            pairs += [(home, away) for away in by_side.get(("asian_handicap", "away"), [])
+                      if parsed[home][2] + parsed[away][2] > 0]
+        self.middles = pairs
+
+        self.groups_of = [[] for _ in self.selections]
+        for g, group in enumerate(self.groups):
+            for k in group:
+                self.groups_of[k].append(g)
+        self.middles_of = [[] for _ in self.selections]
+        for m, pair in enumerate(self.middles):
+            for k in pair:
+                self.middles_of[k].append(m)
+
+    def _column(self, index, keys, key):
+        position = index.get(key)
+        if position is None:
+            position = index[key] = len(keys)
+            keys.append(key)
+        return position
+
+    # --- Mises à jour ------------------------------------------------------
+
+    def update(self, records):
+        """
+        Applique des mises à jour de cotes et réévalue les seuls matchs touchés.
+        :return: opportunités (arbitrages et middles) des matchs touchés
+        """
+        touched = {}
+        n_selections = len(self.selections)
+        for fixture_id, bookmaker, market, outcome, odd in records:
+            b = self._column(self.bookmaker_index, self.bookmakers, bookmaker)
+            s = self._column(self.selection_index, self.selections, (market, str(outcome)))
+            state = self.fixtures.get(fixture_id)
+            if state is None:
+                state = self.fixtures[fixture_id] = _FixtureState(len(self.bookmakers), len(self.selections))
+            elif b >= state.prices.shape[0] or s >= state.prices.shape[1]:
+                state.grow(len(self.bookmakers), len(self.selections))
+            state.set_price(b, s, float(odd) if odd is not None else np.nan)
+            touched.setdefault(fixture_id, set()).add(s)
+
+        if len(self.selections) != n_selections:
+            self._rebuild_markets()
+        found = []
+        for fixture_id, columns in touched.items():
+            found += self._scan(fixture_id, columns)
+        return found
+
+    def _scan(self, fixture_id, columns):
+        """Réévalue les marchés et middles d'un match contenant ``columns``"""
+        state = self.fixtures[fixture_id]
+        groups = {g for s in columns for g in self.groups_of[s]}
+        middles = {m for s in columns for m in self.middles_of[s]}
+        found = []
+        for kind, candidates, combos in (("arbitrage", groups, self.groups), ("middle", middles, self.middles)):
+            for c in candidates:
+                cols = combos[c]
+                key = (fixture_id, kind, cols)
+                opportunity = self._evaluate(fixture_id, kind, cols, state) if max(cols) < len(state.best) else None
+                if opportunity is None:
+                    self.opportunities.pop(key, None)
+                else:
+                    self.opportunities[key] = opportunity
+                    found.append(opportunity)
+        return found
+
+    def _evaluate(self, fixture_id, kind, cols, state):
+        odds = state.best[list(cols)]
+        if not np.isfinite(odds).all():
+            return None
+        stakes, profit = stake_split(odds)
+        if kind == "arbitrage" and profit <= 0:
+            return None
+        if kind == "middle" and profit < -self.max_middle_loss:
+            return None
+        return {
+            "fixture_id": fixture_id,
+            "kind": kind,
+            "market": self.selections[cols[0]][0],
+            "outcomes": " / ".join(self.selections[k][1] for k in cols),
+            "odds": " / ".join(f"{o:.2f}" for o in odds),
+            "bookmakers": " / ".join(self.bookmakers[b] for b in state.best_book[list(cols)]),
+            "stakes": " / ".join(f"{x:.1%}" for x in stakes),
+            "profit": round(float(profit), 4),
+            "middle_profit": round(float(2 * (profit + 1) - 1), 4) if kind == "middle" else np.nan,
+        }
+
+    def table(self):
+        """Opportunités en cours, triées par profit garanti décroissant"""
+        return (pd.DataFrame(list(self.opportunities.values()), columns=ARBITRAGE_COLUMNS)
+                .sort_values("profit", ascending=False, ignore_index=True))
+
+
+def benchmark(n_updates=100_000, n_fixtures=300, n_books=12, seed=0):
+    """Débit du scanner sur un flux simulé de mises à jour de cotes"""
+    rng = np.random.default_rng(seed)
+    markets = [("Match Winner", o) for o in ("Home", "Draw", "Away")] + \
+              [("Both Teams Score", o) for o in ("Yes", "No")] + \
+              [("Goals Over/Under", f"{side} {line}") for line in (1.5, 2.5, 3.5) for side in ("Over", "Under")] + \
+              [("Asian Handicap", f"{side} {line:+g}") for line in (-0.5, 0, 0.5) for side in ("Home", "Away")]
+    fair = {"Match Winner": 3, "Both Teams Score": 2, "Goals Over/Under": 2, "Asian Handicap": 2}
+    books = [f"Book{b}" for b in range(n_books)]
+
+    scanner = ArbitrageScanner()
+    base = [(f, b, m, o, fair[m] * rng.uniform(0.9, 1.0)) for f in range(n_fixtures) for b in books for m, o in markets]
+    scanner.update(base)
+
+    f = rng.integers(0, n_fixtures, n_updates)
+    b = rng.integers(0, n_books, n_updates)
+    s = rng.integers(0, len(markets), n_updates)
+    odds = np.array([fair[m] for m, _ in markets])[s] * rng.uniform(0.88, 1.04, n_updates)
+    start = time.perf_counter()
+    for k in range(n_updates):
+        market, outcome = markets[s[k]]
+        scanner.update(((int(f[k]), books[b[k]], market, outcome, odds[k]),))
+    elapsed = time.perf_counter() - start
+    return {"updates": n_updates, "seconds": elapsed, "opportunities": len(scanner.opportunities)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arbitrages et middles entre bookmakers")
+    parser.add_argument("--benchmark", type=int, default=None, help="mises à jour de cotes simulées")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        result = benchmark(args.benchmark)
+        print(f"⚡ {result['updates']:,} mises à jour en {result['seconds']:.2f}s "
+              f"({result['updates'] / result['seconds']:,.0f} mises à jour/s, "
+              f"{result['opportunities']} opportunités ouvertes)")
+        return
+
+    book = OddsBook.from_api_football()
+    if not len(book.fixture_ids):
+        print("⚠️ Aucune cote trouvée (data/raw/odds_*.json)")
+        return
+    table = ArbitrageScanner.from_book(book).table()
+    print(f"✅ {len(book.fixture_ids)} matchs, {len(book.bookmakers)} bookmakers analysés")
+    if table.empty:
+        print("ℹ️ Aucun arbitrage ni middle détecté")
+        return
+    for kind, label in (("arbitrage", "💰 Arbitrages"), ("middle", "🎯 Middles")):
+        rows = table[table["kind"] == kind]
+        print(f"\n{label} ({len(rows)}):")
+        if not rows.empty:
+            print(rows.drop(columns="kind").head(20).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
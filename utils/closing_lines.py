@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# utils/closing_lines.py
+# -----------------------------------------------------------------------------
+# Relevés de cotes jusqu'au coup d'envoi et lignes de clôture
+# Chaque relevé ajoute toutes les cotes des matchs pas encore commencés à
+# data/odds_snapshots.csv (une ligne par match × bookmaker × sélection). Une
+# fois le match commencé, la dernière cote relevée avant le coup d'envoi donne
+# la ligne de clôture de chaque sélection : cote du bookmaker de référence
+# (Pinnacle) si elle existe, sinon cote de consensus (inverse de la
+# probabilité implicite moyenne). Les lignes de clôture sont ajoutées à
+# data/closing_lines.csv au fil des coups d'envoi : seuls les matchs commencés
+# ayant au moins un relevé (index data/odds_snapshot_fixtures.csv) et absents
+# du fichier sont traités, les relevés n'étant lus (par blocs) que pour eux.
+# Lancé une seule fois (pipeline quotidien), le dernier relevé est celui du
+# matin : seul le mode --interval donne une vraie ligne de clôture.
+#
+# Usage : python utils/closing_lines.py                 (un relevé + clôtures)
+#         python utils/closing_lines.py --interval 15   (relevés jusqu'au dernier coup d'envoi,
+#                                                        arbitrages signalés à chaque relevé)
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.odds_book import OddsBook, SHARP_BOOKMAKER, iter_odds_records
+from preprocessing.fixture_history import load_fixture_table
+
+SNAPSHOTS_PATH = "data/odds_snapshots.csv"
+SNAPSHOT_INDEX_PATH = "data/odds_snapshot_fixtures.csv"
+CLOSING_PATH = "data/closing_lines.csv"
+SNAPSHOT_COLUMNS = ["captured_at", "fixture_id", "bookmaker", "market", "outcome", "odd"]
+CLOSING_COLUMNS = ["fixture_id", "market", "outcome", "closing_odds", "source", "captured_at"]
+HORIZON_HOURS = 24             # matchs relevés : coup d'envoi dans les prochaines 24 h
+CHUNK_SIZE = 500_000
+
+
+def kickoff_times():
+    """Coup d'envoi (UTC) de chaque match connu, indexé par fixture_id"""
+    fixtures = load_fixture_table()
+    if fixtures.empty:
+        return pd.Series(dtype="datetime64[ns, UTC]")
+    return fixtures.set_index("fixture_id")["date"].dropna()
+
+
+def snapshot_records(book, fixture_ids, captured_at):
+    """Toutes les cotes du carnet pour ``fixture_ids``, au format de data/odds_snapshots.csv"""
+    rows = book.rows(fixture_ids)
+    rows = rows[rows >= 0]
+    prices = book.prices[rows]
+    f, b, s = np.nonzero(np.isfinite(prices))
+    return pd.DataFrame({
+        "captured_at": captured_at.isoformat(),
+        "fixture_id": book.fixture_ids[rows][f],
+        "bookmaker": np.asarray(book.bookmakers, dtype=object)[b],
+        "market": np.asarray([m for m, _ in book.selections], dtype=object)[s],
+        "outcome": np.asarray([o for _, o in book.selections], dtype=object)[s],
+        "odd": prices[f, b, s],
+    }, columns=SNAPSHOT_COLUMNS)
+
+
+def snapshotted_fixtures(snapshots_path=SNAPSHOTS_PATH, index_path=SNAPSHOT_INDEX_PATH):
+    """
+    Identifiants des matchs présents dans les relevés. L'index est reconstruit
+    une seule fois à partir des relevés s'il n'existe pas encore.
+    """
+    if not os.path.exists(index_path):
+        ids = [chunk["fixture_id"].unique()
+               for chunk in pd.read_csv(snapshots_path, usecols=["fixture_id"], chunksize=CHUNK_SIZE)]
+        ids = np.unique(np.concatenate(ids)) if ids else np.zeros(0, dtype=np.int64)
+        os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+        pd.DataFrame({"fixture_id": ids}).to_csv(index_path, index=False)
+    return pd.read_csv(index_path)["fixture_id"].to_numpy()
+
+
+def capture_snapshot(book, kickoffs, now=None, path=SNAPSHOTS_PATH, index_path=SNAPSHOT_INDEX_PATH):
+    """
+    Ajoute au fichier de relevés les cotes des matchs pas encore commencés
+    (et les nouveaux matchs relevés à l'index).
+    :return: nombre de cotes relevées
+    """
+    now = now or pd.Timestamp.now(tz="UTC")
+    upcoming = kickoffs.reindex(book.fixture_ids)
+    records = snapshot_records(book, book.fixture_ids[(upcoming > now).to_numpy()], now)
+    if not records.empty:
+        known = snapshotted_fixtures(path, index_path) if os.path.exists(path) else []
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        records.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+        new_ids = np.setdiff1d(records["fixture_id"].unique(), known)
+        pd.DataFrame({"fixture_id": new_ids}).to_csv(
+            index_path, mode="a", header=not os.path.exists(index_path), index=False)
+    return len(records)
+
+
+def closing_lines(snapshots, kickoffs, sharp=SHARP_BOOKMAKER):
+    """
+    Ligne de clôture de chaque (match, marché, issue) à partir des relevés :
+    dernière cote de chaque bookmaker relevée avant le coup d'envoi, puis cote
+    du bookmaker ``sharp`` ou, à défaut, cote de consensus.
+    """
+    captured = pd.to_datetime(snapshots["captured_at"], utc=True)
+    kickoff = snapshots["fixture_id"].map(kickoffs)
+    last = (snapshots.assign(captured_at=captured)[(captured < kickoff).to_numpy()]
+            .sort_values("captured_at")
+            .drop_duplicates(["fixture_id", "bookmaker", "market", "outcome"], keep="last"))
+    if last.empty:
+        return pd.DataFrame(columns=CLOSING_COLUMNS)
+
+    book = OddsBook.from_records(last[["fixture_id", "bookmaker", "market", "outcome", "odd"]].itertuples(index=False))
+    consensus = 1.0 / book.mean_implied
+    b = book.bookmaker_index.get(sharp)
+    sharp_prices = book.prices[:, b, :] if b is not None else np.full(consensus.shape, np.nan)
+    use_sharp = np.isfinite(sharp_prices) & (sharp_prices > 1.0)
+    closing = np.where(use_sharp, sharp_prices, consensus)
+
+    f, s = np.nonzero(np.isfinite(closing))
+    captured_at = last.groupby("fixture_id")["captured_at"].max()
+    fixture_ids = book.fixture_ids[f]
+    return pd.DataFrame({
+        "fixture_id": fixture_ids,
+        "market": np.asarray([m for m, _ in book.selections], dtype=object)[s],
+        "outcome": np.asarray([o for _, o in book.selections], dtype=object)[s],
+        "closing_odds": closing[f, s].round(3),
+        "source": np.where(use_sharp[f, s], sharp, "consensus"),
+        "captured_at": captured_at.reindex(fixture_ids).map(pd.Timestamp.isoformat).to_numpy(),
+    }, columns=CLOSING_COLUMNS)
+
+
+def update_closing_lines(kickoffs=None, now=None, snapshots_path=SNAPSHOTS_PATH, closing_path=CLOSING_PATH,
+                         index_path=SNAPSHOT_INDEX_PATH):
+    """
+    Ajoute les lignes de clôture des matchs commencés et relevés qui n'en ont
+    pas encore (les matchs jamais relevés ne déclenchent pas de lecture).
+    :return: nouvelles lignes de clôture (DataFrame)
+    """
+    if not os.path.exists(snapshots_path):
+        return pd.DataFrame(columns=CLOSING_COLUMNS)
+    now = now or pd.Timestamp.now(tz="UTC")
+    kickoffs = kickoff_times() if kickoffs is None else kickoffs
+    closed = pd.read_csv(closing_path, usecols=["fixture_id"])["fixture_id"].unique() \
+        if os.path.exists(closing_path) else []
+    snapshotted = snapshotted_fixtures(snapshots_path, index_path)
+    started = kickoffs[(kickoffs <= now) & kickoffs.index.isin(snapshotted) & ~kickoffs.index.isin(closed)]
+    if started.empty:
+        return pd.DataFrame(columns=CLOSING_COLUMNS)
+
+    # Seuls les relevés des matchs à clôturer sont gardés en mémoire
+    chunks = [chunk[chunk["fixture_id"].isin(started.index)]
+              for chunk in pd.read_csv(snapshots_path, chunksize=CHUNK_SIZE)]
+    lines = closing_lines(pd.concat(chunks, ignore_index=True), started)
+    if not lines.empty:
+        lines.to_csv(closing_path, mode="a", header=not os.path.exists(closing_path), index=False)
+    return lines
+
+
+def fetch_upcoming_book(kickoffs, now, horizon_hours=HORIZON_HOURS):
+    """Carnet de cotes frais (API-Football) des matchs qui commencent dans ``horizon_hours``"""
+    from ingestion.fetch_odds_api_football import fetch_fixture_odds
+    upcoming = kickoffs[(kickoffs > now) & (kickoffs <= now + pd.Timedelta(hours=horizon_hours))]
+    response = []
+    for fixture_id in upcoming.index:
+        try:
+            response.extend(fetch_fixture_odds(int(fixture_id)))
+            time.sleep(1.2)
+        except Exception as e:
+            print(f"⚠️ Erreur cotes fixture {fixture_id} : {e}")
+    return OddsBook.from_records(iter_odds_records(response))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relevés de cotes et lignes de clôture")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="minutes entre deux relevés (cotes API rafraîchies jusqu'au dernier coup d'envoi)")
+    parser.add_argument("--horizon", type=float, default=HORIZON_HOURS, help="heures avant coup d'envoi relevées")
+    args = parser.parse_args()
+
+    try:
+        from utils.arbitrage import ArbitrageScanner
+        kickoffs = kickoff_times()
+        scanner = ArbitrageScanner()
+        while True:
+            now = pd.Timestamp.now(tz="UTC")
+            book = fetch_upcoming_book(kickoffs, now, args.horizon) if args.interval else OddsBook.from_api_football()
+            if not len(book.fixture_ids):
+                print(f"⚠️ {now:%H:%M} : aucune cote disponible, seules les clôtures sont mises à jour")
+            n_odds = capture_snapshot(book, kickoffs, now)
+            lines = update_closing_lines(kickoffs, now)
+            print(f"📸 {now:%H:%M} : {n_odds} cotes relevées, {lines['fixture_id'].nunique()} matchs clôturés")
+
+            records = snapshot_records(book, book.fixture_ids, now)[SNAPSHOT_COLUMNS[1:]]
+            for opportunity in scanner.update(records.itertuples(index=False)):
+                if opportunity["kind"] == "arbitrage":
+                    print(f"💰 Arbitrage match {opportunity['fixture_id']} ({opportunity['market']}) : "
+                          f"{opportunity['outcomes']} @ {opportunity['odds']} ({opportunity['bookmakers']}), "
+                          f"mises {opportunity['stakes']}, {opportunity['profit']:+.2%}")
+
+            remaining = kickoffs[(kickoffs > now) & (kickoffs <= now + pd.Timedelta(hours=args.horizon))]
+            if not args.interval or remaining.empty:
+                break
+            time.sleep(args.interval * 60)
+
+    except Exception as e:
+        print(f"❌ Erreur dans closing_lines.py : {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
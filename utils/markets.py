@@ -0,0 +1,120 @@
+# utils/markets.py
+# -----------------------------------------------------------------------------
+# Schéma générique des marchés de paris et règlement sur les grilles de scores
+# Une sélection est un triplet (marché, côté, ligne) : ("1x2", "home", None),
+# ("total", "over", 2.5), ("btts", "yes", None), ("asian_handicap", "away", 0.25).
+# Chaque sélection est réglée sur la grille P(buts domicile = i, extérieur = j)
+# d'un modèle de buts : probabilité de gain et de remboursement (push). Les
+# lignes asiatiques au quart (x.25, x.75) sont deux demi-mises sur les lignes
+# voisines, d'où des probabilités moyennées. Toutes les sélections de tous les
+# marchés sont évaluées en un seul produit tensoriel sur la même grille.
+# -----------------------------------------------------------------------------
+
+from functools import lru_cache
+
+import numpy as np
+
+# Noms des marchés API-Football -> marché du schéma
+MARKETS = {
+    "Match Winner": "1x2",
+    "Goals Over/Under": "total",
+    "Both Teams Score": "btts",
+    "Asian Handicap": "asian_handicap",
+}
+
+
+def parse_selection(market_name, value):
+    """
+    Sélection du schéma pour une issue API-Football ("Over 2.5", "Home -0.75"...)
+    :return: (marché, côté, ligne) ou None si l'issue n'est pas reconnue
+    """
+    market = MARKETS.get(market_name)
+    parts = str(value).split()
+    try:
+        if market == "1x2" and parts[0] in ("Home", "Draw", "Away"):
+            return market, parts[0].lower(), None
+        if market == "btts" and parts[0] in ("Yes", "No"):
+            return market, parts[0].lower(), None
+        if market == "total" and len(parts) == 2 and parts[0] in ("Over", "Under"):
+            return market, parts[0].lower(), float(parts[1])
+        if market == "asian_handicap" and len(parts) == 2 and parts[0] in ("Home", "Away"):
+            return market, parts[0].lower(), float(parts[1])
+    except (IndexError, ValueError):
+        pass
+    return None
+
+
+def parse_outcomes(market_name, outcomes):
+    """
+    Issues reconnues d'un marché.
+    :return: (issues conservées, sélections correspondantes)
+    """
+    parsed = [(o, parse_selection(market_name, o)) for o in outcomes]
+    parsed = [(o, s) for o, s in parsed if s is not None]
+    return [o for o, _ in parsed], [s for _, s in parsed]
+
+
+def complete_markets(selections):
+    """
+    Groupes d'indices formant chacun un marché complet (issues exclusives
+    couvrant tous les scores) : 1X2, oui / non, over / under d'une même ligne,
+    domicile L / extérieur -L. Les sélections sans complément sont omises.
+    """
+    keys = {}
+    for k, (market, side, line) in enumerate(selections):
+        if market in ("1x2", "btts"):
+            key = (market,)
+        elif market == "total":
+            key = (market, line)
+        else:
+            key = (market, line if side == "home" else -line)
+        keys.setdefault(key, []).append(k)
+    sizes = {"1x2": 3, "btts": 2, "total": 2, "asian_handicap": 2}
+    return [group for key, group in keys.items() if len(group) == sizes[key[0]]]
+
+
+def _margin(market, side, i, j):
+    """Écart de buts du point de vue du parieur, avant application de la ligne"""
+    if market == "total":
+        return (i + j) if side == "over" else -(i + j)
+    return (i - j) if side == "home" else (j - i)
+
+
+@lru_cache(maxsize=64)
+def settlement(selection, max_goals):
+    """
+    Masques (G, G) de gain et de remboursement d'une sélection sur la grille
+    de scores 0..max_goals.
+    """
+    market, side, line = selection
+    i, j = np.meshgrid(np.arange(max_goals + 1), np.arange(max_goals + 1), indexing="ij")
+    if market == "1x2":
+        win = {"home": i > j, "draw": i == j, "away": i < j}[side]
+        return win.astype(np.float64), np.zeros(win.shape)
+    if market == "btts":
+        both = (i > 0) & (j > 0)
+        return (both if side == "yes" else ~both).astype(np.float64), np.zeros(both.shape)
+
+    # Total : over L <=> (i + j) - L > 0, under L <=> L - (i + j) > 0
+    line = -line if market == "total" and side == "over" else line
+    # Ligne au quart : moitié de la mise sur chacune des deux lignes voisines
+    lines = [line] if float(line * 2).is_integer() else [line - 0.25, line + 0.25]
+    margins = [_margin(market, side, i, j) + l for l in lines]
+    win = np.mean([m > 0 for m in margins], axis=0)
+    push = np.mean([m == 0 for m in margins], axis=0)
+    return win, push
+
+
+def grid_probabilities(grid, selections):
+    """
+    Probabilités de gain et de remboursement de chaque sélection.
+    :param grid: grilles de scores (n, G, G)
+    :return: (p_win (n, k), p_push (n, k))
+    """
+    max_goals = grid.shape[1] - 1
+    if not selections:
+        return np.zeros((len(grid), 0)), np.zeros((len(grid), 0))
+    masks = [settlement(tuple(s), max_goals) for s in selections]
+    win = np.stack([w for w, _ in masks])
+    push = np.stack([p for _, p in masks])
+    return np.einsum("nij,kij->nk", grid, win), np.einsum("nij,kij->nk", grid, push)
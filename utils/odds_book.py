@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# utils/odds_book.py
+# -----------------------------------------------------------------------------
+# Carnet de cotes multi-bookmakers
+# Toutes les cotes connues sont rangées dans un tableau dense
+# (matchs × bookmakers × sélections), une sélection étant un couple
+# (marché, issue), avec NaN quand un bookmaker ne propose pas la sélection.
+# Des dictionnaires d'index (fixture_id, bookmaker, sélection) donnent la
+# position de chaque axe : meilleure cote, cote de consensus et cote du
+# bookmaker de référence (Pinnacle) se lisent en O(1), pré-calculées une fois
+# à la construction.
+#
+# Usage : python utils/odds_book.py
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import argparse
+from glob import glob
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.overround import fair_probabilities_grouped, DEFAULT_METHOD
+
+ODDS_PATTERN = "data/raw/odds_*.json"
+MATCH_WINNER = "Match Winner"
+SHARP_BOOKMAKER = "Pinnacle"
+
+
+class OddsBook:
+    """
+    Cotes de tous les bookmakers par (match, bookmaker, marché, issue).
+
+    ``prices[f, b, s]`` est la cote du bookmaker ``b`` pour la sélection ``s``
+    du match ``f`` ; ``best``, ``best_book``, ``mean_implied`` et ``n_books``
+    sont les agrégats (matchs × sélections) sur l'axe des bookmakers.
+    """
+
+    def __init__(self, fixture_ids, bookmakers, selections, prices):
+        self.fixture_ids = np.asarray(fixture_ids, dtype=np.int64)
+        self.bookmakers = list(bookmakers)
+        self.selections = list(selections)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.fixture_index = {int(f): i for i, f in enumerate(self.fixture_ids)}
+        self.bookmaker_index = {b: i for i, b in enumerate(self.bookmakers)}
+        self.selection_index = {s: i for i, s in enumerate(self.selections)}
+
+        valid = np.isfinite(self.prices) & (self.prices > 1.0)
+        self.n_books = valid.sum(axis=1)
+        if self.prices.shape[1]:
+            masked = np.where(valid, self.prices, -np.inf)
+            self.best_book = np.where(self.n_books > 0, masked.argmax(axis=1), -1)
+            self.best = np.where(self.n_books > 0, masked.max(axis=1), np.nan)
+        else:
+            # Aucun bookmaker : agrégats vides (argmax impossible sur un axe de taille 0)
+            self.best_book = np.full(self.n_books.shape, -1, dtype=np.int64)
+            self.best = np.full(self.n_books.shape, np.nan)
+        implied = np.where(valid, 1.0 / np.where(valid, self.prices, 1.0), 0.0)
+        self.mean_implied = np.divide(implied.sum(axis=1), self.n_books,
+                                      out=np.full(self.best.shape, np.nan), where=self.n_books > 0)
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Construit le carnet à partir de tuples
+        ``(fixture_id, bookmaker, marché, issue, cote)`` ; la dernière cote
+        lue l'emporte en cas de doublon.
+        """
+        table = pd.DataFrame(list(records), columns=["fixture_id", "bookmaker", "market", "outcome", "odd"])
+        if table.empty:
+            return cls([], [], [], np.zeros((0, 0, 0)))
+        fixture_ids, f_idx = np.unique(table["fixture_id"].to_numpy(dtype=np.int64), return_inverse=True)
+        bookmakers, b_idx = np.unique(table["bookmaker"].astype(str).to_numpy(), return_inverse=True)
+        selection_keys = pd.MultiIndex.from_frame(table[["market", "outcome"]].astype(str))
+        s_idx, selections = pd.factorize(selection_keys)
+
+        prices = np.full((len(fixture_ids), len(bookmakers), len(selections)), np.nan)
+        prices[f_idx, b_idx, s_idx] = pd.to_numeric(table["odd"], errors="coerce").to_numpy()
+        return cls(fixture_ids, bookmakers.tolist(), list(selections), prices)
+
+    @classmethod
+    def from_api_football(cls, paths=None, markets=None):
+        """
+        Carnet des réponses ``/odds`` d'API-Football (data/raw/odds_*.json).
+        :param markets: noms des marchés à conserver (tous si None)
+        """
+        paths = sorted(glob(ODDS_PATTERN) if paths is None else paths, key=os.path.getmtime)
+        return cls.from_records(iter_api_football_records(paths, markets))
+
+    # --- Index -------------------------------------------------------------
+
+    def columns(self, market, outcomes):
+        """Indices des sélections ``(market, issue)`` (-1 si jamais cotée)"""
+        return np.array([self.selection_index.get((market, str(o)), -1) for o in outcomes], dtype=np.int64)
+
+    def rows(self, fixture_ids):
+        """Indices des matchs (-1 si absent du carnet)"""
+        return np.array([self.fixture_index.get(int(f), -1) for f in fixture_ids], dtype=np.int64)
+
+    def outcomes(self, market):
+        """Issues cotées pour un marché, dans l'ordre de première apparition"""
+        return [o for m, o in self.selections if m == market]
+
+    def _take(self, values, fixture_ids, cols, fill=np.nan):
+        """Lignes ``fixture_ids`` et colonnes ``cols`` d'un tableau (matchs × sélections), ``fill`` si absentes"""
+        fixture_ids = self.fixture_ids if fixture_ids is None else fixture_ids
+        rows = self.rows(fixture_ids)
+        out = np.full((len(rows), len(cols)), fill, dtype=values.dtype)
+        keep = (rows[:, None] >= 0) & (cols[None, :] >= 0)
+        if not keep.any():
+            return out
+        out[keep] = values[np.maximum(rows, 0)[:, None], np.maximum(cols, 0)[None, :]][keep]
+        return out
+
+    def _take_books(self, fixture_ids, cols):
+        """Cotes de tous les bookmakers (n, bookmakers, k) des lignes ``fixture_ids`` et colonnes ``cols``"""
+        fixture_ids = self.fixture_ids if fixture_ids is None else fixture_ids
+        rows = self.rows(fixture_ids)
+        out = self.prices[np.maximum(rows, 0)][:, :, np.maximum(cols, 0)] if self.prices.size \
+            else np.full((len(rows), len(self.bookmakers), len(cols)), np.nan)
+        out[(rows < 0)] = np.nan
+        out[:, :, cols < 0] = np.nan
+        return out
+
+    # --- Lectures unitaires (O(1)) -------------------------------------------
+
+    def price(self, fixture_id, market, outcome, bookmaker=None):
+        """Cote d'un bookmaker, ou meilleure cote disponible si ``bookmaker`` est None"""
+        f = self.fixture_index.get(int(fixture_id))
+        s = self.selection_index.get((market, str(outcome)))
+        if f is None or s is None:
+            return np.nan
+        if bookmaker is None:
+            return self.best[f, s]
+        b = self.bookmaker_index.get(bookmaker)
+        return np.nan if b is None else self.prices[f, b, s]
+
+    def best_bookmaker(self, fixture_id, market, outcome):
+        """Bookmaker offrant la meilleure cote (None si aucune)"""
+        f = self.fixture_index.get(int(fixture_id))
+        s = self.selection_index.get((market, str(outcome)))
+        if f is None or s is None or self.best_book[f, s] < 0:
+            return None
+        return self.bookmakers[self.best_book[f, s]]
+
+    # --- Matrices (matchs × issues) pour le moteur de value bets -----------
+
+    def best_prices(self, market=MATCH_WINNER, outcomes=("Home", "Draw", "Away"), fixture_ids=None):
+        """
+        Meilleure cote de chaque issue et bookmaker qui la propose.
+        :return: (cotes (n, k), bookmakers (n, k) en objets, None si absente)
+        """
+        cols = self.columns(market, outcomes)
+        prices = self._take(self.best, fixture_ids, cols)
+        books = self._take(self.best_book, fixture_ids, cols, fill=-1)
+        return prices, np.array(self.bookmakers + [None], dtype=object)[books]
+
+    def bookmaker_prices(self, bookmaker, market=MATCH_WINNER, outcomes=("Home", "Draw", "Away"), fixture_ids=None):
+        """Cotes (n, k) d'un bookmaker donné (NaN s'il ne cote pas le match)"""
+        cols = self.columns(market, outcomes)
+        b = self.bookmaker_index.get(bookmaker)
+        if b is None:
+            n = len(self.fixture_ids if fixture_ids is None else fixture_ids)
+            return np.full((n, len(cols)), np.nan)
+        return self._take(self.prices[:, b, :], fixture_ids, cols)
+
+    def consensus_probabilities(self, market=MATCH_WINNER, outcomes=("Home", "Draw", "Away"), fixture_ids=None,
+                                method=DEFAULT_METHOD, groups=None):
+        """
+        Probabilités de consensus : marge retirée séparément pour chaque
+        bookmaker (utils/overround.py), puis moyenne sur les bookmakers qui
+        cotent tout le marché (NaN si aucun).
+        :param groups: indices des issues formant chacune un marché complet
+            (toutes les issues par défaut)
+        """
+        groups = [list(range(len(outcomes)))] if groups is None else groups
+        fair = fair_probabilities_grouped(self._take_books(fixture_ids, self.columns(market, outcomes)), groups, method)
+        n_books = np.isfinite(fair).sum(axis=1)
+        return np.divide(np.nansum(fair, axis=1), n_books, out=np.full(n_books.shape, np.nan), where=n_books > 0)
+
+    def sharp_probabilities(self, market=MATCH_WINNER, outcomes=("Home", "Draw", "Away"),
+                            fixture_ids=None, bookmaker=SHARP_BOOKMAKER, method=DEFAULT_METHOD, groups=None):
+        """Probabilités sans marge du bookmaker de référence (Pinnacle par défaut)"""
+        groups = [list(range(len(outcomes)))] if groups is None else groups
+        return fair_probabilities_grouped(self.bookmaker_prices(bookmaker, market, outcomes, fixture_ids), groups, method)
+
+    def summary(self):
+        """Nombre de cotes par bookmaker et par marché"""
+        counts = np.isfinite(self.prices).sum(axis=(0, 2))
+        markets = pd.Series(np.isfinite(self.prices).sum(axis=(0, 1)),
+                            index=pd.MultiIndex.from_tuples(self.selections, names=["market", "outcome"]))
+        return (pd.Series(counts, index=self.bookmakers, name="odds").sort_values(ascending=False),
+                markets.groupby(level="market").sum().sort_values(ascending=False))
+
+
+def iter_api_football_records(paths, markets=None):
+    """``(fixture_id, bookmaker, marché, issue, cote)`` de chaque fichier de cotes API-Football"""
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Erreur lecture cotes {path}: {e}")
+            continue
+        yield from iter_odds_records(data.get("response", []), markets)
+
+
+def iter_odds_records(response, markets=None):
+    """``(fixture_id, bookmaker, marché, issue, cote)`` d'une liste de réponses ``/odds``"""
+    for match_odds in response:
+        fixture_id = match_odds.get("fixture", {}).get("id")
+        if fixture_id is None:
+            continue
+        for book in match_odds.get("bookmakers", []):
+            for market in book.get("bets", []):
+                if markets is not None and market.get("name") not in markets:
+                    continue
+                for value in market.get("values", []):
+                    yield fixture_id, book.get("name"), market.get("name"), str(value.get("value")), value.get("odd")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carnet de cotes multi-bookmakers")
+    parser.add_argument("--market", default=MATCH_WINNER, help="marché affiché")
+    args = parser.parse_args()
+
+    book = OddsBook.from_api_football()
+    if not len(book.fixture_ids):
+        print(f"⚠️ Aucune cote trouvée ({ODDS_PATTERN})")
+        return
+    per_book, per_market = book.summary()
+    print(f"✅ {len(book.fixture_ids)} matchs, {len(book.bookmakers)} bookmakers, "
+          f"{len(book.selections)} sélections ({book.prices.nbytes / 1e6:.1f} Mo)")
+    print(f"\n📚 Cotes par bookmaker:\n{per_book.head(10).to_string()}")
+    print(f"\n📊 Cotes par marché:\n{per_market.head(10).to_string()}")
+
+    outcomes = book.outcomes(args.market)
+    if outcomes:
+        prices, books = book.best_prices(args.market, outcomes)
+        margin = np.nansum(1 / prices, axis=1) - 1
+        print(f"\n💰 Marge moyenne au meilleur prix ({args.market}) : {np.nanmean(margin):+.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# utils/portfolio.py
+# -----------------------------------------------------------------------------
+# Allocation des mises d'un portefeuille de paris corrélés
+# Les paris d'un même match (victoire domicile + over 2.5) ou d'une même
+# journée de championnat ne sont pas indépendants. La distribution jointe est
+# construite par simulation de scores : pour chaque match, les cellules de la
+# grille Dixon-Coles sont rangées par nombre total de buts puis tirées par
+# inversion de la fonction de répartition, avec des uniformes issus d'une
+# copule gaussienne commune à la ligue (journée riche ou pauvre en buts). Tous
+# les paris d'un match sont réglés sur le même score simulé (utils/markets.py)
+# ; les paris sans grille sont tirés indépendamment avec leur probabilité.
+# Les probabilités 1X2 des paris viennent du backend configuré (LSTM par
+# défaut) : la grille de chaque match est repondérée pour que ses marginales
+# 1X2 égalent ``expected_prob`` des issues pariées (les marchés de buts restent
+# ceux de la grille, conditionnellement au résultat).
+# La croissance logarithmique moyenne sur les scénarios simulés est maximisée
+# sous les plafonds d'exposition de utils/staking.py.
+#
+# Usage : python utils/portfolio.py --bankroll 1000
+#         python utils/portfolio.py --benchmark 200
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.markets import parse_selection, settlement
+from utils.staking import (
+    exclusive_groups, maximize_log_growth, KELLY_FRACTION, MAX_BET_FRACTION,
+    MAX_FIXTURE_FRACTION, MAX_DAILY_EXPOSURE,
+)
+
+BETS_PATH = "data/bets_today.csv"
+N_SIMS = 2000
+LEAGUE_CORRELATION = 0.1       # corrélation des buts entre matchs d'une même ligue
+
+
+def simulate_scores(grids, leagues=None, n_sims=N_SIMS, correlation=LEAGUE_CORRELATION, seed=0):
+    """
+    Scores simulés, en indices de cellules de la grille rangées par
+    (total de buts, écart domicile - extérieur).
+    :param grids: grilles de scores (F, G, G)
+    :param leagues: ligue de chaque match (F,), pour la copule gaussienne
+    :return: (cellules (n_sims, F), ordre des cellules (G*G,))
+    """
+    from scipy.special import ndtr
+    rng = np.random.default_rng(seed)
+    n_fixtures, size = grids.shape[0], grids.shape[1]
+    i, j = np.meshgrid(np.arange(size), np.arange(size), indexing="ij")
+    order = np.lexsort(((i - j).ravel(), (i + j).ravel()))
+    cdf = np.cumsum(grids.reshape(n_fixtures, -1)[:, order], axis=1)
+    cdf /= cdf[:, -1:]
+
+    z = rng.standard_normal((n_sims, n_fixtures))
+    if leagues is not None and correlation > 0:
+        # Ligue inconnue (code -1) : match indépendant
+        codes = pd.factorize(pd.Series(leagues, dtype=object))[0]
+        common = rng.standard_normal((n_sims, codes.max() + 2))[:, codes + 1]
+        z = np.where(codes >= 0, np.sqrt(correlation) * common + np.sqrt(1 - correlation) * z, z)
+    u = ndtr(z)
+    cells = np.empty((n_sims, n_fixtures), dtype=np.int64)
+    for f in range(n_fixtures):
+        cells[:, f] = np.searchsorted(cdf[f], u[:, f])
+    return np.minimum(cells, size * size - 1), order
+
+
+def tilt_grids(grids, rows, outcomes, probs):
+    """
+    Grilles normalisées dont la probabilité de chaque issue 1X2 pariée vaut
+    celle du pari : les cellules de l'issue sont multipliées par p / q, celles
+    des autres issues se partagent le reste au prorata de la grille.
+    :param rows: grille de chaque pari 1X2 ; outcomes : 0 Home, 1 Draw, 2 Away
+    """
+    size = grids.shape[1]
+    i, j = np.indices((size, size))
+    regions = np.stack([i > j, i == j, i < j]).astype(np.float64)      # (3, G, G)
+    grids = grids / grids.sum(axis=(1, 2), keepdims=True)
+    target = np.full((len(grids), 3), np.nan)
+    target[rows, outcomes] = probs
+    current = np.einsum("fij,kij->fk", grids, regions)
+    known = np.isfinite(target)
+    rest_target = np.clip(1 - np.where(known, target, 0).sum(axis=1, keepdims=True), 0, None)
+    rest_current = np.where(known, 0, current).sum(axis=1, keepdims=True)
+    scale = np.where(known, np.divide(target, current, out=np.ones(current.shape), where=current > 0),
+                     np.divide(rest_target, rest_current, out=np.ones(rest_current.shape), where=rest_current > 0))
+    return grids * np.einsum("fk,kij->fij", scale, regions)
+
+
+def simulate_returns(bets, grid_ids=None, grids=None, leagues=None, n_sims=N_SIMS,
+                     correlation=LEAGUE_CORRELATION, seed=0):
+    """
+    Rendement par unité misée de chaque pari dans chaque scénario simulé.
+    :param grid_ids: fixture_id de chaque grille de ``grids``
+    :param leagues: ligue de chaque grille
+    :return: rendements (n_sims, n_paris)
+    """
+    n = len(bets)
+    odds = bets["bookmaker_odds"].to_numpy(dtype=np.float64)
+    returns = np.empty((n_sims, n))
+    fixture_ids = bets["fixture_id"].to_numpy() if "fixture_id" in bets else np.full(n, np.nan)
+    markets = bets["market"].to_numpy() if "market" in bets else np.full(n, "Match Winner", dtype=object)
+    selections = [parse_selection(m, o) for m, o in zip(markets, bets["bet_on"])]
+
+    on_grid = np.zeros(n, dtype=bool)
+    if grids is not None and len(grids):
+        grid_row = pd.Series(np.arange(len(grid_ids)), index=np.asarray(grid_ids, dtype=np.int64))
+        rows = grid_row.reindex(pd.to_numeric(pd.Series(fixture_ids), errors="coerce")).to_numpy()
+        on_grid = np.isfinite(rows) & np.array([s is not None for s in selections])
+    if on_grid.any():
+        # Paris 1X2 : marginales de la grille ramenées à leur expected_prob
+        outcome = pd.Series(bets["bet_on"].to_numpy()).map({"Home": 0, "Draw": 1, "Away": 2}).to_numpy()
+        winner = on_grid & (markets == "Match Winner") & np.isfinite(outcome)
+        if winner.any():
+            grids = tilt_grids(grids, rows[winner].astype(np.int64), outcome[winner].astype(np.int64),
+                               bets["expected_prob"].to_numpy(dtype=np.float64)[winner])
+        cells, order = simulate_scores(grids, leagues, n_sims, correlation, seed)
+        max_goals = grids.shape[1] - 1
+        k = np.flatnonzero(on_grid)
+        masks = [settlement(tuple(selections[b]), max_goals) for b in k]
+        win = np.stack([w.ravel()[order] for w, _ in masks])           # (k, C)
+        push = np.stack([p.ravel()[order] for _, p in masks])
+        bet_cells = cells[:, rows[k].astype(np.int64)]                 # (n_sims, k)
+        w = win[np.arange(len(k)), bet_cells]
+        lose = 1 - w - push[np.arange(len(k)), bet_cells]
+        returns[:, k] = w * (odds[k] - 1) - lose
+
+    off_grid = np.flatnonzero(~on_grid)
+    if len(off_grid):
+        # Paris sans grille : tirage par groupe d'issues exclusives
+        rng = np.random.default_rng(seed + 1)
+        others = bets.iloc[off_grid]
+        groups, _ = exclusive_groups(others)
+        prob = others["expected_prob"].to_numpy(dtype=np.float64)
+        push = np.nan_to_num(others["push_prob"].to_numpy(dtype=np.float64)) if "push_prob" in others \
+            else np.zeros(len(others))
+        width = prob + push
+        lower = np.zeros(len(others))
+        for g in range(groups.max() + 1):
+            members = np.flatnonzero(groups == g)
+            lower[members] = np.cumsum(width[members]) - width[members]
+        u = rng.random((n_sims, groups.max() + 1))[:, groups] - lower
+        won = (u >= 0) & (u < prob)
+        pushed = (u >= prob) & (u < width)
+        returns[:, off_grid] = np.where(won, odds[off_grid] - 1, np.where(pushed, 0.0, -1.0))
+    return returns
+
+
+def portfolio_fractions(bets, grid_ids=None, grids=None, leagues=None, n_sims=N_SIMS,
+                        correlation=LEAGUE_CORRELATION, seed=0, fraction=KELLY_FRACTION,
+                        max_bet=MAX_BET_FRACTION, max_fixture=MAX_FIXTURE_FRACTION,
+                        max_exposure=MAX_DAILY_EXPOSURE):
+    """
+    Mises (fraction du bankroll) de tous les paris du jour maximisant la
+    croissance logarithmique moyenne sur les scores simulés. Sans grilles
+    fournies, celles des matchs des paris sont chargées (modeling/dixon_coles.py).
+    """
+    if len(bets) == 0:
+        return np.zeros(0)
+    if grids is None:
+        grid_ids, grids, leagues = load_grids(bets)
+    returns = simulate_returns(bets, grid_ids, grids, leagues, n_sims, correlation, seed)
+    _, fixtures = exclusive_groups(bets)
+    probs = np.full(n_sims, 1.0 / n_sims)
+    return maximize_log_growth(probs, returns, fixtures, fraction, max_bet, max_fixture, max_exposure)
+
+
+def load_grids(bets):
+    """Grilles Dixon-Coles et ligues des matchs des paris (grilles None si indisponibles)"""
+    if "fixture_id" not in bets or bets["fixture_id"].isna().all():
+        return None, None, None
+    try:
+        from modeling.dixon_coles import load_score_grids
+        from preprocessing.fixture_history import load_fixture_table
+        grid_ids, grids = load_score_grids(bets["fixture_id"].dropna().astype(np.int64).unique())
+        fixtures = load_fixture_table()
+        leagues = fixtures.set_index("fixture_id")["league_id"].reindex(grid_ids).to_numpy() \
+            if not fixtures.empty else None
+        return grid_ids, grids, leagues
+    except Exception as e:
+        print(f"⚠️ Grilles de scores indisponibles ({e}) : paris tirés indépendamment")
+        return None, None, None
+
+
+def benchmark(n_bets=200, n_sims=N_SIMS, seed=0):
+    """Temps d'allocation d'un portefeuille de ``n_bets`` paris sur des grilles simulées"""
+    from modeling.dixon_coles import score_grid_from_rates
+    rng = np.random.default_rng(seed)
+    n_fixtures = max(n_bets // 3, 1)
+    lam, mu = rng.uniform(0.8, 2.0, n_fixtures), rng.uniform(0.6, 1.6, n_fixtures)
+    grids = score_grid_from_rates(lam, mu, -0.05)
+    catalogue = [("Match Winner", "Home"), ("Match Winner", "Away"), ("Goals Over/Under", "Over 2.5"),
+                 ("Goals Over/Under", "Under 2.5"), ("Both Teams Score", "Yes"), ("Asian Handicap", "Home -0.25")]
+    picks = rng.choice(len(catalogue), n_bets)
+    fixture = rng.integers(0, n_fixtures, n_bets)
+    bets = pd.DataFrame({
+        "fixture_id": fixture,
+        "match": [f"M{f}" for f in fixture],
+        "market": [catalogue[c][0] for c in picks],
+        "bet_on": [catalogue[c][1] for c in picks],
+    })
+    win, _ = zip(*(settlement(parse_selection(m, o), grids.shape[1] - 1) for m, o in zip(bets["market"], bets["bet_on"])))
+    prob = np.einsum("nij,nij->n", grids[fixture], np.stack(win))
+    bets["expected_prob"] = prob
+    bets["bookmaker_odds"] = np.round(1 / prob * rng.uniform(0.95, 1.1, n_bets), 2)
+
+    start = time.perf_counter()
+    x = portfolio_fractions(bets, np.arange(n_fixtures), grids, rng.integers(0, 5, n_fixtures), n_sims)
+    return {"bets": n_bets, "seconds": time.perf_counter() - start, "staked": int((x > 1e-4).sum()),
+            "exposure": float(x.sum())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mises d'un portefeuille de paris corrélés")
+    parser.add_argument("--bankroll", type=float, default=1000.0)
+    parser.add_argument("--sims", type=int, default=N_SIMS)
+    parser.add_argument("--benchmark", type=int, default=None, help="nombre de paris simulés")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        result = benchmark(args.benchmark, args.sims)
+        print(f"⚡ {result['bets']} paris alloués en {result['seconds']:.2f}s "
+              f"({result['staked']} misés, exposition {result['exposure']:.1%})")
+        return
+
+    bets = pd.read_csv(BETS_PATH)
+    if bets.empty:
+        print("ℹ️ Aucun value bet aujourd'hui")
+        return
+    bets["stake"] = np.round(portfolio_fractions(bets, n_sims=args.sims) * args.bankroll, 2)
+    columns = [c for c in ["match", "market", "bet_on", "bookmaker_odds", "expected_prob", "expected_value", "stake"]
+               if c in bets]
+    print(bets[columns].to_string(index=False))
+    print(f"\n💰 Exposition totale : {bets['stake'].sum():.2f}€ "
+          f"({bets['stake'].sum() / args.bankroll:.1%} du bankroll, {(bets['stake'] > 0).sum()} paris misés)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# utils/staking.py
+# -----------------------------------------------------------------------------
+# Politiques de mise : mise fixe ou Kelly fractionnaire optimisé conjointement
+# Tous les value bets du jour sont misés ensemble : les issues d'un même marché
+# exclusif (1X2, BTTS) d'un match partagent les mêmes scénarios (une seule
+# gagne), les autres paris (totaux, handicaps) ont leurs scénarios gain /
+# remboursement / perte. La croissance logarithmique attendue est maximisée
+# sous contraintes d'exposition (par pari, par match, par jour) avec SLSQP et
+# un gradient analytique ; la matrice des rendements par scénario rend
+# l'objectif entièrement vectorisé.
+#
+# Usage : python utils/staking.py --bankroll 1000
+# -----------------------------------------------------------------------------
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+BETS_PATH = "data/bets_today.csv"
+
+KELLY_FRACTION = 0.25          # quart de Kelly
+MAX_BET_FRACTION = 0.05        # mise maximale par pari (fraction du bankroll)
+MAX_FIXTURE_FRACTION = 0.08    # exposition maximale par match
+MAX_DAILY_EXPOSURE = 0.25      # exposition maximale sur la journée
+EXCLUSIVE_MARKETS = ("Match Winner", "Both Teams Score")   # une seule issue gagnante
+EPS = 1e-12
+
+
+def _column(bets, name, default):
+    return bets[name].to_numpy() if name in bets else np.full(len(bets), default)
+
+
+def exclusive_groups(bets):
+    """
+    Groupes de paris mutuellement exclusifs : (match, marché) pour les marchés
+    exclusifs, un groupe par pari sinon.
+    :return: (groupe de chaque pari (n,), match de chaque pari (n,)), en codes entiers
+    """
+    p_push = np.nan_to_num(_column(bets, "push_prob", 0.0).astype(np.float64))
+    fixtures = _column(bets, "fixture_id", None)
+    fixtures = np.where(pd.isna(fixtures), bets["match"].to_numpy(), fixtures)
+    markets = _column(bets, "market", EXCLUSIVE_MARKETS[0])
+    exclusive = np.isin(markets, EXCLUSIVE_MARKETS) & (p_push == 0)
+    keys = [(f, m) if e else (f, m, i) for i, (f, m, e) in enumerate(zip(fixtures, markets, exclusive))]
+    return pd.factorize(pd.Series(keys, dtype=object))[0], pd.factorize(pd.Series(fixtures, dtype=object))[0]
+
+
+def scenario_matrix(bets):
+    """
+    Scénarios de règlement des paris du jour.
+    :return: (probabilités (S,), rendements par unité misée (S, n), match de chaque pari (n,))
+    """
+    n = len(bets)
+    odds = bets["bookmaker_odds"].to_numpy(dtype=np.float64)
+    p_win = bets["expected_prob"].to_numpy(dtype=np.float64)
+    p_push = np.nan_to_num(_column(bets, "push_prob", 0.0).astype(np.float64))
+    groups, fixtures = exclusive_groups(bets)
+
+    probs, rows = [], []
+    for g in range(groups.max() + 1 if n else 0):
+        members = np.flatnonzero(groups == g)
+        base = np.zeros(n)
+        base[members] = -1.0
+        # Un scénario par pari gagnant, puis « aucun pari gagnant »
+        for k in members:
+            row = base.copy()
+            row[k] = odds[k] - 1
+            probs.append(p_win[k])
+            rows.append(row)
+        if len(members) == 1 and p_push[members[0]] > 0:
+            row = np.zeros(n)
+            probs.append(p_push[members[0]])
+            rows.append(row)
+        probs.append(max(1.0 - p_win[members].sum() - p_push[members].sum(), 0.0))
+        rows.append(base)
+
+    return np.asarray(probs), np.asarray(rows).reshape(len(rows), n), fixtures
+
+
+def independent_kelly_fractions(prob, odds, push=None, fraction=KELLY_FRACTION, max_bet=MAX_BET_FRACTION,
+                                max_exposure=None):
+    """
+    Kelly fractionnaire pari par pari (forme fermée, remboursement compris),
+    plafonné par pari puis, si ``max_exposure`` est donné, ramené à cette
+    exposition totale.
+    """
+    prob = np.asarray(prob, dtype=np.float64)
+    odds = np.asarray(odds, dtype=np.float64)
+    push = np.zeros(prob.shape) if push is None else np.asarray(push, dtype=np.float64)
+    p_lose = np.clip(1 - prob - push, 0, None)
+    # max p_w log(1 + (o-1) x) + p_l log(1 - x)  =>  x = (p_w (o-1) - p_l) / ((o-1)(p_w + p_l))
+    kelly = (prob * (odds - 1) - p_lose) / np.clip((odds - 1) * (prob + p_lose), EPS, None)
+    x = np.clip(np.nan_to_num(kelly) * fraction, 0, max_bet)
+    if max_exposure is not None and x.sum() > max_exposure:
+        x *= max_exposure / x.sum()
+    return x
+
+
+def kelly_fractions(bets, fraction=KELLY_FRACTION, max_bet=MAX_BET_FRACTION,
+                    max_fixture=MAX_FIXTURE_FRACTION, max_exposure=MAX_DAILY_EXPOSURE):
+    """
+    Mises de Kelly fractionnaire (en fraction du bankroll) de tous les paris
+    du jour, optimisées conjointement.
+
+    Les matchs étant indépendants, la croissance attendue est approchée par la
+    somme des croissances par groupe de paris. Kelly fractionnaire : ``x``
+    maximise E[log(1 + R x / fraction)], soit ``fraction`` fois la mise de
+    Kelly complète quand aucune contrainte n'est active.
+    """
+    if len(bets) == 0:
+        return np.zeros(0)
+    probs, returns, fixtures = scenario_matrix(bets)
+    return maximize_log_growth(probs, returns, fixtures, fraction, max_bet, max_fixture, max_exposure)
+
+
+def maximize_log_growth(probs, returns, fixtures, fraction=KELLY_FRACTION, max_bet=MAX_BET_FRACTION,
+                        max_fixture=MAX_FIXTURE_FRACTION, max_exposure=MAX_DAILY_EXPOSURE):
+    """
+    Fractions ``x`` maximisant E[log(1 + R x / fraction)] sur des scénarios
+    pondérés ``probs`` (S,) de rendements ``returns`` (S, n), sous plafonds
+    par pari, par match (``fixtures`` : code du match de chaque pari) et sur
+    la journée (SLSQP, gradient analytique).
+    """
+    from scipy.optimize import minimize
+    n = returns.shape[1]
+    scaled = returns / fraction
+
+    def objective(x):
+        wealth = np.clip(1 + scaled @ x, EPS, None)
+        return -probs @ np.log(wealth), -scaled.T @ (probs / wealth)
+
+    # Exposition par match et sur la journée : A x <= limites
+    A = np.zeros((fixtures.max() + 2, n))
+    A[fixtures, np.arange(n)] = 1.0
+    A[-1] = 1.0
+    limits = np.append(np.full(fixtures.max() + 1, max_fixture), max_exposure)
+
+    result = minimize(
+        objective, np.zeros(n), jac=True, method="SLSQP",
+        bounds=[(0.0, max_bet)] * n,
+        constraints=[{"type": "ineq", "fun": lambda x: limits - A @ x, "jac": lambda x: -A}],
+    )
+    return np.clip(result.x, 0, max_bet)
+
+
+def flat_stakes(bets, bankroll, unit):
+    """Mise fixe ``unit`` sur chaque pari"""
+    return np.full(len(bets), float(unit))
+
+
+def kelly_stakes(bets, bankroll, unit=None, **kwargs):
+    """Mises de Kelly fractionnaire en €, arrondies au centime"""
+    return np.round(kelly_fractions(bets, **kwargs) * float(bankroll), 2)
+
+
+def portfolio_stakes(bets, bankroll, unit=None, **kwargs):
+    """Mises du portefeuille corrélé (utils/portfolio.py) en €, arrondies au centime"""
+    from utils.portfolio import portfolio_fractions
+    return np.round(portfolio_fractions(bets, **kwargs) * float(bankroll), 2)
+
+
+STAKE_POLICIES = {
+    "flat": flat_stakes,
+    "kelly": kelly_stakes,
+    "portfolio": portfolio_stakes,
+}
+
+
+def stake_amounts(policy, bets, bankroll, unit):
+    """Mises en € de chaque pari selon la politique ``policy``"""
+    if policy not in STAKE_POLICIES:
+        raise ValueError(f"❌ Politique de mise inconnue : {policy} (disponibles : {', '.join(STAKE_POLICIES)})")
+    return STAKE_POLICIES[policy](bets, bankroll, unit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mises de Kelly fractionnaire des value bets du jour")
+    parser.add_argument("--bankroll", type=float, default=1000.0)
+    parser.add_argument("--fraction", type=float, default=KELLY_FRACTION)
+    args = parser.parse_args()
+
+    bets = pd.read_csv(BETS_PATH)
+    if bets.empty:
+        print("ℹ️ Aucun value bet aujourd'hui")
+        return
+    bets["stake"] = kelly_stakes(bets, args.bankroll, fraction=args.fraction)
+    columns = [c for c in ["match", "market", "bet_on", "bookmaker_odds", "expected_prob", "expected_value", "stake"]
+               if c in bets]
+    print(bets[columns].to_string(index=False))
+    print(f"\n💰 Exposition totale : {bets['stake'].sum():.2f}€ "
+          f"({bets['stake'].sum() / args.bankroll:.1%} du bankroll, {(bets['stake'] > 0).sum()} paris misés)")
+
+
+if __name__ == "__main__":
+    main()
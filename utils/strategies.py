@@ -1,7 +1,40 @@
-import json
-import os
+# utils/strategies.py
+# -----------------------------------------------------------------------------
+# Heuristiques de probabilités 1X2 sans entraînement
+# Chaque stratégie est une fonction vectorisée enregistrée dans STRATEGIES :
+# elle reçoit les colonnes de statistiques d'équipes et de rankings de tous
+# les matchs (tableaux de même longueur) et renvoie un tableau (n, 3)
+# Home / Draw / Away. Les rankings viennent de la table de features
+# (preprocessing/feature_frame.py) ; estimate_probabilities reste l'interface
+# par match (dictionnaires) au-dessus de la stratégie goal_difference.
+# -----------------------------------------------------------------------------
+
+import numpy as np
 import pandas as pd
 
+DEFAULT_STRATEGY = "ranking_elo"
+HOME_BONUS = 0.5               # bonus domicile (en buts)
+RANKING_SCALE = 1000           # ranking / 1000 ajouté au score de forme
+DRAW_FLOOR = 0.25              # part minimale de nuls de goal_difference
+ELO_HOME_ADVANTAGE = 60        # avantage domicile (points de ranking)
+ELO_DRAW_RATE = 0.26           # proportion de nuls entre équipes de même niveau
+
+# Colonnes lues par les stratégies (0 si absentes)
+STRATEGY_COLUMNS = (
+    "home_goals_for", "home_goals_against", "away_goals_for", "away_goals_against",
+    "home_ranking", "away_ranking",
+)
+
+STRATEGIES = {}
+
+
+def register_strategy(name):
+    """Décorateur : enregistre une stratégie vectorisée sous ``name``"""
+    def decorator(func):
+        STRATEGIES[name] = func
+        return func
+    return decorator
+
 
 def calculate_goal_stats(stats: dict) -> float:
     """
@@ -12,41 +45,78 @@ def calculate_goal_stats(stats: dict) -> float:
     return gf - ga
 
 
-def load_rankings(path: str = "data/rankings.csv") -> pd.DataFrame:
+def _column(columns, name, n):
+    if name in columns:
+        return np.nan_to_num(np.asarray(columns[name], dtype=np.float64))
+    return np.zeros(n)
+
+
+@register_strategy("goal_difference")
+def goal_difference_probabilities(columns) -> np.ndarray:
     """
-    Charge le classement global (similaire ELO ou autres).
+    Stratégie PL : différence de buts + bonus domicile + ranking / 1000,
+    normalisée par la somme des deux scores. Ces deux parts somment déjà à 1
+    (nul toujours nul) : le nul reçoit DRAW_FLOOR, retiré au prorata des
+    victoires.
     """
-    return pd.read_csv(path, index_col=0)
+    n = len(next(iter(columns.values()))) if len(columns) else 0
+    home_score = (_column(columns, "home_goals_for", n) - _column(columns, "home_goals_against", n)
+                  + HOME_BONUS + _column(columns, "home_ranking", n) / RANKING_SCALE)
+    away_score = (_column(columns, "away_goals_for", n) - _column(columns, "away_goals_against", n)
+                  + _column(columns, "away_ranking", n) / RANKING_SCALE)
+
+    total = home_score + away_score
+    safe_total = np.where(total == 0, 1.0, total)
+    home_prob = home_score / safe_total
+    away_prob = away_score / safe_total
+    draw_prob = np.clip(1 - (home_prob + away_prob), DRAW_FLOOR, 0.5)
+    share = np.divide(1 - draw_prob, home_prob + away_prob, out=np.ones(n), where=(home_prob + away_prob) != 0)
+    proba = np.column_stack([home_prob * share, draw_prob, away_prob * share])
+    proba[total == 0] = [0.33, 0.34, 0.33]  # fallback
+    return proba.round(3)
 
 
-def estimate_probabilities(home_stats: dict, away_stats: dict, home_team: str, away_team: str, rankings: pd.DataFrame) -> dict:
+@register_strategy("ranking_elo")
+def ranking_elo_probabilities(columns) -> np.ndarray:
     """
-    Évalue les probabilités de victoire/défaite/nul inspiré de la stratégie PL.
+    Espérance Elo de l'écart de rankings (avantage domicile compris), une
+    part de nuls maximale entre équipes de même niveau.
     """
-    home_score = calculate_goal_stats(home_stats)
-    away_score = calculate_goal_stats(away_stats)
+    n = len(next(iter(columns.values()))) if len(columns) else 0
+    diff = _column(columns, "home_ranking", n) - _column(columns, "away_ranking", n) + ELO_HOME_ADVANTAGE
+    expected = 1 / (1 + 10 ** (-diff / 400))
+    draw_prob = ELO_DRAW_RATE * 4 * expected * (1 - expected)
+    return np.column_stack([expected - draw_prob / 2, draw_prob, 1 - expected - draw_prob / 2])
 
-    # Bonus domicile
-    home_score += 0.5
 
-    # Ajustement par ranking
-    if home_team in rankings.index:
-        home_score += rankings.loc[home_team]["score"] / 1000
-    if away_team in rankings.index:
-        away_score += rankings.loc[away_team]["score"] / 1000
+def predict_strategy(columns, strategy: str = DEFAULT_STRATEGY) -> np.ndarray:
+    """
+    Probabilités (n, 3) Home / Draw / Away de tous les matchs.
+    :param columns: DataFrame ou dictionnaire de tableaux (STRATEGY_COLUMNS)
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"❌ Stratégie inconnue : {strategy} (disponibles : {', '.join(STRATEGIES)})")
+    if isinstance(columns, pd.DataFrame):
+        columns = {name: columns[name].to_numpy() for name in STRATEGY_COLUMNS if name in columns}
+    return STRATEGIES[strategy](columns)
 
-    # Total et normalisation
-    total = home_score + away_score
-    if total == 0:
-        return {"home": 0.33, "draw": 0.34, "away": 0.33}  # fallback
-
-    home_prob = home_score / total
-    away_prob = away_score / total
-    draw_prob = 1 - (home_prob + away_prob)
-    draw_prob = max(0, min(draw_prob, 0.5))  # borne
-
-    return {
-        "home": round(home_prob, 3),
-        "draw": round(draw_prob, 3),
-        "away": round(away_prob, 3),
-    }
+
+def estimate_probabilities(home_stats: dict, away_stats: dict, home_team: str, away_team: str, rankings: dict) -> dict:
+    """
+    Évalue les probabilités de victoire/défaite/nul inspiré de la stratégie PL.
+    Interface par match conservée pour compatibilité : utiliser predict_strategy
+    pour plusieurs matchs.
+    :param rankings: score par équipe (preprocessing.feature_frame.load_rankings)
+    """
+    def score(team):
+        return rankings.get(team, 0.0)
+
+    home, draw, away = goal_difference_probabilities({
+        "home_goals_for": [home_stats.get("goals_for", 0)],
+        "home_goals_against": [home_stats.get("goals_against", 0)],
+        "away_goals_for": [away_stats.get("goals_for", 0)],
+        "away_goals_against": [away_stats.get("goals_against", 0)],
+        "home_ranking": [score(home_team)],
+        "away_ranking": [score(away_team)],
+    })[0]
+    return {"home": float(home), "draw": float(draw), "away": float(away)}
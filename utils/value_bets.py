@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# utils/value_bets.py
+# -----------------------------------------------------------------------------
+# Moteur vectorisé de détection des value bets
+# Une matrice de probabilités (n_matchs, n_issues) est alignée par fixture_id
+# sur une matrice de cotes de même forme ; expected value, edge et probabilité
+# implicite sont calculés en opérations sur tableaux et les seuils appliqués
+# par masque. Fonctionne pour tout marché (1X2, over/under, handicap
+# asiatique...) : seules les étiquettes des issues changent, et les
+# probabilités de remboursement (push) sont prises en compte si fournies.
+# La probabilité sans marge du marché (utils/overround.py) peut être ajoutée
+# à côté de la probabilité implicite 1 / cote, avec son propre edge.
+#
+# Usage : python utils/value_bets.py --benchmark 100000
+# -----------------------------------------------------------------------------
+
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+OUTCOMES = ("Home", "Draw", "Away")
+MIN_EV = 0.05                  # 5% de value minimum
+
+
+def fixture_rows(proba_ids, odds_ids):
+    """
+    Positions des fixture_id présents des deux côtés.
+    :return: (fixture_ids communs, lignes côté probabilités, lignes côté cotes)
+    """
+    proba_ids = np.asarray(proba_ids)
+    odds_ids = np.asarray(odds_ids)
+    # Un fixture_id en double garde sa dernière ligne
+    _, last = np.unique(odds_ids[::-1], return_index=True)
+    odds_rows = len(odds_ids) - 1 - last
+    common, p_idx, o_idx = np.intersect1d(proba_ids, odds_ids[odds_rows], return_indices=True)
+    return common, p_idx, odds_rows[o_idx]
+
+
+def align_by_fixture(proba_ids, proba, odds_ids, odds):
+    """
+    Aligne probabilités et cotes sur les fixture_id présents des deux côtés.
+    :return: (fixture_ids, lignes de proba retenues, proba, cotes)
+    """
+    common, p_idx, o_idx = fixture_rows(proba_ids, odds_ids)
+    return common, p_idx, np.asarray(proba)[p_idx], np.asarray(odds, dtype=np.float64)[o_idx]
+
+
+def compute_value(proba, odds, push=None):
+    """
+    Expected value, probabilité implicite (1 / cote) et edge de chaque
+    (match, issue). Avec ``push`` (probabilité de remboursement : lignes entières ou au quart),
+    EV = p_gain * cote + p_push - 1 et l'edge compare la probabilité de gain
+    hors remboursement à la probabilité implicite.
+    Les cotes absentes (NaN) ou invalides (<= 1) donnent une EV NaN.
+    """
+    proba = np.asarray(proba, dtype=np.float64)
+    odds = np.asarray(odds, dtype=np.float64)
+    push = np.zeros(proba.shape) if push is None else np.asarray(push, dtype=np.float64)
+    valid = np.isfinite(odds) & (odds > 1.0)
+    implied = np.divide(1.0, odds, out=np.full(odds.shape, np.nan), where=valid)
+    ev = np.where(valid, proba * odds + push - 1, np.nan)
+    settled = np.divide(proba, 1 - push, out=np.zeros(proba.shape), where=push < 1)
+    return ev, implied, settled - implied
+
+
+def find_value_bets(fixture_ids, proba, odds, outcomes=OUTCOMES, labels=None,
+                    min_ev=MIN_EV, min_edge=None, market=None, bookmakers=None, push=None, fair=None):
+    """
+    Paris dont l'expected value dépasse ``min_ev`` (et l'edge ``min_edge``).
+    :param labels: libellé de chaque match (colonne ``match``)
+    :param bookmakers: bookmaker de chaque cote (n, k) (colonne ``bookmaker``)
+    :param push: probabilités de remboursement (n, k) (colonne ``push_prob``)
+    :param fair: probabilités sans marge du marché (n, k) (colonnes ``fair_prob``
+        et ``fair_edge`` : probabilité de gain hors remboursement - ``fair``, en %)
+    :return: DataFrame trié par expected value décroissante
+    """
+    ev, implied, edge = compute_value(proba, odds, push)
+    mask = np.nan_to_num(ev, nan=-np.inf) > min_ev
+    if min_edge is not None:
+        mask &= np.nan_to_num(edge, nan=-np.inf) > min_edge
+
+    rows, cols = np.nonzero(mask)
+    order = np.argsort(-ev[rows, cols], kind="stable")
+    rows, cols = rows[order], cols[order]
+
+    bets = {"fixture_id": np.asarray(fixture_ids)[rows]}
+    if labels is not None:
+        bets["match"] = np.asarray(labels)[rows]
+    if market is not None:
+        bets["market"] = market
+    bets["bet_on"] = np.asarray(outcomes)[cols]
+    bets["bookmaker_odds"] = np.asarray(odds, dtype=np.float64)[rows, cols]
+    if bookmakers is not None:
+        bets["bookmaker"] = np.asarray(bookmakers, dtype=object)[rows, cols]
+    bets["expected_prob"] = np.asarray(proba, dtype=np.float64)[rows, cols].round(3)
+    if push is not None:
+        bets["push_prob"] = np.asarray(push, dtype=np.float64)[rows, cols].round(3)
+    bets.update({
+        "expected_value": ev[rows, cols].round(3),
+        "implied_odds_prob": implied[rows, cols].round(3),
+        "edge": (edge[rows, cols] * 100).round(2),     # Avantage en %
+    })
+    if fair is not None:
+        fair_prob = np.asarray(fair, dtype=np.float64)[rows, cols]
+        bets["fair_prob"] = fair_prob.round(3)
+        bets["fair_edge"] = ((edge[rows, cols] + implied[rows, cols] - fair_prob) * 100).round(2)
+    return pd.DataFrame(bets)
+
+
+def benchmark(n_rows=100_000, n_outcomes=3, seed=0):
+    """Mesure le moteur sur ``n_rows`` couples (match, issue) simulés"""
+    rng = np.random.default_rng(seed)
+    n = n_rows // n_outcomes
+    proba = rng.dirichlet(np.full(n_outcomes, 2.5), n)
+    odds = 1 / np.clip(proba * rng.uniform(0.9, 1.15, proba.shape), 0.02, None)
+    ids = rng.permutation(n)
+    labels = np.array([f"M{i}" for i in range(n)], dtype=object)
+
+    start = time.perf_counter()
+    fixture_ids, rows, p, o = align_by_fixture(np.arange(n), proba, ids, odds[ids])
+    bets = find_value_bets(fixture_ids, p, o, [f"O{k}" for k in range(n_outcomes)], labels[rows])
+    elapsed = time.perf_counter() - start
+    return {"rows": n * n_outcomes, "bets": len(bets), "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Moteur vectorisé de value bets")
+    parser.add_argument("--benchmark", type=int, default=100_000, help="lignes (match × issue) simulées")
+    args = parser.parse_args()
+
+    result = benchmark(args.benchmark)
+    print(f"⚡ {result['rows']:,} lignes match × issue → {result['bets']:,} value bets "
+          f"en {result['seconds'] * 1000:.1f} ms ({result['rows'] / result['seconds']:,.0f} lignes/s)")
+
+
+if __name__ == "__main__":
+    main()